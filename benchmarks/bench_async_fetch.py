@@ -0,0 +1,96 @@
+"""Async constituent fetcher vs. the old ThreadPoolExecutor(max_workers=10) loop, against a local mock server.
+
+    python benchmarks/bench_async_fetch.py --symbols 500 --latency 0.05 --throttle 0.05
+
+The mock server answers /quote/<symbol> with a small JSON payload after `latency` seconds and returns
+HTTP 429 for a `throttle` fraction of requests, so retries and AIMD back-off are exercised offline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eli.async_fetch import fetch_all, make_json_fetcher
+
+
+def start_mock_server(latency, throttle, error_rate):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            roll = random.random()
+            if roll < throttle:
+                status, body = 429, b"{}"
+            elif roll < throttle + error_rate:
+                status, body = 503, b"{}"
+            else:
+                symbol = self.path.rsplit("/", 1)[-1]
+                status = 200
+                body = json.dumps({'symbol': symbol, 'industry': 'Software', 'trailingPE': 25.0,
+                                   'returnOnEquity': 0.2}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    # Pooled keep-alive connections are dropped when the client closes; that's not worth a traceback
+    server.handle_error = lambda request, client_address: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_threadpool(url_template, symbols):
+    def get(symbol):
+        try:
+            with urllib.request.urlopen(url_template.format(symbol=symbol), timeout=10) as response:
+                return json.loads(response.read())
+        except Exception:
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(get, symbols))
+    elapsed = time.perf_counter() - start
+    failed = sum(result is None for result in results)
+    return {'elapsed_s': round(elapsed, 3), 'failed': failed,
+            'throughput_per_s': round(len(symbols) / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--throttle", type=float, default=0.05)
+    parser.add_argument("--errors", type=float, default=0.02)
+    parser.add_argument("--rate", type=float, default=200)
+    args = parser.parse_args()
+
+    server = start_mock_server(args.latency, args.throttle, args.errors)
+    url_template = f"http://127.0.0.1:{server.server_address[1]}/quote/{{symbol}}"
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+
+    print("threadpool(10):", run_threadpool(url_template, symbols))
+    results, stats = asyncio.run(fetch_all(symbols, make_json_fetcher(url_template), rate=args.rate,
+                                           max_concurrency=64, deadline=10.0))
+    print("async fetcher: ", stats.summary())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
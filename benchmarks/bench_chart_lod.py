@@ -0,0 +1,56 @@
+"""Stock chart payload with and without level-of-detail reduction, on synthetic daily bars.
+
+    python benchmarks/bench_chart_lod.py --years 30 --max-bars 400
+
+Reports figure build time, figure JSON size and the number of points in the price trace for full
+detail and for each LOD mode. JSON size and point count are what the browser has to parse and draw.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit_ELI import plot_stock_chart
+from synthetic import synthetic_bars
+
+
+def measure(data, **kwargs):
+    start = time.perf_counter()
+    fig = plot_stock_chart(data, "SYN", data['Close'].iloc[-1] * 0.9, 0, data['Close'].iloc[-1] * 1.05,
+                           "Strike Price", "Knock-out Price", **kwargs)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    payload = fig.to_json()
+    return {
+        'trace': type(fig.data[0]).__name__,
+        'points': len(fig.data[0].x),
+        'build_ms': build * 1000,
+        'serialise_ms': (time.perf_counter() - start) * 1000,
+        'json_kb': len(payload) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=30)
+    parser.add_argument("--max-bars", type=int, default=400)
+    args = parser.parse_args()
+
+    data = synthetic_bars(args.years)
+    print(f"{len(data)} bars")
+    runs = {
+        'full detail': dict(max_bars=None),
+        'candles': dict(max_bars=args.max_bars, lod_mode='candles'),
+        'line (LTTB)': dict(max_bars=args.max_bars, lod_mode='line'),
+        'auto': dict(max_bars=args.max_bars, lod_mode='auto'),
+    }
+    for label, kwargs in runs.items():
+        r = measure(data, **kwargs)
+        print(f"{label:>12}: {r['trace']:<11} {r['points']:>6} points  build {r['build_ms']:7.1f} ms  "
+              f"to_json {r['serialise_ms']:7.1f} ms  {r['json_kb']:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Cold-start timings: fresh-interpreter import cost of the app and headless core, plus first render.
+
+    python benchmarks/bench_cold_start.py --repeat 5 --output cold_start.json
+    python benchmarks/bench_cold_start.py --render     # also time a full first render (needs network, a warm
+                                                       # ELI_CACHE_DIR or ELI_PROVIDER=replay:<cassette dir>)
+
+Every measurement runs in a new subprocess so nothing is already in sys.modules, which is what a
+freshly started container pays. `-X importtime` is used to list the slowest top-level imports.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TARGETS = {
+    'eli.core': "import eli.core",
+    'eli.cli': "import eli.cli",
+    'streamlit_ELI (bare mode)': "import streamlit_ELI",
+}
+
+RENDER_SCRIPT = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+AppTest.from_file("streamlit_ELI.py", default_timeout={timeout}).run()
+print(time.perf_counter() - start)
+"""
+
+
+def run_python(code, extra_args=()):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, *extra_args, "-c", code], cwd=ROOT, env=env,
+                               capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed")
+    return elapsed, completed
+
+
+def slowest_imports(code, limit=10):
+    # -X importtime writes "import time: self [us] | cumulative | package" to stderr; report the
+    # cumulative cost of each top-level package (pandas, yfinance, plotly, ...) wherever it was first pulled in
+    _, completed = run_python(code, ["-X", "importtime"])
+    packages = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if "." not in name or name.startswith("eli."):
+            packages[name] = max(packages.get(name, 0), int(cumulative_us))
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{'module': name, 'cumulative_ms': round(us / 1000, 1)} for name, us in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--render", action="store_true", help="Also time a first render of the app (default ticker)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    baseline, _ = run_python("pass")
+    results = {'python': sys.version.split()[0], 'interpreter_startup_s': round(baseline, 3), 'imports': {}}
+    for label, code in IMPORT_TARGETS.items():
+        try:
+            timings = [run_python(code)[0] - baseline for _ in range(args.repeat)]
+        except RuntimeError as e:
+            results['imports'][label] = {'error': str(e)}
+            continue
+        results['imports'][label] = {
+            'median_s': round(statistics.median(timings), 3),
+            'min_s': round(min(timings), 3),
+            'slowest_imports': slowest_imports(code),
+        }
+
+    if args.render:
+        code = RENDER_SCRIPT.format(timeout=args.timeout)
+        try:
+            _, completed = run_python(code)
+            results['first_render_s'] = round(float(completed.stdout.strip().splitlines()[-1]), 3)
+        except (RuntimeError, ValueError) as e:
+            results['first_render_error'] = str(e)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
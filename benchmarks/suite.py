@@ -0,0 +1,155 @@
+"""Offline benchmark suite for the numeric and chart-building hot paths, with JSON baselines.
+
+    python benchmarks/suite.py --save-baseline                 # record benchmarks/baseline.json on this machine
+    python benchmarks/suite.py                                 # compare against it, exit 1 on a regression
+    python benchmarks/suite.py --threshold 1.5 --filter chart  # looser limit, only the chart cases
+
+Every input is synthetic (see synthetic.py), so nothing touches the network or the on-disk caches.
+A case regresses when its median time exceeds the baseline median by more than `threshold`x;
+figure JSON sizes are compared the same way. Baselines are machine specific, record them on the
+machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eli.core import (calculate_dcf_fair_value, calculate_ema, calculate_excess_return_fair_value,
+                      calculate_industry_averages, calculate_volume_profile)
+from eli.industry_stats import industry_stats, peer_table, percentile_ranks
+from synthetic import synthetic_bars, synthetic_financials, synthetic_peers
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+DATASETS = {
+    '1y': lambda: synthetic_bars(years=1),
+    '10y': lambda: synthetic_bars(years=10),
+    'intraday_20d': lambda: synthetic_bars(intraday_days=20),
+}
+
+
+def chart_case(data):
+    # Imported lazily so the numeric cases still run where Streamlit isn't installed
+    from streamlit_ELI import plot_stock_chart
+    price = data['Close'].iloc[-1]
+
+    def build():
+        return plot_stock_chart(data, "SYN", price * 0.9, price * 0.8, price * 1.05, "Strike Price", "Knock-out Price")
+    return build
+
+
+def cases():
+    datasets = {name: make() for name, make in DATASETS.items()}
+    financials = synthetic_financials()
+    peers = synthetic_peers(500)
+    suite = {}
+    for name, data in datasets.items():
+        suite[f'volume_profile[{name}]'] = lambda data=data: calculate_volume_profile(data)
+        suite[f'ema_200[{name}]'] = lambda data=data: calculate_ema(data, 200)
+        suite[f'chart_build[{name}]'] = ('chart', data)
+    suite['industry_averages[500 peers]'] = lambda: calculate_industry_averages(peers, 'Software')
+    peer_rows = peer_table(peers)
+    suite['industry_stats[500 peers]'] = lambda: industry_stats(peer_rows)
+    suite['percentile_ranks[500 peers]'] = lambda: percentile_ranks(peer_rows)
+    suite['dcf_fair_value'] = lambda: calculate_dcf_fair_value(financials, 0.09, 0.03, 5, 180.0)
+    suite['excess_return_fair_value'] = lambda: calculate_excess_return_fair_value(financials, 0.1, 0.03)
+    return suite
+
+
+def time_case(func, repeat, min_time=0.05):
+    # Loop count is chosen so one sample lasts at least `min_time`; the median sample is reported
+    start = time.perf_counter()
+    func()
+    single = max(time.perf_counter() - start, 1e-7)
+    loops = max(1, int(min_time / single))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return {'median_s': statistics.median(samples), 'min_s': min(samples), 'loops': loops}
+
+
+def run(repeat, pattern=None):
+    results = {}
+    for name, case in cases().items():
+        if pattern and pattern not in name:
+            continue
+        if isinstance(case, tuple):
+            try:
+                build = chart_case(case[1])
+            except ImportError as e:
+                results[name] = {'skipped': str(e)}
+                continue
+            result = time_case(build, repeat)
+            start = time.perf_counter()
+            payload = build().to_json()
+            result['json_bytes'] = len(payload)
+            result['serialise_s'] = time.perf_counter() - start
+        else:
+            result = time_case(case, repeat)
+        results[name] = result
+        print(f"{name:<32} {result['median_s'] * 1000:11.4f} ms" +
+              (f"  {result['json_bytes'] / 1024:9.1f} KB" if 'json_bytes' in result else ""))
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base or 'median_s' not in base or 'median_s' not in result:
+            continue
+        for metric in ('median_s', 'json_bytes'):
+            if metric in base and metric in result and result[metric] > base[metric] * threshold:
+                regressions.append(f"{name}: {metric} {result[metric]:.6g} vs baseline {base[metric]:.6g} "
+                                   f"({result[metric] / base[metric]:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed slowdown factor vs the baseline")
+    parser.add_argument("--filter", help="Only run cases whose name contains this")
+    parser.add_argument("--output", help="Also write this run's results as JSON to this file")
+    args = parser.parse_args()
+
+    report = {
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': run(args.repeat, args.filter),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except OSError:
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    regressions = compare(report['results'], baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regressions against {args.baseline} (threshold {args.threshold}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
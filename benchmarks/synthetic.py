@@ -0,0 +1,70 @@
+"""Deterministic synthetic inputs for the offline benchmarks: OHLCV frames, fundamentals and peers."""
+import numpy as np
+import pandas as pd
+
+INDUSTRIES = ['Software', 'Semiconductors', 'Banks', 'Insurance', 'Retail', 'Utilities', 'Biotechnology',
+              'Oil & Gas', 'Telecom', 'REITs']
+
+
+def synthetic_bars(years=1.0, seed=0, intraday_days=None):
+    """Daily bars over `years`, or 1-minute bars over `intraday_days` sessions of 390 minutes."""
+    rng = np.random.default_rng(seed)
+    if intraday_days:
+        days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=intraday_days, tz="America/New_York")
+        index = pd.DatetimeIndex([day + pd.Timedelta(hours=9, minutes=30 + m) for day in days for m in range(390)])
+        sigma = 0.0008
+    else:
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=int(years * 252), tz="America/New_York")
+        sigma = 0.015
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, sigma, len(index))))
+    open_ = close * np.exp(rng.normal(0, sigma / 3, len(index)))
+    spread = np.abs(rng.normal(0, sigma / 1.5, len(index))) * close
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 5_000_000, len(index)).astype(float),
+    }, index=index)
+
+
+def synthetic_financials(seed=0):
+    # Same keys get_financial_data returns, with a growing positive FCF series
+    rng = np.random.default_rng(seed)
+    fcf_history = list(1e10 * np.cumprod(1 + rng.normal(0.06, 0.05, 8))[::-1])
+    return {
+        'total_debt': 1.1e11,
+        'cash': 3e10,
+        'cash_equivalents': 2e10,
+        'cash_and_cash_equivalents': 6e10,
+        'total_equity': 7e10,
+        'net_debt': 5e10,
+        'share_issued': 1.5e10,
+        'interest_expense': 3.5e9,
+        'income_tax': 1.9e10,
+        'net_income': 9.5e10,
+        'pre_tax_income': 1.14e11,
+        'fcf_history': fcf_history,
+        'fcf_years': [str(2025 - i) for i in range(len(fcf_history))],
+        'fcf_latest': fcf_history[0],
+        'fcf_1years_ago': fcf_history[1],
+        'fcf_2years_ago': fcf_history[2],
+        'fcf_3years_ago': fcf_history[3],
+        'shares_outstanding': 1.5e10,
+        'market_cap': 3e12,
+    }
+
+
+def synthetic_peers(count=500, seed=0):
+    # get_stock_info rows; a few missing or negative ratios like real constituents
+    rng = np.random.default_rng(seed)
+    peers = []
+    for i in range(count):
+        pe = float(rng.lognormal(3, 0.5)) if rng.random() > 0.1 else None
+        roe = float(rng.normal(0.15, 0.1)) if rng.random() > 0.1 else None
+        margin = float(rng.normal(0.12, 0.1))
+        peers.append({'symbol': f"SYN{i:03d}", 'industry': INDUSTRIES[i % len(INDUSTRIES)], 'pe': pe, 'roe': roe,
+                      'forward_pe': pe * float(rng.uniform(0.8, 1.1)) if pe else None,
+                      'pb': float(rng.lognormal(1, 0.6)) if rng.random() > 0.1 else None,
+                      'gross_margin': margin + 0.25, 'operating_margin': margin + 0.05, 'profit_margin': margin})
+    return peers
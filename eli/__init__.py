@@ -0,0 +1,4 @@
+import os
+
+# Root directory for everything the app persists between runs (bars, snapshots, indexes)
+CACHE_DIR = os.environ.get("ELI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "eli"))
@@ -0,0 +1,5 @@
+import sys
+
+from eli.cli import main
+
+sys.exit(main())
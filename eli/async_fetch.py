@@ -0,0 +1,267 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from eli.fundamentals import get_snapshot
+from eli.industry_stats import empty_row, stock_row
+from eli.lazy import lazy_import
+from eli.tracing import traced
+
+# aiohttp is only needed once a batch actually runs
+aiohttp = lazy_import("aiohttp")
+
+# Upper bound of the AIMD limiter, and the size of the thread pool blocking yfinance calls run on
+MAX_CONCURRENCY = 64
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _blocking_executor():
+    # The default executor is capped at about 32 threads, which would cap the limiter below its maximum
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="fetch")
+        return _executor
+
+
+class RateLimited(Exception):
+    pass
+
+
+class RetryableError(Exception):
+    pass
+
+
+# requests / curl_cffi network errors that yfinance lets through
+TRANSIENT_ERRORS = ("ConnectionError", "Timeout", "ConnectTimeout", "ReadTimeout", "CurlError")
+
+
+def _is_transient(error):
+    # Network trouble and 5xx responses; unknown symbols, other 4xx and malformed payloads fail at once
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status >= 500
+    if any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__):
+        return True
+    return isinstance(error, OSError) or "Server Error" in str(error)
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AIMDLimiter:
+    """Concurrency limit that grows by one per clean window and halves whenever upstream throttles us."""
+
+    def __init__(self, initial=8, minimum=1, maximum=64, decrease=0.5):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self.peak = initial
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            while self.in_flight >= self.limit:
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def release(self, throttled=False):
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, int(self.limit * self.decrease))
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self.peak = max(self.peak, self.limit)
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+class FetchStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished = None
+        self.ok = 0
+        self.failed = 0
+        self.retries = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.errors = {}
+        self.peak_concurrency = 0
+        self.final_concurrency = 0
+
+    def record_error(self, exc):
+        name = type(exc).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self):
+        elapsed = (self.finished or time.monotonic()) - self.started
+        total = self.ok + self.failed
+        return {
+            'requests': total,
+            'ok': self.ok,
+            'failed': self.failed,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'timeouts': self.timeouts,
+            'errors': dict(self.errors),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_per_s': round(total / elapsed, 1) if elapsed > 0 else None,
+            'peak_concurrency': self.peak_concurrency,
+            'final_concurrency': self.final_concurrency,
+        }
+
+
+def backoff_delay(attempt, base=0.25, cap=8.0):
+    # "Full jitter": a random delay up to the exponential ceiling spreads retries out
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def _fetch_with_retry(session, symbol, fetch_one, bucket, limiter, stats, retries, deadline):
+    retryable = (RetryableError,) if session is None else (RetryableError, aiohttp.ClientError)
+    # The deadline only counts time spent fetching and backing off. Waiting for a token or a
+    # concurrency slot is excluded, so symbols queued behind a long batch still get their retries
+    spent = 0.0
+    for attempt in range(retries + 1):
+        await bucket.acquire()
+        await limiter.acquire()
+        remaining = deadline - spent
+        started = time.monotonic()
+        throttled = False
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"Deadline exceeded for {symbol}")
+            return await asyncio.wait_for(fetch_one(session, symbol), timeout=remaining)
+        except RateLimited as e:
+            throttled = True
+            stats.throttled += 1
+            error = e
+        except retryable as e:
+            error = e
+        except asyncio.TimeoutError as e:
+            stats.timeouts += 1
+            raise e
+        finally:
+            spent += time.monotonic() - started
+            await limiter.release(throttled=throttled)
+        if attempt == retries:
+            raise error
+        stats.retries += 1
+        delay = min(backoff_delay(attempt), max(0.0, deadline - spent))
+        await asyncio.sleep(delay)
+        spent += delay
+
+
+async def fetch_all(symbols, fetch_one, rate=20, burst=None, concurrency=8, max_concurrency=MAX_CONCURRENCY,
+                    retries=3, deadline=20.0, pool_size=100, pooled_session=True):
+    """Run `fetch_one(session, symbol)` for every symbol; returns ({symbol: result or exception}, stats).
+
+    With pooled_session=False `session` is None, for fetchers that bring their own HTTP client.
+    """
+    stats = FetchStats()
+    bucket = TokenBucket(rate, burst)
+    limiter = AIMDLimiter(initial=concurrency, maximum=max_concurrency)
+    results = {}
+
+    async def run(session, symbol):
+        try:
+            results[symbol] = await _fetch_with_retry(session, symbol, fetch_one, bucket, limiter,
+                                                      stats, retries, deadline)
+            stats.ok += 1
+        except Exception as e:
+            results[symbol] = e
+            stats.failed += 1
+            stats.record_error(e)
+        stats.peak_concurrency = max(stats.peak_concurrency, limiter.peak)
+
+    if pooled_session:
+        # One pooled session for the whole batch so connections are reused across symbols
+        connector = aiohttp.TCPConnector(limit=pool_size, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*(run(session, symbol) for symbol in symbols))
+    else:
+        await asyncio.gather(*(run(None, symbol) for symbol in symbols))
+
+    stats.finished = time.monotonic()
+    stats.final_concurrency = limiter.limit
+    return results, stats
+
+
+def make_json_fetcher(url_template, timeout=10):
+    async def fetch_one(session, symbol):
+        url = url_template.format(symbol=symbol)
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status == 429:
+                raise RateLimited(f"HTTP 429 for {symbol}")
+            if response.status >= 500:
+                raise RetryableError(f"HTTP {response.status} for {symbol}")
+            if response.status >= 400:
+                # Other client errors (e.g. 404 for an unknown symbol) won't go away on a retry
+                raise ValueError(f"HTTP {response.status} for {symbol}")
+            return await response.json()
+    return fetch_one
+
+
+async def fetch_yfinance_info(session, symbol):
+    # yfinance is blocking and manages its own HTTP session, so it runs on a worker thread and
+    # ignores `session`; fetch_stock_infos runs it with pooled_session=False
+    try:
+        # copy_context keeps the tracing run id on the worker thread, like asyncio.to_thread does
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            _blocking_executor(), context.run, lambda: get_snapshot(symbol).info)
+    except Exception as e:
+        message = str(e)
+        if "429" in message or "Too Many Requests" in message or type(e).__name__ == "YFRateLimitError":
+            raise RateLimited(message) from e
+        if _is_transient(e):
+            raise RetryableError(message) from e
+        raise
+
+
+@traced()
+def fetch_stock_infos(symbols, fetch_one=fetch_yfinance_info, **kwargs):
+    """Peer info rows in the same shape as get_stock_info, plus the batch stats summary.
+
+    `fetch_one` returns a symbol's info dict; HTTP fetchers (make_json_fetcher) get the pooled session.
+    """
+    kwargs.setdefault("pooled_session", fetch_one is not fetch_yfinance_info)
+    results, stats = asyncio.run(fetch_all(symbols, fetch_one, **kwargs))
+    stocks_data = []
+    for symbol in symbols:
+        info = results[symbol]
+        if isinstance(info, Exception):
+            print(f"Error fetching data for {symbol}: {str(info)}")
+            stocks_data.append(dict(empty_row(symbol), error=type(info).__name__))
+        else:
+            stocks_data.append(stock_row(symbol, info))
+    return stocks_data, stats.summary()
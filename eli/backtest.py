@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from eli.tracing import traced
+
+TRADING_DAYS = 252
+RETURN_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _windows(close, tenor):
+    # Row i holds the `tenor` observation closes after start date i, relative to the close on day i
+    close = np.asarray(close, dtype=float)
+    if len(close) <= tenor:
+        return None
+    windows = sliding_window_view(close[1:], tenor)
+    return windows / close[:len(windows), None]
+
+
+def knockout_events(path_max, running_max, knockout):
+    # Hit flag and the observation day (1-based) of the first close at or above the knock-out level
+    if knockout == 0:
+        return np.zeros(len(path_max), dtype=bool), np.zeros(len(path_max), dtype=np.int64)
+    hit = path_max >= knockout
+    days = (running_max < knockout).sum(axis=1) + 1
+    return hit, np.where(hit, days, 0)
+
+
+def eli_outcomes(windows, path_min, hit, days, strike, airbag, tenor, coupon):
+    """Return per path (row of `windows`) for one level setting.
+
+    Knocked out: principal back plus coupon accrued to the knock-out day. Otherwise at maturity the
+    full-tenor coupon is paid, and if the final close is below the strike (and below the airbag,
+    when one is set) the investor takes shares at the strike.
+    """
+    final = windows[:, -1]
+    delivered = ~hit & (final < strike) if strike else np.zeros(len(final), dtype=bool)
+    if airbag:
+        delivered &= final < airbag
+    held = np.where(hit, days, tenor)
+    returns = coupon * held / TRADING_DAYS
+    if strike:
+        returns = returns + np.where(delivered, final / strike - 1, 0.0)
+    touched = path_min < strike if strike else np.zeros(len(final), dtype=bool)
+    return returns, delivered, touched
+
+
+def _summary(knockout_pct, strike_pct, airbag_pct, hit, days, returns, delivered, touched):
+    row = {
+        'knockout_pct': knockout_pct,
+        'strike_pct': strike_pct,
+        'airbag_pct': airbag_pct,
+        'windows': len(returns),
+        'knockout_rate': hit.mean(),
+        'strike_hit_rate': delivered.mean(),
+        'strike_touch_rate': touched.mean(),
+        'avg_days_to_knockout': days[hit].mean() if hit.any() else np.nan,
+        'mean_return': returns.mean(),
+        'worst_return': returns.min(),
+    }
+    for p, value in zip(RETURN_PERCENTILES, np.percentile(returns, RETURN_PERCENTILES)):
+        row[f'p{p}_return'] = value
+    return row
+
+
+def backtest_grid(close, strike_pcts, airbag_pcts, knockout_pcts, tenor=63, coupon=0.0):
+    """Every historical start date against every combination of levels (percent of the start close,
+    0 disables a level, as in calculate_price_levels).
+
+    Returns (DataFrame with one row per combination, error). `tenor` is in trading days and `coupon`
+    is an annual rate in decimal.
+    """
+    windows = _windows(close, tenor)
+    if windows is None:
+        return None, f"Not enough history for a {tenor}-day tenor"
+    path_max = windows.max(axis=1)
+    path_min = windows.min(axis=1)
+    running_max = np.maximum.accumulate(windows, axis=1)
+
+    rows = []
+    for knockout_pct in knockout_pcts:
+        # Knock-out paths depend only on the knock-out level, so they are shared by the inner loops
+        hit, days = knockout_events(path_max, running_max, knockout_pct / 100)
+        for strike_pct in strike_pcts:
+            for airbag_pct in airbag_pcts:
+                outcomes = eli_outcomes(windows, path_min, hit, days, strike_pct / 100, airbag_pct / 100, tenor, coupon)
+                rows.append(_summary(knockout_pct, strike_pct, airbag_pct, hit, days, *outcomes))
+    return pd.DataFrame(rows), None
+
+
+@traced()
+def backtest_eli(close, strike_pct, airbag_pct, knockout_pct, tenor=63, coupon=0.0):
+    """One level setting: the summary row plus the per-start-date returns (payoff distribution)."""
+    windows = _windows(close, tenor)
+    if windows is None:
+        return None, f"Not enough history for a {tenor}-day tenor"
+    hit, days = knockout_events(windows.max(axis=1), np.maximum.accumulate(windows, axis=1), knockout_pct / 100)
+    returns, delivered, touched = eli_outcomes(windows, windows.min(axis=1), hit, days, strike_pct / 100,
+                                            airbag_pct / 100, tenor, coupon)
+    result = _summary(knockout_pct, strike_pct, airbag_pct, hit, days, returns, delivered, touched)
+    result['returns'] = returns
+    result['knockout_days'] = days[hit]
+    if isinstance(close, pd.Series):
+        result['start_dates'] = close.index[:len(windows)]
+    return result, None
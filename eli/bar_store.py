@@ -0,0 +1,207 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from eli import CACHE_DIR
+from eli.providers import get_provider
+from eli.tracing import traced
+
+# How far back each yfinance period string reaches ("max" and "ytd" are handled separately)
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Resample rules for serving weekly / monthly bars from the cached daily bars
+RESAMPLE_RULES = {
+    "1wk": dict(rule="W-MON", label="left", closed="left"),
+    "1mo": dict(rule="MS"),
+}
+
+OHLCV_AGG = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+    "Dividends": "sum",
+    "Stock Splits": "sum",
+}
+
+# Don't ask Yahoo for new bars more often than this unless the user presses Refresh
+DELTA_FETCH_INTERVAL = 15 * 60
+
+
+def period_start(period, today=None):
+    today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=today.year, month=1, day=1)
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unsupported period: {period}")
+    return today - PERIOD_OFFSETS[period]
+
+
+def resample_bars(data, interval):
+    if interval == "1d":
+        return data
+    if interval not in RESAMPLE_RULES:
+        raise ValueError(f"Unsupported interval: {interval}")
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in data.columns}
+    return data.resample(**RESAMPLE_RULES[interval]).agg(agg).dropna(subset=["Close"])
+
+
+class BarStore:
+    """Per-ticker daily OHLCV bars kept as one memory-mapped .npy record array on disk."""
+
+    def __init__(self, root=None):
+        self.root = os.path.join(root or CACHE_DIR, "bars")
+
+    def _dir(self, ticker):
+        return os.path.join(self.root, ticker.upper().replace(os.sep, "_"))
+
+    def load(self, ticker):
+        path = self._dir(ticker)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            bars = np.load(os.path.join(path, "bars.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None, None
+        # A reader between the bars and meta swaps can pair new bars with the old columns
+        if bars["values"].shape[1:] != (len(meta["columns"]),):
+            return None, None
+
+        index = pd.to_datetime(np.asarray(bars["index"]), utc=True)
+        index = index.tz_convert(meta["tz"]) if meta.get("tz") else index.tz_localize(None)
+        data = pd.DataFrame(np.asarray(bars["values"]), index=index, columns=meta["columns"])
+        data.index.name = "Date"
+        return data, meta
+
+    def save(self, ticker, data, coverage_start):
+        path = self._dir(ticker)
+        os.makedirs(path, exist_ok=True)
+
+        index = data.index
+        tz = str(index.tz) if index.tz is not None else None
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        meta = {
+            "columns": list(data.columns),
+            "tz": tz,
+            "coverage_start": "max" if coverage_start is None else str(pd.Timestamp(coverage_start).date()),
+            "fetched_at": time.time(),
+        }
+
+        # Index and values share one file, so a single swap replaces both and readers never see them disagree
+        bars = np.empty(len(data), dtype=[("index", np.int64), ("values", np.float64, (len(data.columns),))])
+        bars["index"] = index.tz_convert("UTC").tz_localize(None).values.astype("datetime64[ns]").astype(np.int64)
+        bars["values"] = data.to_numpy(dtype=np.float64)
+        tmp = os.path.join(path, "bars.npy.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, bars)
+        os.replace(tmp, os.path.join(path, "bars.npy"))
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    def load_state(self, ticker, name):
+        # Small JSON sidecars (e.g. indicator state) that live and die with the cached bars
+        try:
+            with open(os.path.join(self._dir(ticker), f"{name}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_state(self, ticker, name, state):
+        path = self._dir(ticker)
+        os.makedirs(path, exist_ok=True)
+        tmp = os.path.join(path, f"{name}.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, os.path.join(path, f"{name}.json"))
+
+    def delete(self, ticker):
+        path = self._dir(ticker)
+        if not os.path.isdir(path):
+            return
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
+
+
+def _covers(meta, start):
+    if meta["coverage_start"] == "max":
+        return True
+    if start is None:
+        return False
+    return pd.Timestamp(meta["coverage_start"]) <= start
+
+
+def _fetch(ticker, **kwargs):
+    data = get_provider().history(ticker, **kwargs)
+    return data.dropna(subset=["Close"])
+
+
+def _has_corporate_action(data):
+    # Dividends and splits make Yahoo re-adjust the whole history, so appended bars would no longer line up
+    actions = [col for col in ("Dividends", "Stock Splits") if col in data.columns]
+    return bool(actions) and bool((data[actions] != 0).to_numpy().any())
+
+
+def update_bars(ticker, period="1y", store=None, force=False):
+    store = store or default_store
+    start = period_start(period)
+    cached, meta = store.load(ticker)
+
+    if cached is None or cached.empty or not _covers(meta, start):
+        data = _fetch(ticker, period=period)
+        if not data.empty:
+            store.save(ticker, data, start)
+        return data
+
+    if not force and time.time() - meta.get("fetched_at", 0) < DELTA_FETCH_INTERVAL:
+        return cached
+
+    # Re-fetch from the last cached bar (it may have been a partial session) onwards
+    last_date = cached.index[-1]
+    delta = _fetch(ticker, start=last_date.strftime("%Y-%m-%d"))
+    coverage = None if meta["coverage_start"] == "max" else pd.Timestamp(meta["coverage_start"])
+    if delta.empty:
+        store.save(ticker, cached, coverage)
+        return cached
+
+    if _has_corporate_action(delta[delta.index > last_date]):
+        data = _fetch(ticker, period=period)
+        store.save(ticker, data, start)
+        return data
+
+    delta = delta.reindex(columns=cached.columns)
+    data = pd.concat([cached[cached.index < delta.index[0]], delta])
+    data = data[~data.index.duplicated(keep="last")]
+    store.save(ticker, data, coverage)
+    return data
+
+
+@traced()
+def get_history(ticker, period="1y", interval="1d", store=None, force=False):
+    data = update_bars(ticker, period=period, store=store, force=force)
+    start = period_start(period)
+    if start is not None and not data.empty:
+        local_start = start.tz_localize(data.index.tz) if data.index.tz is not None else start
+        data = data[data.index >= local_start]
+    return resample_bars(data.dropna(), interval)
+
+
+default_store = BarStore()
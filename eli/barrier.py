@@ -0,0 +1,85 @@
+import numpy as np
+
+from eli.backtest import TRADING_DAYS
+from eli.tracing import traced
+
+# Broadie-Glasserman-Kou: a barrier checked every dt behaves like a continuous one shifted by
+# exp(+/- BETA * sigma * sqrt(dt)) away from the spot
+BGK_BETA = 0.5826
+
+
+def _norm_cdf(x):
+    # Abramowitz & Stegun 7.1.26 erf approximation (|error| < 1.5e-7), so no SciPy is needed
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+
+def vanilla_put(spot, strike, tenor, sigma, rate, dividend_yield=0.0):
+    """Black-Scholes put; every argument broadcasts, tenor in years."""
+    vol_sqrt_t = sigma * np.sqrt(tenor)
+    d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma ** 2) * tenor) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+    return (strike * np.exp(-rate * tenor) * _norm_cdf(-d2)
+            - spot * np.exp(-dividend_yield * tenor) * _norm_cdf(-d1))
+
+
+def up_and_out_put(spot, strike, barrier, tenor, sigma, rate, dividend_yield=0.0, monitoring_dt=None):
+    """Reiner-Rubinstein up-and-out put (no rebate); every argument broadcasts, tenor in years.
+
+    With `monitoring_dt` (years between barrier checks, 1/252 for daily closes) the barrier is shifted
+    up by the Broadie-Glasserman-Kou correction. Paths that start at or above the barrier are worth 0.
+    """
+    spot, strike, barrier, tenor = np.broadcast_arrays(*(np.asarray(v, dtype=float)
+                                                         for v in (spot, strike, barrier, tenor)))
+    if monitoring_dt:
+        barrier = barrier * np.exp(BGK_BETA * sigma * np.sqrt(monitoring_dt))
+    carry = rate - dividend_yield
+    mu = (carry - 0.5 * sigma ** 2) / sigma ** 2
+    vol_sqrt_t = sigma * np.sqrt(tenor)
+    growth = spot * np.exp((carry - rate) * tenor)
+    discount = strike * np.exp(-rate * tenor)
+    ratio = barrier / spot
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x1 = np.log(spot / strike) / vol_sqrt_t + (1 + mu) * vol_sqrt_t
+        x2 = np.log(1 / ratio) / vol_sqrt_t + (1 + mu) * vol_sqrt_t
+        y1 = np.log(barrier ** 2 / (spot * strike)) / vol_sqrt_t + (1 + mu) * vol_sqrt_t
+        y2 = np.log(ratio) / vol_sqrt_t + (1 + mu) * vol_sqrt_t
+        reflected_growth = growth * ratio ** (2 * (mu + 1))
+        reflected_discount = discount * ratio ** (2 * mu)
+
+        # Haug's A-D terms with phi = -1 (put) and eta = -1 (up barrier)
+        a = discount * _norm_cdf(-x1 + vol_sqrt_t) - growth * _norm_cdf(-x1)
+        b = discount * _norm_cdf(-x2 + vol_sqrt_t) - growth * _norm_cdf(-x2)
+        c = reflected_discount * _norm_cdf(-y1 + vol_sqrt_t) - reflected_growth * _norm_cdf(-y1)
+        d = reflected_discount * _norm_cdf(-y2 + vol_sqrt_t) - reflected_growth * _norm_cdf(-y2)
+        price = np.where(strike < barrier, a - c, b - d)
+    return np.where(spot >= barrier, 0.0, np.maximum(price, 0.0))
+
+
+@traced()
+def eli_surface(strike_pcts, knockout_pcts, tenor_days, sigma, rate, dividend_yield=0.0, daily_monitoring=True):
+    """Indicative ELI pricing over the full grid, shape (strikes, knock-outs, tenors).
+
+    The investor is short an up-and-out put struck at the strike on notional / strike shares, so the
+    premium per unit of notional is put / strike. Levels are percentages of spot (knock-out 0 means no
+    knock-out, as in calculate_price_levels); the indicative yield is the deposit rate plus the premium
+    spread over the full tenor, which understates structures that usually knock out early.
+    """
+    strike = np.asarray(strike_pcts, dtype=float)[:, None, None] / 100
+    knockout = np.asarray(knockout_pcts, dtype=float)[None, :, None] / 100
+    tenor = np.asarray(tenor_days, dtype=float)[None, None, :] / TRADING_DAYS
+
+    barrier = np.where(knockout > 0, knockout, np.inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        knocked = up_and_out_put(1.0, strike, barrier, tenor, sigma, rate, dividend_yield,
+                                 1 / TRADING_DAYS if daily_monitoring else None)
+    put = np.where(np.isinf(barrier), vanilla_put(1.0, strike, tenor, sigma, rate, dividend_yield), knocked)
+    premium = np.where(strike > 0, put / np.where(strike > 0, strike, 1), 0.0)
+    return {
+        'premium': premium,
+        'yield': rate + premium / tenor,
+    }
@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from eli.bar_store import OHLCV_AGG
+
+# Roughly one candle per two pixels of the 800px chart
+DEFAULT_MAX_BARS = 400
+# Past this many source bars per candle the candles get unreadable, so 'auto' switches to an LTTB line
+LINE_THRESHOLD = 10
+
+
+def aggregate_ohlc(data, max_bars=DEFAULT_MAX_BARS):
+    """Merge runs of consecutive bars into at most `max_bars` OHLCV bars.
+
+    Buckets are counted in trading days, not calendar time, so each candle covers the same number of
+    sessions. Each bucket is labelled with its first date and keeps the ordinal of its first bar in
+    column 'x'.
+    """
+    size = max(1, math.ceil(len(data) / max_bars))
+    positions = np.arange(len(data))
+    buckets = positions // size
+    columns = {column: rule for column, rule in OHLCV_AGG.items() if column in data.columns}
+    aggregated = data[list(columns)].groupby(buckets).agg(columns)
+    aggregated.index = data.index[::size]
+    aggregated['x'] = positions[::size]
+    return aggregated
+
+
+def lttb_indices(y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the shape of `y`.
+
+    x is the trading-day ordinal, so only y is needed. The first and last points are always kept.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    x = np.arange(n, dtype=float)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket stands in for the third vertex
+        next_start, next_stop = stop, edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_start:next_stop].mean()
+        next_y = y[next_start:next_stop].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def level_of_detail(data, max_bars=DEFAULT_MAX_BARS, mode='auto'):
+    """Pick what the price trace should draw for `data`: ('candles', frame) or ('line', frame).
+
+    'candles' keeps every bar when it fits, otherwise aggregates to `max_bars` candles; 'line' is
+    the close downsampled with LTTB. 'auto' uses candles unless more than LINE_THRESHOLD bars would
+    be merged into each one. The frame's 'x' column is each bar's trading-day ordinal.
+    """
+    if mode not in ('auto', 'candles', 'line'):
+        raise ValueError(f"Unknown level-of-detail mode: {mode}")
+    if mode == 'auto':
+        mode = 'line' if max_bars and len(data) > max_bars * LINE_THRESHOLD else 'candles'
+
+    if not max_bars or len(data) <= max_bars:
+        frame = data.copy()
+        frame['x'] = np.arange(len(data))
+        return mode, frame
+    if mode == 'candles':
+        return mode, aggregate_ohlc(data, max_bars)
+
+    # The line gets more points than candles would, it is far cheaper to draw
+    indices = lttb_indices(data['Close'].to_numpy(), max_bars * 4)
+    frame = data.iloc[indices].copy()
+    frame['x'] = indices
+    return mode, frame
+
+
+def date_ticks(index, count=8):
+    """Tick positions and labels for a trading-day ordinal axis."""
+    if len(index) == 0:
+        return [], []
+    positions = np.unique(np.linspace(0, len(index) - 1, min(count, len(index))).astype(int))
+    span = index[-1] - index[0]
+    fmt = "%b %d" if span < pd.Timedelta(days=180) else "%b %Y" if span < pd.Timedelta(days=3 * 365) else "%Y"
+    return positions.tolist(), [index[p].strftime(fmt) for p in positions]
@@ -0,0 +1,104 @@
+"""Batch levels, indicators and fair values without Streamlit.
+
+    python -m eli AAPL MSFT 700 --knockout 105 --strike 90 --format csv --output levels.csv
+    python -m eli --book positions.csv --format csv     # distance to barriers for a whole position book
+"""
+import argparse
+import csv
+import json
+import sys
+
+from eli.core import analyse_ticker, get_risk_free_rate
+from eli.portfolio import load_book, refresh_book
+from eli.tracing import export
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="eli", description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="*", help="Yahoo tickers; plain numbers are treated as HK stocks")
+    parser.add_argument("--book", help="CSV or Parquet position book; reports barrier distances instead of tickers")
+    parser.add_argument("--strike", type=float, default=0.0, help="Strike price %% of the current price")
+    parser.add_argument("--airbag", type=float, default=0.0, help="Airbag price %% of the current price")
+    parser.add_argument("--knockout", type=float, default=0.0, help="Knock-out price %% of the current price")
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--risk-free-rate", type=float, default=None, help="Decimal; fetched from ^TNX if omitted")
+    parser.add_argument("--market-risk-premium", type=float, default=8.5, help="%%")
+    parser.add_argument("--terminal-growth-rate", type=float, default=3.0, help="%%")
+    parser.add_argument("--high-growth-period", type=int, default=5)
+    parser.add_argument("--no-valuation", action="store_true", help="Skip statements and fair value")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--output", default="-", help="File to write, '-' for stdout")
+    parser.add_argument("--trace", help="Also write span timings and upstream call counts here "
+                                        "(.prom for Prometheus text, otherwise JSON lines)")
+    return parser.parse_args(argv)
+
+
+def write_results(results, fmt, out):
+    if fmt == "json":
+        json.dump(results, out, indent=2, default=str)
+        out.write("\n")
+        return
+    columns = []
+    for result in results:
+        columns += [key for key in result if key not in columns]
+    writer = csv.DictWriter(out, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(results)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        return run(args)
+    finally:
+        if args.trace:
+            export(args.trace)
+
+
+def run(args):
+    if args.book:
+        return book_main(args)
+    if not args.tickers:
+        print("Give at least one ticker or --book", file=sys.stderr)
+        return 2
+    risk_free_rate = args.risk_free_rate
+    if risk_free_rate is None and not args.no_valuation:
+        risk_free_rate = get_risk_free_rate()
+
+    results = []
+    for ticker in args.tickers:
+        try:
+            results.append(analyse_ticker(ticker, args.strike, args.airbag, args.knockout, period=args.period,
+                                          risk_free_rate=risk_free_rate,
+                                          market_risk_premium=args.market_risk_premium,
+                                          terminal_growth_rate=args.terminal_growth_rate,
+                                          high_growth_period=args.high_growth_period,
+                                          valuation=not args.no_valuation))
+        except Exception as e:
+            print(f"Error processing {ticker}: {str(e)}", file=sys.stderr)
+            results.append({'ticker': ticker, 'error': str(e)})
+
+    output(results, args)
+    return 0 if all('error' not in result for result in results) else 1
+
+
+def book_main(args):
+    book, error = load_book(args.book)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    levels = refresh_book(book)
+    output(levels.astype(object).where(levels.notna(), None).to_dict(orient="records"), args)
+    return 0
+
+
+def output(results, args):
+    if args.output == "-":
+        write_results(results, args.format, sys.stdout)
+    else:
+        with open(args.output, "w", newline="") as f:
+            write_results(results, args.format, f)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
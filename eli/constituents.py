@@ -0,0 +1,62 @@
+from eli.fundamentals import get_snapshot
+from eli.industry_stats import empty_row, stock_row
+from eli.providers import get_provider
+from eli.shared_cache import shared
+from eli.tracing import traced
+
+# Index membership changes a few times a year
+CONSTITUENTS_TTL = 24 * 60 * 60
+STOCK_INFO_TTL = 30 * 60
+
+INDEX_URLS = {
+    "Hang Seng Index": "https://en.wikipedia.org/wiki/Hang_Seng_Index",
+    "S&P 500": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
+}
+
+
+def index_for_ticker(ticker):
+    # Hong Kong stocks are typed as plain numbers, everything else is treated as a US stock
+    return "Hang Seng Index" if ticker.isdigit() else "S&P 500"
+
+
+@traced()
+@shared("constituents", ttl=CONSTITUENTS_TTL)
+def fetch_constituents(index_name):
+    tables = get_provider().html_tables(INDEX_URLS[index_name])
+    if index_name == "Hang Seng Index":
+        # Look for the table with 'Ticker' and 'Sub-index' columns
+        for df in tables:
+            if 'Ticker' in df.columns and 'Sub-index' in df.columns:
+                constituents = df['Ticker'].tolist()
+                # Remove 'SEHK:' prefix and format as ####.HK
+                return [f"{int(code.split(':')[1]):04d}.HK" for code in constituents]
+        raise ValueError("Could not find the correct table for HSI constituents")
+    return tables[0]['Symbol'].tolist()  # S&P 500 constituents are in the first table
+
+
+@traced()
+def get_index_constituents(ticker):
+    index_name = index_for_ticker(ticker)
+    try:
+        constituents = fetch_constituents(index_name)
+        print(f"Fetched {len(constituents)} constituents for {index_name}")
+        print(f"First few constituents: {constituents[:5]}")
+        return constituents, index_name
+    except Exception as e:
+        print(f"Error fetching constituents for {index_name}: {str(e)}")
+        return [], index_name
+
+
+@shared("stock_info", ttl=STOCK_INFO_TTL)
+def _stock_info(symbol):
+    return stock_row(symbol, get_snapshot(symbol).info)
+
+
+@traced()
+def get_stock_info(symbol):
+    # Failures fall back to an 'Unknown' row and are not cached, so the next caller retries
+    try:
+        return _stock_info(symbol)
+    except Exception as e:
+        print(f"Error fetching data for {symbol}: {str(e)}")
+        return empty_row(symbol)
@@ -0,0 +1,176 @@
+from eli.bar_store import DELTA_FETCH_INTERVAL, get_history
+from eli.constituents import index_for_ticker
+from eli.fundamentals import get_snapshot, invalidate_snapshot
+from eli.industry_stats import peer_table
+from eli.peer_prices import BENCHMARKS, valuation_beta
+from eli.shared_cache import shared_cache
+from eli.tracing import traced
+from eli.volume_profile import volume_profile
+from eli.valuation import (get_risk_free_rate, get_financial_data, calculate_wacc, calculate_fcf_growth_rate,
+                           calculate_excess_return_fair_value, calculate_dcf_fair_value, discount_rates,
+                           fair_value_for)
+
+# The valuation helpers are re-exported: the app and benchmarks import them from here
+__all__ = [
+    'HISTORY_TTL', 'get_stock_data', 'invalidate_ticker', 'calculate_price_levels', 'calculate_ema',
+    'calculate_volume_profile', 'format_ticker', 'calculate_industry_averages', 'get_financial_metrics',
+    'analyse_ticker', 'get_analyst_data', 'get_risk_free_rate', 'get_financial_data', 'calculate_wacc',
+    'calculate_fcf_growth_rate', 'calculate_excess_return_fair_value', 'calculate_dcf_fair_value',
+    'discount_rates', 'fair_value_for',
+]
+
+# Data and valuation functions of the app with no Streamlit or Plotly dependency
+
+# The bar store won't ask Yahoo for new bars more often than this anyway
+HISTORY_TTL = DELTA_FETCH_INTERVAL
+
+
+@traced()
+def get_stock_data(ticker, period="1y", interval="1d", refresh=False):
+    # Served from the on-disk bar store; only bars after the last cached date are downloaded.
+    # The shared cache makes concurrent sessions opening the same ticker wait on a single load.
+    return shared_cache.get_or_compute(
+        ("history", ticker, period, interval),
+        lambda: get_history(ticker, period=period, interval=interval, force=refresh),
+        ttl=HISTORY_TTL, refresh=refresh)
+
+def invalidate_ticker(ticker):
+    # Refresh Data: drop every process-wide copy of the ticker's fundamentals and the treasury yield
+    invalidate_snapshot(ticker)
+    shared_cache.invalidate(lambda key: key[0] in ("financial_data", "stock_info") and key[1][:1] == (ticker,)
+                            or key[0] == "treasury_yield")
+
+def calculate_price_levels(current_price, strike_pct, airbag_pct, knockout_pct):
+    strike_price = current_price * (strike_pct / 100) if strike_pct != 0 else 0
+    airbag_price = current_price * (airbag_pct / 100) if airbag_pct != 0 else 0
+    knockout_price = current_price * (knockout_pct / 100) if knockout_pct != 0 else 0
+    return strike_price, airbag_price, knockout_price
+
+def calculate_ema(data, period):
+    return data['Close'].ewm(span=period, adjust=False).mean()
+
+@traced()
+def calculate_volume_profile(data, bins=40, distribute=False):
+    # Histogram-based profile; the Value Area (70% of volume) grows outward from the POC
+    return volume_profile(data, bins=bins, distribute=distribute)
+
+# Helper function to format tickers for Yahoo Finance
+def format_ticker(ticker):
+    if ticker.isdigit():
+        return f"{int(ticker):04d}.HK"
+    else:
+        return ticker.upper()
+
+def calculate_industry_averages(stocks_data, target_industry):
+    # One industry only; PeerIndex keeps industry_stats for every industry of a universe instead
+    table = peer_table(stocks_data)
+    industry = table[table['industry'] == target_industry]
+    pe, roe = industry['pe'].dropna(), industry['roe'].dropna()
+
+    avg_pe = pe.mean() if len(pe) else None
+    avg_roe = roe.mean() if len(roe) else None
+    min_pe, max_pe = (pe.min(), pe.max()) if len(pe) else (None, None)
+    min_roe, max_roe = (roe.min(), roe.max()) if len(roe) else (None, None)
+
+    return avg_pe, avg_roe, len(industry), min_pe, max_pe, min_roe, max_roe
+
+@traced()
+def get_financial_metrics(ticker):
+    info = get_snapshot(ticker).info
+    
+    metrics = {
+        "Sector": info.get("sector", "N/A"),
+        "Industry": info.get("industry", "N/A"),
+        "Market Cap": info.get("marketCap", "N/A"),
+        "Outstanding Shares": info.get("sharesOutstanding", "N/A"),       
+        "Historical P/E": info.get("trailingPE", "N/A"),
+        "Forward P/E": info.get("forwardPE", "N/A"),
+        "PEG Ratio (5yr expected)": info.get("pegRatio", "N/A"),
+        "Historical Dividend(%)": info.get("trailingAnnualDividendYield", "N/A")*100,
+        "Price/Book": info.get("priceToBook", "N/A"),
+        "Net Income": info.get("netIncomeToCommon", "N/A"),
+        "Revenue": info.get("totalRevenue", "N/A"),
+        "Profit Margin": info.get("profitMargins", "N/A"),
+        "ROE": info.get("returnOnEquity", "N/A"),
+    }
+    
+    # Format large numbers
+    for key in ["Market Cap", "Net Income", "Revenue", "Outstanding Shares"]:
+        if isinstance(metrics[key], (int, float)):
+            if abs(metrics[key]) >= 1e12:
+                metrics[key] = f"{metrics[key]/1e12:.2f}T"
+            elif abs(metrics[key]) >= 1e9:
+                metrics[key] = f"{metrics[key]/1e9:.2f}B"
+            elif abs(metrics[key]) >= 1e6:
+                metrics[key] = f"{metrics[key]/1e6:.2f}M"
+    
+    # Format percentages
+    for key in ["Profit Margin", "ROE"]:
+        if isinstance(metrics[key], float):
+            metrics[key] = f"{metrics[key]:.2%}"
+    
+    # Round floating point numbers
+    for key, value in metrics.items():
+        if isinstance(value, float):
+            metrics[key] = round(value, 2)
+    
+    return metrics
+
+
+def analyse_ticker(ticker, strike_pct=0.0, airbag_pct=0.0, knockout_pct=0.0, period="1y", risk_free_rate=None,
+                   market_risk_premium=8.5, terminal_growth_rate=3.0, high_growth_period=5, valuation=True):
+    """Levels, indicators and fair value for one ticker, as a flat-ish dict the CLI can write out."""
+    formatted_ticker = format_ticker(ticker)
+    data = get_stock_data(formatted_ticker, period=period)
+    if data.empty:
+        return {'ticker': formatted_ticker, 'error': "No price data"}
+
+    current_price = float(data['Close'].iloc[-1])
+    strike_price, airbag_price, knockout_price = calculate_price_levels(current_price, strike_pct, airbag_pct, knockout_pct)
+    _, _, _, poc_price, value_area_low, value_area_high = calculate_volume_profile(data)
+    result = {
+        'ticker': formatted_ticker,
+        'date': str(data.index[-1].date()),
+        'current_price': current_price,
+        'strike_price': strike_price,
+        'airbag_price': airbag_price,
+        'knockout_price': knockout_price,
+        'ema_20': float(calculate_ema(data, 20).iloc[-1]),
+        'ema_50': float(calculate_ema(data, 50).iloc[-1]),
+        'ema_200': float(calculate_ema(data, 200).iloc[-1]),
+        'poc': float(poc_price),
+        'value_area_low': float(value_area_low),
+        'value_area_high': float(value_area_high),
+    }
+    if not valuation:
+        return result
+
+    try:
+        info = get_snapshot(formatted_ticker).info
+        financials = get_financial_data(formatted_ticker)
+        if risk_free_rate is None:
+            risk_free_rate = get_risk_free_rate()
+        beta = valuation_beta(formatted_ticker, info.get('beta'), BENCHMARKS[index_for_ticker(ticker)])
+        fair_value, error_message, method, rates = fair_value_for(
+            financials, info.get('sector', 'Unknown'), beta, current_price,
+            risk_free_rate, market_risk_premium, terminal_growth_rate, high_growth_period)
+        result.update({
+            'sector': info.get('sector', 'Unknown'),
+            'valuation_method': method,
+            'wacc': float(rates['wacc']),
+            'cost_of_equity': float(rates['cost_of_equity']),
+            'fair_value': None if fair_value is None else float(fair_value),
+            'valuation_error': error_message,
+        })
+        if fair_value:
+            result['discount_pct'] = (1 - current_price / fair_value) * 100
+    except Exception as e:
+        result['valuation_error'] = f"{type(e).__name__}: {str(e)}"
+    return result
+
+
+@traced()
+def get_analyst_data(ticker):
+    # Recommendation trend plus the info payload that carries the analyst price targets
+    stock = get_snapshot(ticker)
+    return stock.recommendations_summary, stock.info
@@ -0,0 +1,88 @@
+import numpy as np
+
+from eli.tracing import traced
+
+
+def _positive(value):
+    # Statement fields can be "N/A" (e.g. sharesOutstanding missing from info), None or zero
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) and value > 0 else None
+
+
+def dcf_fair_values(financials, wacc, terminal_growth_rate, high_growth_period, current_price, fcf_growth_rate):
+    """Broadcasting closed form of calculate_dcf_fair_value; any argument may be an array.
+
+    With r = (1 + g) / (1 + WACC) the high-growth PV is FCF * r * (1 - r^N) / (1 - r) and the
+    discounted terminal value is FCF * r^N * (1 + tg) / (WACC - tg). Cells with WACC <= terminal
+    growth are NaN. Returns (fair values, error) like the scalar model.
+    """
+    wacc = np.asarray(wacc, dtype=float)
+    tg = np.asarray(terminal_growth_rate, dtype=float)
+    periods = np.asarray(high_growth_period, dtype=float)
+    growth = np.asarray(fcf_growth_rate, dtype=float)
+
+    fcf = financials['fcf_latest']
+    ratio = (1 + growth) / (1 + wacc)
+    ratio_n = ratio ** periods
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pv_fcf = np.where(np.isclose(ratio, 1.0), fcf * periods, fcf * ratio * (1 - ratio_n) / (1 - ratio))
+        pv_terminal_value = fcf * ratio_n * (1 + tg) / (wacc - tg)
+    enterprise_value = pv_fcf + pv_terminal_value
+    equity_value = enterprise_value - financials['total_debt'] + financials.get('cash_and_cash_equivalents', 0)
+
+    shares_outstanding = financials['share_issued']
+    if shares_outstanding is None:
+        # Same fallback as the single-scenario model: implied shares at the current price
+        if _positive(current_price) is None:
+            return None, "Invalid current price for calculating shares outstanding"
+        shares_outstanding = equity_value / current_price
+    elif _positive(shares_outstanding) is None:
+        return None, f"Invalid shares outstanding: {shares_outstanding}"
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fair_value = equity_value / shares_outstanding
+    return np.where(wacc > tg, fair_value, np.nan), None
+
+
+@traced()
+def dcf_fair_value_grid(financials, waccs, terminal_growth_rates, high_growth_periods, current_price,
+                        fcf_growth_rate):
+    """Fair value per share for every combination, shape (waccs, terminal growth rates, periods), and an error."""
+    wacc = np.asarray(waccs, dtype=float)[:, None, None]
+    tg = np.asarray(terminal_growth_rates, dtype=float)[None, :, None]
+    periods = np.asarray(high_growth_periods, dtype=float)[None, None, :]
+    return dcf_fair_values(financials, wacc, tg, periods, current_price, fcf_growth_rate)
+
+
+def excess_return_fair_values(financials, cost_of_equity, terminal_growth_rate):
+    # Broadcasting version of calculate_excess_return_fair_value; returns (fair values, error)
+    ke = np.asarray(cost_of_equity, dtype=float)
+    tg = np.asarray(terminal_growth_rate, dtype=float)
+    book_value = financials['total_equity']
+    shares_outstanding = financials['share_issued']
+    if _positive(shares_outstanding) is None:
+        return None, f"Error in excess return calculation: invalid shares outstanding: {shares_outstanding}"
+    try:
+        book_value, net_income = float(book_value), float(financials['net_income'])
+    except (TypeError, ValueError) as e:
+        return None, f"Error in excess return calculation: {str(e)}"
+    if book_value == 0:
+        return None, "Error in excess return calculation: total equity is zero"
+    roe = net_income / book_value
+    excess_return = (roe - ke) * book_value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terminal_value = excess_return * (1 + tg) / (ke - tg)
+    fair_value = (book_value + terminal_value) / float(shares_outstanding)
+    return np.where(ke > tg, fair_value, np.nan), None
+
+
+def sensitivity_axes(wacc, terminal_growth_rate, high_growth_period, steps=50, wacc_span=0.04, growth_span=0.02,
+                     periods=10):
+    # Grid centred on the inputs in the sidebar
+    waccs = np.linspace(max(wacc - wacc_span, 0.005), wacc + wacc_span, steps)
+    terminal_growth_rates = np.linspace(terminal_growth_rate - growth_span, terminal_growth_rate + growth_span, steps)
+    first_period = max(1, high_growth_period - periods // 2)
+    high_growth_periods = np.arange(first_period, first_period + periods)
+    return waccs, terminal_growth_rates, high_growth_periods
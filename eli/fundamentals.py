@@ -0,0 +1,83 @@
+import threading
+import time
+
+from eli.providers import PAYLOADS, get_provider
+
+# Fundamentals move slowly; one fetch per ticker every half hour is plenty
+FUNDAMENTALS_TTL = 30 * 60
+
+
+class FundamentalsSnapshot:
+    """Each upstream payload for one ticker, fetched at most once and shared by every reader."""
+
+    PAYLOADS = PAYLOADS
+
+    def __init__(self, ticker, ttl=FUNDAMENTALS_TTL):
+        self.ticker = ticker
+        self.ttl = ttl
+        self.created_at = time.time()
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    @property
+    def expired(self):
+        return time.time() - self.created_at > self.ttl
+
+    def _get(self, name):
+        with self._lock:
+            if name not in self._payloads:
+                self._payloads[name] = get_provider().payload(self.ticker, name)
+            return self._payloads[name]
+
+    @property
+    def info(self):
+        return self._get("info")
+
+    @property
+    def balance_sheet(self):
+        return self._get("balance_sheet")
+
+    @property
+    def financials(self):
+        return self._get("financials")
+
+    @property
+    def cashflow(self):
+        return self._get("cashflow")
+
+    @property
+    def recommendations_summary(self):
+        return self._get("recommendations_summary")
+
+    @property
+    def quarterly_balance_sheet(self):
+        return self._get("quarterly_balance_sheet")
+
+    @property
+    def quarterly_financials(self):
+        return self._get("quarterly_financials")
+
+    @property
+    def quarterly_cashflow(self):
+        return self._get("quarterly_cashflow")
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(ticker, ttl=FUNDAMENTALS_TTL):
+    with _snapshots_lock:
+        snapshot = _snapshots.get(ticker)
+        if snapshot is None or snapshot.expired:
+            # Drop other stale entries too so peer lookups don't accumulate forever
+            for key in [key for key, value in _snapshots.items() if value.expired]:
+                del _snapshots[key]
+            snapshot = FundamentalsSnapshot(ticker, ttl=ttl)
+            _snapshots[ticker] = snapshot
+        return snapshot
+
+
+def invalidate_snapshot(ticker):
+    with _snapshots_lock:
+        _snapshots.pop(ticker, None)
@@ -0,0 +1,165 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from eli.bar_store import default_store
+from eli.tracing import traced
+
+DEFAULT_EMA_SPANS = (20, 50, 200)
+
+# Bars per block in ema_matrix; each block is one (spans, block, block) matrix product
+EMA_BLOCK = 64
+
+
+@lru_cache(maxsize=16)
+def _block_weights(spans):
+    alpha = 2.0 / (np.asarray(spans, dtype=float) + 1.0)
+    decay = 1.0 - alpha
+    steps = np.arange(EMA_BLOCK)
+    lag = steps[:, None] - steps[None, :]
+    weights = np.where(lag >= 0, alpha[:, None, None] * decay[:, None, None] ** np.maximum(lag, 0), 0.0)
+    carry = decay[:, None] ** (steps + 1)
+    return weights, carry
+
+
+def ema_matrix(close, spans=DEFAULT_EMA_SPANS, initial=None):
+    """EMAs for several spans in one pass, shape (bars, spans); matches ewm(span, adjust=False).
+
+    The recursion y[t] = a*x[t] + (1-a)*y[t-1] is unrolled within fixed-size blocks as a
+    lower-triangular weight matrix, so only powers of (1-a) <= 1 appear and nothing overflows.
+    """
+    x = np.asarray(close, dtype=float)
+    weights, carry = _block_weights(tuple(int(span) for span in spans))
+    out = np.empty((len(x), len(spans)))
+    if len(x) == 0:
+        return out
+
+    # adjust=False seeds y[0] = x[0], which is the same as starting from a "previous" value of x[0]
+    prev = np.full(len(spans), x[0]) if initial is None else np.asarray(initial, dtype=float)
+
+    for start in range(0, len(x), EMA_BLOCK):
+        block = x[start:start + EMA_BLOCK]
+        m = len(block)
+        values = weights[:, :m, :m] @ block + carry[:, :m] * prev[:, None]
+        out[start:start + m] = values.T
+        prev = values[:, -1]
+    return out
+
+
+def latest_emas(close, spans=DEFAULT_EMA_SPANS):
+    return dict(zip(spans, ema_matrix(close, spans)[-1]))
+
+
+class EMAState:
+    """Last EMA values for several spans, advanced one bar at a time as new closes arrive."""
+
+    def __init__(self, spans=DEFAULT_EMA_SPANS):
+        self.spans = tuple(int(span) for span in spans)
+        self.alpha = 2.0 / (np.asarray(self.spans, dtype=float) + 1.0)
+        self.values = None
+        # Values before the last bar, so a revised last bar (partial session) can be re-applied
+        self.previous = None
+        self.last_timestamp = None
+        self.previous_timestamp = None
+        self.previous_close = None
+        self.count = 0
+
+    @classmethod
+    def from_close(cls, close, spans=DEFAULT_EMA_SPANS):
+        state = cls(spans)
+        if len(close) == 0:
+            return state
+        emas = ema_matrix(close.to_numpy(), state.spans)
+        state.values = emas[-1]
+        state.last_timestamp = close.index[-1]
+        if len(close) > 1:
+            state.previous = emas[-2]
+            state.previous_timestamp = close.index[-2]
+            state.previous_close = float(close.iloc[-2])
+        state.count = len(close)
+        return state
+
+    def update(self, timestamp, close):
+        if self.values is None:
+            self.values = np.full(len(self.spans), float(close))
+            self.last_timestamp = timestamp
+            self.count = 1
+            return self
+        if timestamp == self.last_timestamp:
+            if self.previous is None:
+                self.values = np.full(len(self.spans), float(close))
+                return self
+        else:
+            self.previous = self.values
+            self.previous_timestamp = self.last_timestamp
+            self.previous_close = None
+            self.last_timestamp = timestamp
+            self.count += 1
+        self.values = self.alpha * float(close) + (1.0 - self.alpha) * self.previous
+        return self
+
+    def matches(self, close):
+        # The state only carries forward if the bar before its last one is unchanged; Yahoo
+        # re-adjusts the whole history after dividends and splits, which invalidates every EMA
+        if self.values is None or self.previous_timestamp is None:
+            return False
+        if self.previous_timestamp not in close.index or self.last_timestamp not in close.index:
+            return False
+        # Older history backfilled in front of the bars it was built on (e.g. 1y cached, then max fetched)
+        if self.count != int((close.index <= self.last_timestamp).sum()):
+            return False
+        if self.previous_close is None:
+            return True
+        return bool(np.isclose(close.loc[self.previous_timestamp], self.previous_close))
+
+    def sync(self, close):
+        if not self.matches(close):
+            return EMAState.from_close(close, self.spans)
+        for timestamp, value in close[close.index >= self.last_timestamp].items():
+            self.update(timestamp, value)
+        self.previous_close = float(close.loc[self.previous_timestamp])
+        return self
+
+    def latest(self):
+        return dict(zip(self.spans, self.values))
+
+    def to_dict(self):
+        return {
+            'spans': list(self.spans),
+            'values': None if self.values is None else self.values.tolist(),
+            'previous': None if self.previous is None else self.previous.tolist(),
+            'last_timestamp': None if self.last_timestamp is None else self.last_timestamp.isoformat(),
+            'previous_timestamp': None if self.previous_timestamp is None else self.previous_timestamp.isoformat(),
+            'previous_close': self.previous_close,
+            'count': self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        self = cls(state['spans'])
+        self.values = None if state['values'] is None else np.asarray(state['values'])
+        self.previous = None if state['previous'] is None else np.asarray(state['previous'])
+        self.last_timestamp = None if state['last_timestamp'] is None else pd.Timestamp(state['last_timestamp'])
+        self.previous_timestamp = None if state['previous_timestamp'] is None else pd.Timestamp(state['previous_timestamp'])
+        self.previous_close = state['previous_close']
+        self.count = state['count']
+        return self
+
+
+@traced()
+def get_ema_state(ticker, spans=DEFAULT_EMA_SPANS, store=None):
+    """EMA state over every cached daily bar for `ticker`, persisted next to the bars."""
+    store = store or default_store
+    bars, _ = store.load(ticker)
+    if bars is None or bars.empty:
+        return None
+
+    saved = store.load_state(ticker, "ema_state")
+    state = EMAState.from_dict(saved) if saved else None
+    if state is None or state.spans != tuple(spans):
+        state = EMAState.from_close(bars['Close'], spans)
+    else:
+        state = state.sync(bars['Close'])
+    store.save_state(ticker, "ema_state", state.to_dict())
+    return state
@@ -0,0 +1,71 @@
+"""Columnar peer table with per-industry statistics and percentile ranks, each computed in one groupby."""
+import numpy as np
+import pandas as pd
+
+# Peer row field -> yfinance info key
+PEER_METRICS = {
+    'pe': 'trailingPE',
+    'forward_pe': 'forwardPE',
+    'pb': 'priceToBook',
+    'roe': 'returnOnEquity',
+    'gross_margin': 'grossMargins',
+    'operating_margin': 'operatingMargins',
+    'profit_margin': 'profitMargins',
+}
+# Like the original P/E and ROE averages, these only count positive values; margins may be negative
+POSITIVE_ONLY = ('pe', 'forward_pe', 'pb', 'roe')
+PERCENTILES = (10, 25, 75, 90)
+
+
+def stock_row(symbol, info):
+    row = {'symbol': symbol, 'industry': info.get('industry', 'Unknown')}
+    row.update({field: info.get(key, None) for field, key in PEER_METRICS.items()})
+    return row
+
+
+def empty_row(symbol):
+    return stock_row(symbol, {})
+
+
+def peer_table(stocks_data):
+    """get_stock_info rows as one DataFrame: metric columns are floats with NaN where unusable."""
+    rows = list(stocks_data)
+    columns = {
+        'symbol': [row['symbol'] for row in rows],
+        'industry': [row.get('industry') or 'Unknown' for row in rows],
+    }
+    for metric in PEER_METRICS:
+        # Yahoo sometimes sends strings such as "Infinity"; anything non-numeric becomes NaN
+        values = pd.to_numeric([row.get(metric) for row in rows], errors='coerce').astype(float)
+        with np.errstate(invalid='ignore'):
+            usable = np.isfinite(values) & (values > 0 if metric in POSITIVE_ONLY else True)
+        columns[metric] = np.where(usable, values, np.nan)
+    return pd.DataFrame(columns)
+
+
+def industry_stats(table):
+    """Count, mean, median, min, max and percentiles of every metric for every industry at once."""
+    table = table[table['industry'] != 'Unknown']
+    groups = table.groupby('industry')
+    grouped = groups[list(PEER_METRICS)]
+    frames = [groups.size().rename('count'), grouped.mean().add_prefix('avg_'), grouped.median().add_prefix('median_'),
+              grouped.min().add_prefix('min_'), grouped.max().add_prefix('max_')]
+    quantiles = grouped.quantile([p / 100 for p in PERCENTILES])
+    frames += [quantiles.xs(p / 100, level=-1).add_prefix(f"p{p}_") for p in PERCENTILES]
+    return pd.concat(frames, axis=1)
+
+
+def percentile_ranks(table, by='industry'):
+    """Share of peers (same industry, or the whole table with by=None) at or below each value, in (0, 1]."""
+    values = table[list(PEER_METRICS)]
+    ranks = values.groupby(table[by]).rank(pct=True, method='max') if by else values.rank(pct=True, method='max')
+    return ranks.add_suffix('_pct')
+
+
+def _plain(value):
+    return None if pd.isna(value) else value
+
+
+def records(frame):
+    # JSON-friendly rows: NaN becomes None
+    return [{key: _plain(value) for key, value in row.items()} for row in frame.to_dict(orient='records')]
@@ -0,0 +1,243 @@
+"""Intraday live monitoring: bar sources, incremental per-ticker state and in-place chart patching.
+
+A source's poll() returns {ticker: [bar, ...]} with bars as dicts of time, open, high, low, close and
+volume. Intraday bars re-sent with an already seen time are the still-forming bar and replace it.
+"""
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from eli.indicators import DEFAULT_EMA_SPANS, EMAState
+from eli.providers import get_provider
+
+LIVE_INTERVAL = "1m"
+
+
+def _bar(timestamp, row):
+    return {
+        'time': pd.Timestamp(timestamp),
+        'open': float(row['Open']),
+        'high': float(row['High']),
+        'low': float(row['Low']),
+        'close': float(row['Close']),
+        'volume': float(row.get('Volume', 0.0) or 0.0),
+    }
+
+
+class YahooIntradaySource:
+    """Polls 1-minute bars for every watched ticker with one batched download per poll."""
+
+    def __init__(self, tickers, interval=LIVE_INTERVAL):
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.last_seen = {}
+
+    def poll(self):
+        data = get_provider().download(self.tickers, period="1d", interval=self.interval, group_by="ticker",
+                                       auto_adjust=True, threads=True)
+        updates = {}
+        for ticker in self.tickers:
+            frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+            frame = frame.dropna(subset=['Close'])
+            last = self.last_seen.get(ticker)
+            if last is not None:
+                frame = frame[frame.index >= last]
+            if not frame.empty:
+                updates[ticker] = [_bar(timestamp, row) for timestamp, row in frame.iterrows()]
+                self.last_seen[ticker] = frame.index[-1]
+        return updates
+
+
+class ReplaySource:
+    """Replays a recorded JSON-lines file ({"ticker", "time", "open", ...} per line).
+
+    Recorded time gaps are compressed by `speed` (2.0 plays twice as fast); speed 0 releases
+    everything on the first poll. Pass `clock` to drive the replay from a test.
+    """
+
+    def __init__(self, path, tickers=None, speed=1.0, clock=time.monotonic):
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        wanted = set(tickers) if tickers else None
+        self.records = sorted((record for record in records if wanted is None or record['ticker'] in wanted),
+                              key=lambda record: record['time'])
+        self.offsets = np.array([pd.Timestamp(record['time']).value for record in self.records], dtype=np.int64)
+        if len(self.offsets):
+            self.offsets = (self.offsets - self.offsets[0]) / 1e9
+        self.speed = speed
+        self.clock = clock
+        self.started = None
+        self.position = 0
+
+    @property
+    def finished(self):
+        return self.position >= len(self.records)
+
+    def poll(self):
+        now = self.clock()
+        if self.started is None:
+            self.started = now
+        elapsed = np.inf if self.speed == 0 else (now - self.started) * self.speed
+        stop = int(np.searchsorted(self.offsets, elapsed, side='right'))
+        updates = {}
+        for record in self.records[self.position:stop]:
+            updates.setdefault(record['ticker'], []).append({
+                'time': pd.Timestamp(record['time']),
+                **{key: float(record.get(key, 0.0)) for key in ('open', 'high', 'low', 'close', 'volume')},
+            })
+        self.position = max(self.position, stop)
+        return updates
+
+
+class Recorder:
+    """Wraps a source and appends every polled bar to a JSON-lines file that ReplaySource can play."""
+
+    def __init__(self, source, path):
+        self.source = source
+        self.path = path
+
+    def poll(self):
+        updates = self.source.poll()
+        with open(self.path, "a") as f:
+            for ticker, bars in updates.items():
+                for bar in bars:
+                    f.write(json.dumps({'ticker': ticker, **bar, 'time': bar['time'].isoformat()}) + "\n")
+        return updates
+
+
+class LiveSession:
+    """Today's candle, EMAs and barrier distances for one ticker, advanced bar by bar in O(1).
+
+    `daily` is the cached daily history; if its last row is already today's partial bar, the live
+    candle replaces it. `levels` maps 'strike'/'airbag'/'knockout' to prices (0 = disabled).
+    Pass the persisted `ema_state` (get_ema_state) so the live EMAs continue the chart's, which run
+    over every cached bar rather than just the displayed window.
+    """
+
+    def __init__(self, ticker, daily, levels, spans=DEFAULT_EMA_SPANS, ema_state=None):
+        self.ticker = ticker
+        self.daily = daily
+        self.levels = levels
+        self.tz = daily.index.tz
+        if ema_state is not None and ema_state.spans == tuple(spans) and ema_state.last_timestamp == daily.index[-1]:
+            # A copy, since every live bar advances it
+            self.base = EMAState.from_dict(ema_state.to_dict())
+        else:
+            self.base = EMAState.from_close(daily['Close'], spans)
+        self.candle = None
+        self.forming = None
+        self.day = None
+        self.ticks = 0
+
+    def _session_day(self, timestamp):
+        if timestamp.tzinfo is None and self.tz is not None:
+            timestamp = timestamp.tz_localize("UTC")
+        return (timestamp.tz_convert(self.tz) if self.tz is not None else timestamp).normalize()
+
+    @property
+    def replaces_last_daily(self):
+        return self.day is not None and self.daily.index[-1].normalize() == self.day
+
+    def apply(self, bar):
+        day = self._session_day(bar['time'])
+        if day != self.day:
+            # New session: the finished forming bar doesn't matter, today's candle starts over
+            self.day, self.candle, self.forming = day, None, None
+        if self.forming is not None and bar['time'] != self.forming['time']:
+            self.candle = self._merge(self.candle, self.forming)
+        self.forming = bar
+        self.ticks += 1
+
+        # Revising a bar with the same timestamp re-applies the update on the previous EMA values
+        timestamp = self.daily.index[-1] if self.replaces_last_daily else day
+        self.base.update(timestamp, self.forming['close'])
+        return self
+
+    @staticmethod
+    def _merge(candle, bar):
+        if candle is None:
+            return dict(bar)
+        return {
+            'time': candle['time'],
+            'open': candle['open'],
+            'high': max(candle['high'], bar['high']),
+            'low': min(candle['low'], bar['low']),
+            'close': bar['close'],
+            'volume': candle['volume'] + bar['volume'],
+        }
+
+    @property
+    def today(self):
+        return self._merge(self.candle, self.forming) if self.forming is not None else None
+
+    @property
+    def price(self):
+        return self.forming['close'] if self.forming is not None else float(self.daily['Close'].iloc[-1])
+
+    def snapshot(self):
+        # Distances use the same convention as the position book: barrier / price - 1
+        price = self.price
+        row = {'ticker': self.ticker, 'price': price, 'ticks': self.ticks}
+        row.update({f'ema_{span}': float(value) for span, value in self.base.latest().items()})
+        for name, level in self.levels.items():
+            row[f'{name}_distance'] = float(level / price - 1) if level else None
+        knockout, strike = self.levels.get('knockout'), self.levels.get('strike')
+        row['knocked_out'] = bool(knockout and price >= knockout)
+        row['below_strike'] = bool(strike and price < strike)
+        return row
+
+
+def _replace_last(values, value, append):
+    values = list(values)
+    if append:
+        values.append(value)
+    else:
+        values[-1] = value
+    return values
+
+
+def patch_chart(fig, session):
+    """Move the chart's last candle (or line point), current-price label and EMA lines to the live values.
+
+    Mutates a figure made by plot_stock_chart instead of rebuilding it, so the volume profile and
+    downsampling are not recomputed on every tick. Pass a copy if the original is cached elsewhere.
+    """
+    today = session.today
+    if today is None:
+        return fig
+    trace = fig.data[0]
+    n = len(session.daily)
+    # Full-detail traces get a new candle for a new session; aggregated ones fold today into the last bucket
+    full_detail = len(trace.x) == n or len(trace.x) == n + 1
+    append = full_detail and not session.replaces_last_daily and len(trace.x) == n
+    if trace.type == 'candlestick':
+        if full_detail:
+            open_, high, low = today['open'], today['high'], today['low']
+        else:
+            open_, high, low = trace.open[-1], max(trace.high[-1], today['high']), min(trace.low[-1], today['low'])
+        trace.update(x=_replace_last(trace.x, n, append) if append else trace.x,
+                     open=_replace_last(trace.open, open_, append),
+                     high=_replace_last(trace.high, high, append),
+                     low=_replace_last(trace.low, low, append),
+                     close=_replace_last(trace.close, today['close'], append),
+                     text=_replace_last(trace.text, today['time'].strftime('%Y-%m-%d'), append) if trace.text is not None else None)
+    else:
+        trace.update(x=_replace_last(trace.x, n, append) if append else trace.x,
+                     y=_replace_last(trace.y, today['close'], append))
+
+    emas = session.base.latest()
+    for annotation in fig.layout.annotations:
+        text = annotation.text or ""
+        if text.startswith("Current Price:"):
+            annotation.update(y=today['close'], text=f"Current Price: {today['close']:.2f}")
+            continue
+        for span, value in emas.items():
+            if text.startswith(f"{span} EMA:"):
+                old = annotation.y
+                for shape in fig.layout.shapes:
+                    if shape.y0 == old and shape.y1 == old:
+                        shape.update(y0=value, y1=value)
+                annotation.update(y=value, text=f"{span} EMA: {value:.2f}")
+    return fig
@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from eli.dcf import dcf_fair_values, excess_return_fair_values
+from eli.tracing import traced
+
+# Paths per chunk; peak memory is a handful of float64 arrays of this length
+CHUNK_SIZE = 250_000
+# The percentile histogram is this many times finer than the histogram that gets displayed
+HISTOGRAM_OVERSAMPLING = 40
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+
+def draw(rng, spec, size):
+    """Samples for one input; spec is ('fixed', v), ('normal', mean, sd), ('uniform', low, high)
+    or ('triangular', low, mode, high)."""
+    kind, *params = spec
+    if kind == 'fixed':
+        return np.full(size, float(params[0]))
+    if kind == 'normal':
+        return rng.normal(params[0], params[1], size)
+    if kind == 'uniform':
+        return rng.uniform(params[0], params[1], size)
+    if kind == 'triangular':
+        return rng.triangular(params[0], params[1], params[2], size)
+    raise ValueError(f"Unknown distribution: {kind}")
+
+
+def default_dcf_specs(fcf_growth_rate, wacc, terminal_growth_rate, growth_sd=0.05, wacc_sd=0.01, terminal_sd=0.005):
+    return {
+        'growth': ('normal', fcf_growth_rate, growth_sd),
+        'wacc': ('normal', wacc, wacc_sd),
+        'terminal_growth': ('normal', terminal_growth_rate, terminal_sd),
+    }
+
+
+def default_excess_return_specs(cost_of_equity, terminal_growth_rate, cost_of_equity_sd=0.01, terminal_sd=0.005):
+    return {
+        'cost_of_equity': ('normal', cost_of_equity, cost_of_equity_sd),
+        'terminal_growth': ('normal', terminal_growth_rate, terminal_sd),
+    }
+
+
+def simulate_chunk(model, financials, specs, size, rng, high_growth_period=5, current_price=None):
+    # (fair values, error) for `size` scenarios
+    if model == 'dcf':
+        return dcf_fair_values(financials, draw(rng, specs['wacc'], size), draw(rng, specs['terminal_growth'], size),
+                               high_growth_period, current_price, draw(rng, specs['growth'], size))
+    if model == 'excess_return':
+        return excess_return_fair_values(financials, draw(rng, specs['cost_of_equity'], size),
+                                         draw(rng, specs['terminal_growth'], size))
+    raise ValueError(f"Unknown model: {model}")
+
+
+class _Accumulator:
+    # Running histogram and moments, so chunks never need to be kept around
+    def __init__(self, edges):
+        self.edges = edges
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        self.below = self.above = self.invalid = self.valid = 0
+        self.total = self.total_sq = 0.0
+
+    def add(self, values):
+        finite = np.isfinite(values)
+        self.invalid += int(values.size - finite.sum())
+        values = values[finite]
+        self.valid += values.size
+        self.total += float(values.sum())
+        self.total_sq += float(np.square(values).sum())
+        self.below += int((values < self.edges[0]).sum())
+        self.above += int((values > self.edges[-1]).sum())
+        self.counts += np.histogram(values, bins=self.edges)[0]
+
+    def merge(self, other):
+        self.counts += other.counts
+        for name in ('below', 'above', 'invalid', 'valid', 'total', 'total_sq'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+def _run_paths(model, financials, specs, paths, chunk_size, edges, seed, high_growth_period, current_price):
+    rng = np.random.default_rng(seed)
+    acc = _Accumulator(edges)
+    for start in range(0, paths, chunk_size):
+        size = min(chunk_size, paths - start)
+        # The pilot chunk already validated the statements, so later chunks can't fail
+        values, _ = simulate_chunk(model, financials, specs, size, rng, high_growth_period, current_price)
+        acc.add(values)
+    return acc
+
+
+def _percentiles(acc):
+    # Interpolate inside the fine histogram; tails outside the pilot range are clamped to its edges
+    cumulative = np.concatenate([[acc.below], acc.below + np.cumsum(acc.counts)])
+    results = {}
+    for p in PERCENTILES:
+        target = acc.valid * p / 100
+        results[p] = float(np.interp(target, cumulative, acc.edges)) if acc.valid else None
+    return results
+
+
+@traced()
+def simulate_fair_value(model, financials, specs, paths=1_000_000, high_growth_period=5, current_price=None,
+                        bins=100, chunk_size=CHUNK_SIZE, workers=1, seed=None):
+    """Fair-value distribution for the 'dcf' or 'excess_return' model over `paths` random scenarios."""
+    seed_sequence = np.random.SeedSequence(seed)
+    pilot_seed, *worker_seeds = seed_sequence.spawn(1 + max(1, workers))
+
+    # A pilot chunk fixes the histogram range; it is counted as part of the simulation
+    pilot_size = min(chunk_size, paths)
+    pilot, error = simulate_chunk(model, financials, specs, pilot_size, np.random.default_rng(pilot_seed),
+                                  high_growth_period, current_price)
+    if error:
+        return None, error
+    finite = pilot[np.isfinite(pilot)]
+    if finite.size == 0:
+        return None, "No valid scenarios: the discount rate is below terminal growth in every draw"
+    low, high = np.percentile(finite, [0.5, 99.5])
+    padding = max(high - low, abs(high) * 1e-6, 1e-9) * 0.1
+    edges = np.linspace(low - padding, high + padding, bins * HISTOGRAM_OVERSAMPLING + 1)
+
+    acc = _Accumulator(edges)
+    acc.add(pilot)
+
+    remaining = paths - pilot_size
+    if remaining > 0:
+        shares = [remaining // len(worker_seeds) + (i < remaining % len(worker_seeds)) for i in range(len(worker_seeds))]
+        jobs = [(model, financials, specs, share, chunk_size, edges, worker_seed, high_growth_period, current_price)
+                for share, worker_seed in zip(shares, worker_seeds) if share > 0]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as executor:
+                for partial in executor.map(_run_paths, *zip(*jobs)):
+                    acc.merge(partial)
+        else:
+            for job in jobs:
+                acc.merge(_run_paths(*job))
+
+    mean = acc.total / acc.valid
+    std = np.sqrt(max(acc.total_sq / acc.valid - mean ** 2, 0.0))
+    display_counts = acc.counts.reshape(bins, HISTOGRAM_OVERSAMPLING).sum(axis=1)
+    result = {
+        'paths': paths,
+        'valid_paths': acc.valid,
+        'invalid_paths': acc.invalid,
+        'mean': mean,
+        'std': std,
+        'percentiles': _percentiles(acc),
+        'histogram': (display_counts, edges[::HISTOGRAM_OVERSAMPLING]),
+        'tail_counts': (acc.below, acc.above),
+    }
+    if current_price is not None:
+        # Share of valid scenarios where fair value beats today's price
+        cumulative = np.concatenate([[acc.below], acc.below + np.cumsum(acc.counts)])
+        result['prob_above_price'] = 1 - float(np.interp(current_price, edges, cumulative)) / acc.valid
+    return result, None
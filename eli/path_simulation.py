@@ -0,0 +1,142 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from eli.backtest import TRADING_DAYS, eli_outcomes, knockout_events
+from eli.tracing import traced
+
+# Paths per chunk; a chunk holds a few (chunk, tenor) float64 arrays, ~13 MB each for a 63-day tenor
+PATH_CHUNK_SIZE = 25_000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def path_model(close, vol_window=TRADING_DAYS):
+    """Daily log returns of the cached history and the realised volatility over `vol_window` bars."""
+    log_returns = np.diff(np.log(np.asarray(close, dtype=float)))
+    log_returns = log_returns[np.isfinite(log_returns)]
+    if len(log_returns) < 2:
+        return None
+    return {
+        'returns': log_returns,
+        'sigma': float(log_returns[-vol_window:].std(ddof=1)),
+    }
+
+
+def simulate_log_returns(rng, model, size, tenor, method='gbm', drift=0.0, block_size=10):
+    """`size` antithetic pairs of daily log-return paths, shape (2 * size, tenor).
+
+    'gbm' draws normals with the realised vol and an annual `drift`; 'bootstrap' glues together
+    random blocks of `block_size` historical returns, which keeps fat tails and volatility clusters.
+    The second half of the rows mirrors the first around the mean return.
+    """
+    if method == 'gbm':
+        sigma = model['sigma']
+        mean = drift / TRADING_DAYS - 0.5 * sigma ** 2
+        shocks = rng.standard_normal((size, tenor)) * sigma
+    elif method == 'bootstrap':
+        history = model['returns']
+        mean = history.mean()
+        blocks = -(-tenor // block_size)
+        starts = rng.integers(0, len(history) - block_size + 1, (size, blocks))
+        index = (starts[:, :, None] + np.arange(block_size)).reshape(size, -1)[:, :tenor]
+        shocks = history[index] - mean
+        mean += drift / TRADING_DAYS
+    else:
+        raise ValueError(f"Unknown path model: {method}")
+    return np.concatenate([mean + shocks, mean - shocks])
+
+
+class _Tally:
+    # Running counts, moments and histogram of the payoff, so chunks are dropped once evaluated
+    def __init__(self, edges):
+        self.edges = edges
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        self.paths = self.knockouts = self.delivered = self.touched = self.knockout_days = 0
+        self.total = self.pair_total = self.pair_total_sq = 0.0
+
+    def add(self, returns, hit, days, delivered, touched):
+        self.paths += len(returns)
+        self.knockouts += int(hit.sum())
+        self.knockout_days += int(days[hit].sum())
+        self.delivered += int(delivered.sum())
+        self.touched += int(touched.sum())
+        self.total += float(returns.sum())
+        # Antithetic pairs are independent of each other, so the standard error comes from pair means
+        half = len(returns) // 2
+        pairs = (returns[:half] + returns[half:]) / 2
+        self.pair_total += float(pairs.sum())
+        self.pair_total_sq += float(np.square(pairs).sum())
+        self.counts += np.histogram(np.clip(returns, self.edges[0], self.edges[-1]), bins=self.edges)[0]
+
+    def merge(self, other):
+        self.counts += other.counts
+        for name in ('paths', 'knockouts', 'delivered', 'touched', 'knockout_days', 'total', 'pair_total',
+                     'pair_total_sq'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+def _run_paths(model, levels, paths, tenor, coupon, method, drift, block_size, chunk_size, edges, seed):
+    rng = np.random.default_rng(seed)
+    strike, airbag, knockout = levels
+    tally = _Tally(edges)
+    for start in range(0, paths, chunk_size):
+        pairs = max(1, min(chunk_size, paths - start) // 2)
+        relative = np.exp(np.cumsum(simulate_log_returns(rng, model, pairs, tenor, method, drift, block_size), axis=1))
+        running_max = np.maximum.accumulate(relative, axis=1)
+        hit, days = knockout_events(running_max[:, -1], running_max, knockout)
+        returns, delivered, touched = eli_outcomes(relative, relative.min(axis=1), hit, days, strike, airbag,
+                                                   tenor, coupon)
+        tally.add(returns, hit, days, delivered, touched)
+    return tally
+
+
+@traced()
+def simulate_eli(close, strike_pct, airbag_pct, knockout_pct, tenor=63, coupon=0.0, paths=100_000, method='gbm',
+                 drift=0.0, block_size=10, vol_window=TRADING_DAYS, chunk_size=PATH_CHUNK_SIZE, workers=1, seed=0,
+                 bins=500):
+    """Forward-looking ELI outcomes over simulated daily paths from the cached closes.
+
+    Levels are percentages of today's close (0 disables, as in calculate_price_levels) and are checked
+    on every simulated close; payoffs follow eli.backtest. A fixed `seed` gives common random numbers,
+    so nudging a level in the sidebar moves the answer only because of the level.
+    """
+    model = path_model(close, vol_window)
+    if model is None:
+        return None, "Not enough history to estimate the return distribution"
+    if method == 'bootstrap' and len(model['returns']) < block_size:
+        return None, f"Not enough history for {block_size}-day bootstrap blocks"
+
+    levels = (strike_pct / 100, airbag_pct / 100, knockout_pct / 100)
+    # Payoffs live between losing everything and the full-tenor coupon
+    edges = np.linspace(-1.0, max(coupon * tenor / TRADING_DAYS, 0.0) + 1e-9, bins + 1)
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    shares = [paths // workers + (i < paths % workers) for i in range(workers)]
+    jobs = [(model, levels, share, tenor, coupon, method, drift, block_size, chunk_size, edges, worker_seed)
+            for share, worker_seed in zip(shares, np.random.SeedSequence(seed).spawn(workers)) if share > 0]
+
+    tally = _Tally(edges)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for partial in executor.map(_run_paths, *zip(*jobs)):
+                tally.merge(partial)
+    else:
+        for job in jobs:
+            tally.merge(_run_paths(*job))
+
+    pairs = tally.paths // 2
+    pair_mean = tally.pair_total / pairs
+    pair_var = max(tally.pair_total_sq / pairs - pair_mean ** 2, 0.0)
+    cumulative = np.concatenate([[0], np.cumsum(tally.counts)])
+    return {
+        'paths': tally.paths,
+        'sigma_annual': model['sigma'] * TRADING_DAYS ** 0.5,
+        'knockout_prob': tally.knockouts / tally.paths,
+        'strike_prob': tally.delivered / tally.paths,
+        'strike_touch_prob': tally.touched / tally.paths,
+        'avg_days_to_knockout': tally.knockout_days / tally.knockouts if tally.knockouts else np.nan,
+        'expected_return': tally.total / tally.paths,
+        'expected_return_se': (pair_var / pairs) ** 0.5,
+        'percentiles': {p: float(np.interp(tally.paths * p / 100, cumulative, edges)) for p in PERCENTILES},
+        'histogram': (tally.counts, edges),
+    }, None
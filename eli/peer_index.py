@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from eli import CACHE_DIR
+from eli.async_fetch import fetch_stock_infos
+from eli.constituents import INDEX_URLS, fetch_constituents
+from eli.industry_stats import industry_stats, peer_table, percentile_ranks, records
+
+# Industry composition and peer multiples barely move intraday; rebuild once a day
+PEER_INDEX_TTL = 24 * 60 * 60
+# Bumped when the stored layout changes; older universes are still served but rebuilt first
+PEER_INDEX_VERSION = 2
+# A rebuild with more failed symbols than this share (e.g. while rate limited) doesn't replace the universe
+MAX_FAILED_SHARE = 0.2
+
+
+def build_universe(stocks_data):
+    table = peer_table(stocks_data)
+    stats = industry_stats(table)
+    stats.insert(0, 'industry', stats.index)
+    symbols = pd.concat([table, percentile_ranks(table)], axis=1)
+    return {
+        'version': PEER_INDEX_VERSION,
+        'built_at': time.time(),
+        'industries': {row['industry']: row for row in records(stats)},
+        'symbols': {row['symbol']: row for row in records(symbols)},
+    }
+
+
+class PeerIndex:
+    """Per-industry peer statistics and every constituent's percentile ranks, persisted as one JSON file."""
+
+    def __init__(self, path=None, ttl=PEER_INDEX_TTL):
+        self.path = path or os.path.join(CACHE_DIR, "peer_index.json")
+        self.ttl = ttl
+        self._universes = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                self._universes = json.load(f)
+        except (OSError, ValueError):
+            self._universes = {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._universes, f)
+        os.replace(tmp, self.path)
+
+    def has(self, index_name):
+        return index_name in self._universes
+
+    def is_stale(self, index_name):
+        universe = self._universes.get(index_name)
+        return (universe is None or universe.get('version') != PEER_INDEX_VERSION
+                or time.time() - universe['built_at'] > self.ttl)
+
+    def lookup(self, index_name, industry):
+        universe = self._universes.get(index_name)
+        if universe is None:
+            return None
+        return universe['industries'].get(industry)
+
+    def symbol(self, index_name, symbol):
+        universe = self._universes.get(index_name)
+        if universe is None:
+            return None
+        return universe['symbols'].get(symbol)
+
+    def table(self, index_name):
+        # Every constituent's metrics and in-industry percentile ranks, e.g. to rank the whole universe at once
+        universe = self._universes.get(index_name)
+        return pd.DataFrame(list(universe['symbols'].values())) if universe else pd.DataFrame()
+
+    def industry_peers(self, index_name, industry):
+        universe = self._universes.get(index_name)
+        if universe is None or industry == 'Unknown':
+            return []
+        return [symbol for symbol, stock in universe['symbols'].items() if stock['industry'] == industry]
+
+    def rebuild(self, index_name):
+        constituents = fetch_constituents(index_name)
+        stocks_data, fetch_stats = fetch_stock_infos(constituents)
+        failed = fetch_stats['failed'] > MAX_FAILED_SHARE * len(constituents)
+        previous = self._universes.get(index_name)
+        if failed:
+            print(f"Peer index rebuild for {index_name}: {fetch_stats['failed']} of {len(constituents)} symbols failed")
+            if previous is not None:
+                # Keeps its built_at, so the next refresh tries again
+                return previous
+        universe = build_universe(stocks_data)
+        universe['fetch_stats'] = fetch_stats
+        if failed:
+            # Better than nothing for now, but stale straight away
+            universe['built_at'] = 0
+        with self._lock:
+            self._universes[index_name] = universe
+            self._save()
+        print(f"Rebuilt peer index for {index_name}: {len(universe['industries'])} industries, "
+              f"{fetch_stats['failed']} failed symbols, {fetch_stats['throughput_per_s']} symbols/s")
+        return universe
+
+    def ensure(self, index_name):
+        # Blocks only the very first time a universe is needed and nothing is on disk yet
+        with self._build_lock:
+            if not self.has(index_name):
+                self.rebuild(index_name)
+
+    def refresh_stale(self):
+        for index_name in INDEX_URLS:
+            with self._build_lock:
+                if not self.is_stale(index_name):
+                    continue
+                try:
+                    self.rebuild(index_name)
+                except Exception as e:
+                    print(f"Error rebuilding peer index for {index_name}: {str(e)}")
+
+    def start_background_refresh(self, interval=60 * 60):
+        # One daemon thread per process keeps every universe younger than the TTL
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def loop():
+            while True:
+                self.refresh_stale()
+                time.sleep(interval)
+
+        threading.Thread(target=loop, name="peer-index-refresh", daemon=True).start()
+
+
+peer_index = PeerIndex()
@@ -0,0 +1,158 @@
+"""Aligned multi-ticker price matrices and vectorised peer statistics: correlation, beta, relative strength."""
+import numpy as np
+import pandas as pd
+
+from eli.constituents import fetch_constituents
+from eli.providers import get_provider
+from eli.shared_cache import shared
+from eli.tracing import traced
+
+PEER_PRICES_TTL = 6 * 60 * 60
+BENCHMARKS = {"Hang Seng Index": "^HSI", "S&P 500": "^GSPC"}
+CORRELATION_WINDOW = 63
+RELATIVE_STRENGTH_DAYS = 126
+# A rolling window needs this share of its returns observed, otherwise the value is NaN
+MIN_COVERAGE = 0.8
+# Exchanges close on different holidays; a close is carried over at most this many missing days
+MAX_FILL_DAYS = 5
+
+
+@traced()
+@shared("price_matrix", ttl=PEER_PRICES_TTL)
+def price_matrix(tickers, period="1y"):
+    """Daily closes of every ticker from one batched download, aligned on a shared date index.
+
+    `tickers` is a sorted tuple. Returns {'dates', 'tickers', 'prices'} where prices is a
+    (days, tickers) float array with NaN where a ticker has no close.
+    """
+    data = get_provider().download(tickers, period=period, interval="1d", group_by="column",
+                                   auto_adjust=True, threads=True)
+    if data.empty:
+        close = pd.DataFrame(columns=list(tickers), dtype=float)
+    elif isinstance(data.columns, pd.MultiIndex):
+        close = data['Close']
+    else:
+        close = data[['Close']].set_axis(list(tickers), axis=1)
+    close = close.reindex(columns=list(tickers)).dropna(how='all').ffill(limit=MAX_FILL_DAYS)
+    return {'dates': close.index, 'tickers': list(tickers), 'prices': close.to_numpy(dtype=float)}
+
+
+def index_price_matrix(index_name, extra=(), period="1y"):
+    # Every constituent, the index itself and `extra` (e.g. a target outside the index) in one request
+    tickers = set(fetch_constituents(index_name)) | set(extra)
+    if index_name in BENCHMARKS:
+        tickers.add(BENCHMARKS[index_name])
+    return price_matrix(tuple(sorted(tickers)), period)
+
+
+def log_returns(prices):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(prices), axis=0)
+
+
+def _window_sums(values, window):
+    # Sums over every `window` consecutive rows from one cumulative sum; row i covers values[i:i + window]
+    sums = np.cumsum(values, axis=0)
+    sums = np.concatenate([np.zeros((1,) + values.shape[1:]), sums])
+    return sums[window:] - sums[:-window]
+
+
+def rolling_regression(x, Y, window):
+    """Rolling correlation of every column of Y with x and beta of every column on x, in one pass.
+
+    x is (T,) and Y is (T, N) returns; NaNs are skipped pairwise. Row i of both (T - window + 1, N)
+    outputs is the window ending at return i + window - 1.
+    """
+    valid = ~np.isnan(Y) & ~np.isnan(x)[:, None]
+    xv = np.where(valid, x[:, None], 0.0)
+    yv = np.where(valid, Y, 0.0)
+    n = _window_sums(valid.astype(float), window)
+    sx, sy = _window_sums(xv, window), _window_sums(yv, window)
+    sxx, syy, sxy = _window_sums(xv * xv, window), _window_sums(yv * yv, window), _window_sums(xv * yv, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+        beta = cov / var_x
+    thin = n < window * MIN_COVERAGE
+    corr[thin] = np.nan
+    beta[thin] = np.nan
+    return corr, beta
+
+
+def trailing_returns(prices, lookback):
+    # Return over the last `lookback` days for every column (the whole matrix if it is shorter)
+    start = prices[max(len(prices) - lookback - 1, 0)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return prices[-1] / start - 1
+
+
+def realized_beta(ticker, benchmark, period="1y"):
+    """Beta of daily log returns on the benchmark's over `period`, or None without enough overlap."""
+    try:
+        matrix = price_matrix(tuple(sorted((ticker, benchmark))), period)
+    except Exception as e:
+        print(f"Error fetching prices for the realised beta of {ticker}: {str(e)}")
+        return None
+    columns = {symbol: i for i, symbol in enumerate(matrix['tickers'])}
+    returns = log_returns(matrix['prices'])
+    if len(returns) < 2:
+        return None
+    _, beta = rolling_regression(returns[:, columns[benchmark]], returns[:, [columns[ticker]]], len(returns))
+    return None if np.isnan(beta[0, 0]) else float(beta[0, 0])
+
+
+def valuation_beta(ticker, reported, benchmark):
+    # Yahoo's beta when it has one, else the realised beta on `benchmark`, else 1. The stock page,
+    # analyse_ticker and the screener all value with this, so their fair values agree
+    if reported is not None:
+        return reported
+    return (realized_beta(ticker, benchmark) if benchmark else None) or 1
+
+
+@traced()
+def peer_panel(matrix, target, peers, benchmark=None, window=CORRELATION_WINDOW, lookback=RELATIVE_STRENGTH_DAYS):
+    """Target's rolling beta and peer correlations, and its relative-strength rank among `peers`.
+
+    Returns (result, error). Peers and benchmark missing from the matrix are ignored.
+    """
+    columns = {symbol: i for i, symbol in enumerate(matrix['tickers'])}
+    if target not in columns:
+        return None, f"No price history for {target}"
+    peers = [peer for peer in dict.fromkeys(peers) if peer in columns and peer != target]
+    returns = log_returns(matrix['prices'])
+    if len(returns) < window:
+        return None, f"Need at least {window} days of returns, have {len(returns)}"
+
+    symbols = [target] + peers
+    selected = [columns[symbol] for symbol in symbols]
+    dates = matrix['dates'][window:]
+    table = pd.DataFrame({'ticker': symbols, 'return': trailing_returns(matrix['prices'][:, selected], lookback)})
+    result = {'target': target, 'peers': peers, 'window': window, 'lookback': lookback}
+
+    target_returns = returns[:, columns[target]]
+    if peers:
+        corr, _ = rolling_regression(target_returns, returns[:, selected[1:]], window)
+        table['correlation'] = np.concatenate([[1.0], corr[-1]])
+        result['rolling_correlation'] = pd.DataFrame(corr, index=dates, columns=peers).median(axis=1)
+        result['median_correlation'] = float(np.nanmedian(corr[-1])) if np.isfinite(corr[-1]).any() else None
+
+    if benchmark in columns:
+        bench_returns = returns[:, columns[benchmark]]
+        _, rolling_beta = rolling_regression(bench_returns, returns[:, selected], window)
+        # A window spanning every return is the full-period beta
+        _, beta = rolling_regression(bench_returns, returns[:, selected], len(returns))
+        table['beta'] = beta[0]
+        result['rolling_beta'] = pd.Series(rolling_beta[:, 0], index=dates)
+        result['beta'] = None if np.isnan(beta[0, 0]) else float(beta[0, 0])
+
+    table['rank'] = table['return'].rank(ascending=False, method='min')
+    peer_returns = table['return'].iloc[1:].dropna()
+    target_return = table['return'].iloc[0]
+    # Share of peers the target has outperformed over the lookback
+    result['rs_percentile'] = float((peer_returns < target_return).mean()) if len(peer_returns) and not np.isnan(target_return) else None
+    result['rs_rank'] = None if np.isnan(table['rank'].iloc[0]) else int(table['rank'].iloc[0])
+    result['table'] = table.sort_values('rank').reset_index(drop=True)
+    return result, None
@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from eli.core import format_ticker
+from eli.providers import get_provider
+from eli.shared_cache import shared
+from eli.tracing import traced
+
+BOOK_COLUMNS = ['ticker', 'strike_pct', 'airbag_pct', 'knockout_pct']
+# Optional: position_id, notional, reference_price (the initial fixing), trade_date, expiry
+LATEST_CLOSES_TTL = 60
+# A barrier this close (as a fraction of the current price) is flagged as near
+NEAR_BARRIER = 0.02
+
+
+def load_book(source, name=None):
+    """Positions from a CSV or Parquet file (path or uploaded file object).
+
+    Returns (DataFrame, error). Tickers are normalised with format_ticker, so "700" and "0700.HK" match.
+    """
+    name = name or (source if isinstance(source, str) else getattr(source, "name", ""))
+    try:
+        if os.path.splitext(name)[1].lower() in (".parquet", ".pq"):
+            book = pd.read_parquet(source)
+        else:
+            book = pd.read_csv(source, dtype={'ticker': str})
+    except ImportError:
+        return None, "Reading Parquet needs pyarrow or fastparquet installed"
+    except Exception as e:
+        return None, f"Error reading position book: {str(e)}"
+
+    book.columns = [str(column).strip().lower() for column in book.columns]
+    missing = [column for column in BOOK_COLUMNS if column not in book.columns]
+    if missing:
+        return None, f"Position book is missing columns: {', '.join(missing)}"
+    book = book.dropna(subset=['ticker']).reset_index(drop=True)
+    book['ticker'] = book['ticker'].astype(str).str.strip().map(format_ticker)
+    for column in ('strike_pct', 'airbag_pct', 'knockout_pct'):
+        book[column] = pd.to_numeric(book[column], errors='coerce').fillna(0.0)
+    if 'position_id' not in book.columns:
+        book.insert(0, 'position_id', np.arange(1, len(book) + 1))
+    return book, None
+
+
+@shared("latest_closes", ttl=LATEST_CLOSES_TTL)
+def latest_closes(tickers):
+    """Last close for every ticker from one batched download; `tickers` is a sorted tuple."""
+    data = get_provider().download(tickers, period="5d", interval="1d", group_by="column",
+                                   auto_adjust=True, threads=True)
+    if data.empty:
+        return pd.Series(dtype=float)
+    if isinstance(data.columns, pd.MultiIndex):
+        close = data['Close']
+    else:
+        close = data[['Close']].set_axis(list(tickers), axis=1)
+    return close.ffill().iloc[-1].dropna()
+
+
+def book_levels(book, closes, near=NEAR_BARRIER):
+    """All positions' barrier prices, distances and breach flags in one vectorised pass.
+
+    Levels are taken off `reference_price` when the book has it (the trade's initial fixing),
+    otherwise off the latest close like calculate_price_levels. A 0% level is disabled.
+    """
+    levels = book.copy()
+    close = levels['ticker'].map(closes).astype(float).to_numpy()
+    reference = close
+    if 'reference_price' in levels.columns:
+        reference = pd.to_numeric(levels['reference_price'], errors='coerce').fillna(levels['ticker'].map(closes)).to_numpy()
+    levels['close'] = close
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for level in ('strike', 'airbag', 'knockout'):
+            pct = levels[f'{level}_pct'].to_numpy()
+            price = np.where(pct != 0, reference * pct / 100, np.nan)
+            levels[f'{level}_price'] = price
+            # Move needed (as a fraction of today's close) before the barrier is touched
+            levels[f'{level}_distance'] = price / close - 1
+
+    knocked_out = levels['close'] >= levels['knockout_price']
+    below_airbag = levels['close'] < levels['airbag_price']
+    below_strike = levels['close'] < levels['strike_price']
+    near_knockout = levels['knockout_distance'].between(0, near)
+    near_strike = (-levels['strike_distance']).between(0, near)
+    levels['status'] = np.select(
+        [levels['close'].isna(), knocked_out, below_airbag, below_strike, near_knockout, near_strike],
+        ['No price', 'Knocked out', 'Below airbag', 'Below strike', 'Near knock-out', 'Near strike'],
+        default='OK')
+    levels['breach'] = knocked_out | below_strike
+    # Smallest move to any barrier, in either direction; breached positions sort first
+    levels['nearest_barrier'] = levels[['strike_distance', 'knockout_distance']].abs().min(axis=1)
+    return levels.sort_values(['breach', 'nearest_barrier'], ascending=[False, True]).reset_index(drop=True)
+
+
+@traced()
+def refresh_book(book, near=NEAR_BARRIER):
+    # One batched price fetch for the whole book, however many rows share a ticker
+    closes = latest_closes(tuple(sorted(book['ticker'].unique())))
+    return book_levels(book, closes, near)
@@ -0,0 +1,244 @@
+"""Market-data providers: the one place the package talks to Yahoo Finance and Wikipedia.
+
+Every upstream call goes through get_provider(), which is picked by the ELI_PROVIDER environment
+variable (or set_provider):
+
+    yahoo            yfinance, one request per call (default)
+    bulk             yfinance, concurrent single-ticker history calls coalesced into one download
+    record:<dir>     yfinance, and every payload is also written to a cassette in <dir>
+    replay:<dir>     cassettes only; a missing cassette raises CassetteMiss, nothing touches the network
+    auto:<dir>       replay when a cassette exists, otherwise fetch and record it
+
+    ELI_PROVIDER=record:cassettes python -m eli AAPL 700
+    ELI_PROVIDER=replay:cassettes python benchmarks/bench_cold_start.py --render
+"""
+import abc
+import contextvars
+import hashlib
+import os
+import pickle
+import threading
+
+import pandas as pd
+
+from eli.lazy import lazy_import
+from eli.shared_cache import estimate_size
+from eli.tracing import count, span
+
+yf = lazy_import("yfinance")
+
+# Ticker attributes a provider can serve through payload()
+PAYLOADS = ("info", "balance_sheet", "financials", "cashflow", "recommendations_summary",
+            "quarterly_balance_sheet", "quarterly_financials", "quarterly_cashflow")
+
+
+class MarketDataProvider(abc.ABC):
+    """Interface of every backend; all methods return what the matching yfinance/pandas call returns."""
+
+    @abc.abstractmethod
+    def history(self, ticker, **kwargs):
+        # yf.Ticker(ticker).history(**kwargs)
+        ...
+
+    @abc.abstractmethod
+    def payload(self, ticker, name):
+        # getattr(yf.Ticker(ticker), name) for name in PAYLOADS
+        ...
+
+    @abc.abstractmethod
+    def download(self, tickers, **kwargs):
+        # yf.download(tickers, **kwargs)
+        ...
+
+    @abc.abstractmethod
+    def html_tables(self, url):
+        # pd.read_html(url)
+        ...
+
+
+def upstream(source, method, func):
+    # Every request that leaves the process is counted here, per source and method
+    labels = dict(provider=source, method=method)
+    count("upstream_calls", **labels)
+    try:
+        with span(f"upstream.{source}.{method}"):
+            value = func()
+    except Exception:
+        count("upstream_errors", **labels)
+        raise
+    # In-memory size of the parsed payload; yfinance doesn't expose response sizes
+    count("upstream_bytes", estimate_size(value), **labels)
+    return value
+
+
+class YahooProvider(MarketDataProvider):
+    def history(self, ticker, **kwargs):
+        return upstream("yahoo", "history", lambda: yf.Ticker(ticker).history(**kwargs))
+
+    def payload(self, ticker, name):
+        if name not in PAYLOADS:
+            raise ValueError(f"Unknown payload: {name}")
+        return upstream("yahoo", name, lambda: getattr(yf.Ticker(ticker), name))
+
+    def download(self, tickers, **kwargs):
+        kwargs.setdefault("progress", False)
+        return upstream("yahoo", "download", lambda: yf.download(list(tickers), **kwargs))
+
+    def html_tables(self, url):
+        return upstream("wikipedia", "read_html", lambda: pd.read_html(url))
+
+
+class _Batch:
+    def __init__(self):
+        self.tickers = []
+        self.closed = False
+        self.done = threading.Event()
+        self.frames = {}
+        self.error = None
+
+
+class BulkProvider(MarketDataProvider):
+    """Coalesces history() calls with the same arguments that arrive within `window` seconds into one
+    multi-ticker download; everything else is delegated to `base`.
+    """
+
+    def __init__(self, base=None, window=0.05, max_batch=200):
+        self.base = base or YahooProvider()
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+
+    def history(self, ticker, **kwargs):
+        key = tuple(sorted(kwargs.items()))
+        with self._lock:
+            self.requests += 1
+            batch = self._pending.get(key)
+            if batch is None or batch.closed or len(batch.tickers) >= self.max_batch:
+                batch = self._pending[key] = _Batch()
+                # The flush thread runs in the first caller's context, so its spans carry that run id
+                threading.Timer(self.window, contextvars.copy_context().run, (self._flush, key, batch, kwargs)).start()
+            if ticker not in batch.tickers:
+                batch.tickers.append(ticker)
+        batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        return batch.frames.get(ticker, pd.DataFrame())
+
+    def _flush(self, key, batch, kwargs):
+        with self._lock:
+            batch.closed = True
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+            self.batches += 1
+        try:
+            # actions=True keeps Dividends / Stock Splits, which the bar store checks for, and ignore_tz=False
+            # keeps the exchange timezone that Ticker.history returns (download drops it for daily bars);
+            # the history() arguments override these defaults rather than colliding with them
+            defaults = dict(group_by="ticker", auto_adjust=True, actions=True, threads=True, ignore_tz=False)
+            data = self.base.download(batch.tickers, **{**defaults, **kwargs})
+            for ticker in batch.tickers:
+                frame = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+                batch.frames[ticker] = frame.dropna(how="all")
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+    def payload(self, ticker, name):
+        return self.base.payload(ticker, name)
+
+    def download(self, tickers, **kwargs):
+        return self.base.download(tickers, **kwargs)
+
+    def html_tables(self, url):
+        return self.base.html_tables(url)
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+class CassetteProvider(MarketDataProvider):
+    """Record/replay backend: each distinct call is one pickle file in `root`.
+
+    mode 'record' always calls `base` and overwrites the cassette, 'replay' never calls it, 'auto'
+    replays what exists and records the rest. Cassettes hold the exact upstream objects, so replays
+    exercise the same parsing code as live runs.
+    """
+
+    def __init__(self, root, mode="replay", base=None):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.root = root
+        self.mode = mode
+        self.base = base or YahooProvider()
+        self.hits = self.misses = 0
+
+    def _path(self, method, args, kwargs):
+        key = repr((method, args, sorted(kwargs.items())))
+        digest = hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+        return os.path.join(self.root, f"{method}-{digest}.pkl")
+
+    def _call(self, method, *args, **kwargs):
+        path = self._path(method, args, kwargs)
+        if self.mode != "record" and os.path.exists(path):
+            with open(path, "rb") as f:
+                self.hits += 1
+                count("cassette_hits", method=method)
+                return pickle.load(f)
+        if self.mode == "replay":
+            self.misses += 1
+            count("cassette_misses", method=method)
+            raise CassetteMiss(f"No cassette for {method}{args} {kwargs} in {self.root}")
+
+        value = getattr(self.base, method)(*args, **kwargs)
+        os.makedirs(self.root, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return value
+
+    def history(self, ticker, **kwargs):
+        return self._call("history", ticker, **kwargs)
+
+    def payload(self, ticker, name):
+        return self._call("payload", ticker, name)
+
+    def download(self, tickers, **kwargs):
+        return self._call("download", tuple(tickers), **kwargs)
+
+    def html_tables(self, url):
+        return self._call("html_tables", url)
+
+
+def provider_from_spec(spec):
+    kind, _, root = (spec or "yahoo").partition(":")
+    if kind == "yahoo":
+        return YahooProvider()
+    if kind == "bulk":
+        return BulkProvider()
+    if kind in ("record", "replay", "auto"):
+        return CassetteProvider(root or "cassettes", mode=kind)
+    raise ValueError(f"Unknown market-data provider: {spec}")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = provider_from_spec(os.environ.get("ELI_PROVIDER"))
+        return _provider
+
+
+def set_provider(provider):
+    global _provider
+    with _provider_lock:
+        _provider = provider_from_spec(provider) if isinstance(provider, str) else provider
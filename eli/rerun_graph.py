@@ -0,0 +1,55 @@
+import hashlib
+import pickle
+import time
+from collections import OrderedDict
+
+
+def input_key(inputs, upstream_versions):
+    # Inputs are small scalars (tickers, percentages, flags); upstream nodes contribute their version
+    # key rather than their value, so DataFrames and figures never need hashing
+    payload = pickle.dumps((sorted(inputs.items()), sorted(upstream_versions.items())), protocol=4)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class RerunGraph:
+    """Page sections as nodes with explicit inputs; a node recomputes only when its inputs change.
+
+    `state` is any dict that survives reruns (st.session_state in the app). Each node keeps its last
+    few results keyed by input hash, so flipping a widget back and forth is free as well.
+    """
+
+    def __init__(self, state, history=4):
+        self.state = state
+        self.history = history
+        self.computed = {}
+        self.reused = []
+
+    def _memo(self, name):
+        return self.state.setdefault(f"_rerun_graph:{name}", OrderedDict())
+
+    def version(self, name):
+        # Key of the value most recently returned by `name` in this session
+        memo = self._memo(name)
+        return next(reversed(memo)) if memo else None
+
+    def node(self, name, func, inputs=None, deps=(), salt=None):
+        # `salt` is hashed with the inputs but not passed to func (e.g. a data version or refresh count)
+        inputs = inputs or {}
+        key = input_key(dict(inputs, _salt=salt), {dep: self.version(dep) for dep in deps})
+        memo = self._memo(name)
+        if key in memo:
+            memo.move_to_end(key)
+            self.reused.append(name)
+            return memo[key]
+
+        start = time.perf_counter()
+        value = func(**inputs)
+        self.computed[name] = time.perf_counter() - start
+        memo[key] = value
+        while len(memo) > self.history:
+            memo.popitem(last=False)
+        return value
+
+    def invalidate(self, *names):
+        for name in names:
+            self.state.pop(f"_rerun_graph:{name}", None)
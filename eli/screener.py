@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from eli import CACHE_DIR
+from eli.constituents import fetch_constituents
+from eli.fundamentals import get_snapshot
+from eli.peer_prices import BENCHMARKS, valuation_beta
+from eli.tracing import traced, tracer
+from eli.valuation import fair_value_for, get_financial_data
+
+RANKING_COLUMNS = ['symbol', 'sector', 'method', 'current_price', 'fair_value', 'discount_pct', 'error', 'updated_at']
+
+
+def table_path(index_name, root=None):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', index_name).strip('_').lower()
+    return os.path.join(root or CACHE_DIR, "screener", f"{slug}.json")
+
+
+def load_table(index_name, root=None):
+    try:
+        with open(table_path(index_name, root)) as f:
+            return {row['symbol']: row for row in json.load(f)}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_table(index_name, table, root=None):
+    path = table_path(index_name, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(list(table.values()), f)
+    os.replace(tmp, path)
+
+
+def statements_fingerprint(info):
+    # Yahoo bumps these whenever a new annual or quarterly filing lands; None (nothing to compare) is always stale
+    fields = (info.get('lastFiscalYearEnd'), info.get('mostRecentQuarter'), info.get('sharesOutstanding'))
+    if all(field is None for field in fields):
+        return None
+    return "/".join(str(field) for field in fields)
+
+
+def _plain(value):
+    if isinstance(value, (np.integer, np.floating)):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def screen_symbol(symbol, previous, inputs, benchmark=None):
+    """One row of the screener; statements are only re-fetched when the filing fingerprint moved."""
+    row = {'symbol': symbol, 'updated_at': time.time(), 'refetched': False}
+    try:
+        info = get_snapshot(symbol).info
+        fingerprint = statements_fingerprint(info)
+        if fingerprint is not None and previous and previous.get('fingerprint') == fingerprint and previous.get('financials'):
+            financials = previous['financials']
+        else:
+            financials = {key: _plain(value) for key, value in get_financial_data(symbol).items()}
+            row['refetched'] = True
+
+        current_price = info.get('currentPrice') or info.get('regularMarketPrice')
+        sector = info.get('sector', 'Unknown')
+        beta = valuation_beta(symbol, info.get('beta'), benchmark)
+        fair_value, error_message, method, _ = fair_value_for(financials, sector, beta, current_price, **inputs)
+
+        row.update({
+            'sector': sector,
+            'method': method,
+            'current_price': _plain(current_price),
+            'fair_value': _plain(fair_value),
+            'error': error_message,
+            'fingerprint': fingerprint,
+            'financials': financials,
+        })
+        # A non-positive fair value has no meaningful discount; it stays None and ranks last
+        if row['fair_value'] is not None and row['fair_value'] > 0 and row['current_price']:
+            # Same sign convention as the Price Comparison chart: positive = discount, negative = premium
+            row['discount_pct'] = (1 - row['current_price'] / row['fair_value']) * 100
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {str(e)}"
+        if previous:
+            row['fingerprint'] = previous.get('fingerprint')
+            row['financials'] = previous.get('financials')
+    return row
+
+
+def _screen_symbol_traced(symbol, previous, inputs, benchmark, context):
+    # Runs in a pool process: its spans and counters go back with the row, tagged with the caller's run
+    with tracer.adopt(context) as collected:
+        row = screen_symbol(symbol, previous, inputs, benchmark)
+    return row, collected
+
+
+@traced()
+def run_screener(index_name, risk_free_rate, market_risk_premium, terminal_growth_rate, high_growth_period,
+                 workers=None, root=None):
+    """Value every constituent of `index_name` on a process pool (one worker per CPU by default) and persist the table."""
+    table = load_table(index_name, root)
+    symbols = fetch_constituents(index_name)
+    inputs = {
+        'risk_free_rate': risk_free_rate,
+        'market_risk_premium': market_risk_premium,
+        'terminal_growth_rate': terminal_growth_rate,
+        'high_growth_period': high_growth_period,
+    }
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        results = list(executor.map(_screen_symbol_traced, symbols, [table.get(symbol) for symbol in symbols],
+                                    repeat(inputs), repeat(BENCHMARKS.get(index_name)), repeat(tracer.context()),
+                                    chunksize=8))
+    rows = []
+    for row, collected in results:
+        tracer.absorb(collected)
+        rows.append(row)
+    table = {row['symbol']: row for row in rows}
+    save_table(index_name, table, root)
+
+    stats = {
+        'symbols': len(rows),
+        'refetched': sum(row['refetched'] for row in rows),
+        'errors': sum(bool(row.get('error')) for row in rows),
+        'elapsed_s': round(time.perf_counter() - start, 1),
+    }
+    return ranking(table), stats
+
+
+def ranking(table):
+    frame = pd.DataFrame(list(table.values()))
+    if frame.empty:
+        return pd.DataFrame(columns=RANKING_COLUMNS)
+    frame = frame.reindex(columns=RANKING_COLUMNS)
+    frame['updated_at'] = pd.to_datetime(frame['updated_at'], unit='s')
+    return frame.sort_values('discount_pct', ascending=False, na_position='last').reset_index(drop=True)
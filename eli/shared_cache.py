@@ -0,0 +1,173 @@
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from eli.tracing import count, tracer
+
+# Upper bound on what the process keeps in memory across all sessions
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def estimate_size(value):
+    """Approximate bytes held by a cached value; DataFrames and arrays dominate, the rest is rough."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value, expires_at, size):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class _Flight:
+    # One in-flight computation; followers block on `done` and read its outcome
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SharedCache:
+    """Process-wide TTL cache shared by every Streamlit session, bounded by bytes with LRU eviction.
+
+    Concurrent misses for the same key are coalesced: the first caller computes, the others wait for
+    its result (or its exception, which is never cached). Cached values are shared between sessions
+    and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'expired': 0, 'errors': 0}
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < now:
+            self._remove(key)
+            self.counters['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+    def _store(self, key, value, ttl):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.counters['evictions'] += 1
+
+    def get_or_compute(self, key, compute, ttl, refresh=False):
+        """Cached value for `key`, calling `compute()` at most once across threads on a miss.
+
+        With refresh=True the cached value is ignored, but a computation already in flight is still
+        joined since it is at least as fresh.
+        """
+        # Per-name outcomes for the tracing counters; keys made by @shared start with the name
+        name = key[0] if isinstance(key, tuple) and key and isinstance(key[0], str) else "other"
+        with self._lock:
+            entry = None if refresh else self._lookup(key, time.monotonic())
+            if entry is not None:
+                self.counters['hits'] += 1
+                result = "hit"
+            else:
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = _Flight()
+                    self.counters['misses'] += 1
+                else:
+                    self.counters['coalesced'] += 1
+                result = "miss" if leader else "coalesced"
+        count("cache_lookups", cache=name, result=result)
+        if entry is not None:
+            return entry.value
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.counters['errors'] += 1
+            raise
+        else:
+            with self._lock:
+                self._store(key, flight.value, ttl)
+            return flight.value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def invalidate(self, predicate=None):
+        """Drop every entry whose key matches `predicate` (all entries when None)."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate is None or predicate(key)]:
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses'] + self.counters['coalesced']
+            return dict(self.counters, entries=len(self._entries), bytes=self.bytes, max_bytes=self.max_bytes,
+                        inflight=len(self._inflight),
+                        hit_rate=(self.counters['hits'] + self.counters['coalesced']) / lookups if lookups else None)
+
+
+shared_cache = SharedCache()
+tracer.register_gauges("shared_cache", shared_cache.stats)
+
+
+def shared(name, ttl, cache=None):
+    """Decorator: memoize a function in the shared cache under (name, args, kwargs).
+
+    `func.invalidate(*args)` drops the entries whose leading positional arguments match.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return (cache or shared_cache).get_or_compute(key, lambda: func(*args, **kwargs), ttl)
+
+        def invalidate(*args):
+            (cache or shared_cache).invalidate(lambda key: key[0] == name and key[1][:len(args)] == args)
+
+        wrapper.invalidate = invalidate
+        return wrapper
+    return decorator
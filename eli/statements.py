@@ -0,0 +1,148 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from eli import CACHE_DIR
+from eli.fundamentals import get_snapshot
+from eli.tracing import traced
+
+# yfinance statement attributes; the quarterly variant of each is prefixed with "quarterly_"
+STATEMENTS = ("balance_sheet", "financials", "cashflow")
+FREQUENCIES = {"annual": "", "quarterly": "quarterly_"}
+
+# Statements only change when a filing lands; within this window they are served from disk alone
+STATEMENTS_TTL = 24 * 60 * 60
+
+
+def _normalise(frame):
+    # yfinance layout: line items as rows, period ends as columns (newest first), numbers as floats
+    if frame is None or frame.empty:
+        return pd.DataFrame(dtype=float)
+    frame = frame.apply(pd.to_numeric, errors="coerce")
+    frame.columns = pd.to_datetime(frame.columns).tz_localize(None).normalize()
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    return frame.sort_index(axis=1, ascending=False)
+
+
+def merge_statement(old, new):
+    """Union of periods and line items; values from `new` win, so restatements replace old figures."""
+    if old is None or old.empty:
+        return _normalise(new)
+    if new is None or new.empty:
+        return old
+    return _normalise(new).combine_first(old).sort_index(axis=1, ascending=False)
+
+
+class StatementStore:
+    """Annual and quarterly statements per ticker, accumulated across fetches.
+
+    Each statement is a float64 .npy matrix (line items x period ends) next to a meta.json that
+    names the rows and columns, so yfinance's rolling 4-5 column window grows into a long history.
+    """
+
+    def __init__(self, root=None):
+        self.root = os.path.join(root or CACHE_DIR, "statements")
+
+    def _dir(self, ticker):
+        return os.path.join(self.root, ticker.upper().replace(os.sep, "_"))
+
+    def tickers(self):
+        try:
+            return sorted(os.listdir(self.root))
+        except OSError:
+            return []
+
+    def load_meta(self, ticker):
+        try:
+            with open(os.path.join(self._dir(ticker), "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, ticker, statement, frequency="annual"):
+        name = f"{FREQUENCIES[frequency]}{statement}"
+        layout = self.load_meta(ticker).get("tables", {}).get(name)
+        if layout is None:
+            return pd.DataFrame(dtype=float)
+        try:
+            values = np.load(os.path.join(self._dir(ticker), f"{name}.npy"))
+        except (OSError, ValueError):
+            return pd.DataFrame(dtype=float)
+        return pd.DataFrame(values, index=layout["items"], columns=pd.to_datetime(layout["periods"]))
+
+    def save(self, ticker, tables, fetched_at=None):
+        """Write {name: frame} for one ticker; tables not given keep their stored version."""
+        path = self._dir(ticker)
+        os.makedirs(path, exist_ok=True)
+        meta = self.load_meta(ticker)
+        layouts = meta.get("tables", {})
+        for name, frame in tables.items():
+            tmp = os.path.join(path, f"{name}.npy.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, frame.to_numpy(dtype=np.float64))
+            os.replace(tmp, os.path.join(path, f"{name}.npy"))
+            layouts[name] = {
+                "items": [str(item) for item in frame.index],
+                "periods": [period.strftime("%Y-%m-%d") for period in frame.columns],
+            }
+        meta = {"tables": layouts, "fetched_at": fetched_at or time.time()}
+        # Meta goes last so readers never see rows or columns that don't match the matrix
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    def is_fresh(self, ticker, max_age=STATEMENTS_TTL):
+        meta = self.load_meta(ticker)
+        return bool(meta.get("tables")) and time.time() - meta.get("fetched_at", 0) < max_age
+
+    def line_item(self, item, statement, frequency="annual", tickers=None):
+        """One line item across tickers: rows are tickers, columns period ends (newest first)."""
+        rows = {}
+        for ticker in tickers or self.tickers():
+            frame = self.load(ticker, statement, frequency)
+            if item in frame.index:
+                rows[ticker.upper()] = frame.loc[item]
+        if not rows:
+            return pd.DataFrame(dtype=float)
+        return pd.DataFrame(rows).T.sort_index(axis=1, ascending=False)
+
+
+@traced()
+def update_statements(ticker, store=None, max_age=STATEMENTS_TTL, force=False):
+    """All statements for `ticker` from the warehouse, merging in a fresh yfinance pull when stale.
+
+    Returns {(statement, frequency): frame}. If the pull fails, whatever is stored is returned.
+    """
+    store = store or default_store
+    if force or not store.is_fresh(ticker, max_age):
+        try:
+            snapshot = get_snapshot(ticker)
+            tables = {}
+            for frequency, prefix in FREQUENCIES.items():
+                for statement in STATEMENTS:
+                    name = f"{prefix}{statement}"
+                    tables[name] = merge_statement(store.load(ticker, statement, frequency), getattr(snapshot, name))
+            store.save(ticker, tables)
+        except Exception as e:
+            print(f"Error updating statements for {ticker}: {str(e)}")
+    return {(statement, frequency): store.load(ticker, statement, frequency)
+            for frequency in FREQUENCIES for statement in STATEMENTS}
+
+
+def free_cash_flow(cash_flow):
+    """Annual FCF series (newest first), falling back to Operating Cash Flow - |Capital Expenditure|."""
+    if 'Free Cash Flow' in cash_flow.index:
+        series = cash_flow.loc['Free Cash Flow']
+        if series.notna().any():
+            return series.dropna()
+    if 'Operating Cash Flow' in cash_flow.index:
+        capex = cash_flow.loc['Capital Expenditure'].abs() if 'Capital Expenditure' in cash_flow.index else 0
+        return (cash_flow.loc['Operating Cash Flow'] - capex).dropna()
+    return pd.Series(dtype=float)
+
+
+default_store = StatementStore()
@@ -0,0 +1,257 @@
+"""Lightweight tracing: timed spans, labelled counters and JSON-lines / Prometheus text exporters.
+
+    with span("get_index_constituents", index=index_name): ...
+    @traced()                                     # span named after the function
+    count("upstream_calls", provider="yahoo", method="history")
+
+Set ELI_TRACE_EXPORT to a file or an http(s) URL and start_exporter() writes a snapshot every
+ELI_TRACE_INTERVAL seconds: `.prom` / `.txt` files are rewritten in Prometheus text format (for a
+textfile collector), other files get one JSON line per snapshot, URLs receive a POST of the
+Prometheus text (e.g. a Pushgateway).
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import urllib.request
+import uuid
+from collections import deque
+
+# Individual spans kept for the debug panel; aggregates cover the whole process lifetime
+RECENT_SPANS = 5000
+EXPORT_INTERVAL = float(os.environ.get("ELI_TRACE_INTERVAL", 60))
+
+_run = contextvars.ContextVar("eli_trace_run", default=None)
+_parent = contextvars.ContextVar("eli_trace_parent", default=None)
+_collected = contextvars.ContextVar("eli_trace_collected", default=None)
+
+
+class Tracer:
+    def __init__(self, recent=RECENT_SPANS):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+        self.recent = deque(maxlen=recent)
+        self.gauges = {}
+        self.started_at = time.time()
+
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        parent = _parent.get()
+        token = _parent.set(name)
+        started_at = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _parent.reset(token)
+            self._record(name, time.perf_counter() - start, started_at, parent, error, attrs)
+
+    def _record(self, name, duration, started_at, parent, error, attrs):
+        record = {'name': name, 'parent': parent, 'run': _run.get(), 'start': started_at,
+                  'duration_s': duration, 'error': error, **attrs}
+        collected = _collected.get()
+        if collected is not None:
+            collected['spans'].append(record)
+        with self._lock:
+            self._add_span(record)
+
+    def _add_span(self, record):
+        stat = self.spans.get(record['name'])
+        if stat is None:
+            stat = self.spans[record['name']] = {'count': 0, 'total_s': 0.0, 'max_s': 0.0, 'errors': 0}
+        stat['count'] += 1
+        stat['total_s'] += record['duration_s']
+        stat['max_s'] = max(stat['max_s'], record['duration_s'])
+        stat['errors'] += record['error'] is not None
+        self.recent.append(record)
+
+    def traced(self, name=None):
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        collected = _collected.get()
+        if collected is not None:
+            collected['counters'][key] = collected['counters'].get(key, 0) + value
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def register_gauges(self, name, func):
+        # `func` returns a dict of current values (e.g. SharedCache.stats), read at snapshot time
+        self.gauges[name] = func
+
+    def start_run(self):
+        # Tags every span recorded from this context (one Streamlit script run) until the next start_run
+        run_id = uuid.uuid4().hex[:12]
+        _run.set(run_id)
+        return run_id
+
+    def context(self):
+        # Run id and enclosing span, to hand to a worker process the caller's contextvars don't reach
+        return _run.get(), _parent.get()
+
+    @contextlib.contextmanager
+    def adopt(self, context):
+        """Record the block's spans as if it ran inside `context` (from context()) and collect them.
+
+        Yields {'spans', 'counters'}; a worker process returns it so the caller can absorb() it.
+        """
+        collected = {'spans': [], 'counters': {}}
+        tokens = [(_run, _run.set(context[0])), (_parent, _parent.set(context[1])),
+                  (_collected, _collected.set(collected))]
+        try:
+            yield collected
+        finally:
+            for var, token in reversed(tokens):
+                var.reset(token)
+
+    def absorb(self, collected):
+        # Merge what adopt() collected in another process into this tracer
+        with self._lock:
+            for record in collected['spans']:
+                self._add_span(record)
+            for key, value in collected['counters'].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def run_spans(self, run_id):
+        with self._lock:
+            return [record for record in self.recent if record['run'] == run_id]
+
+    def snapshot(self):
+        with self._lock:
+            spans = {name: dict(stat) for name, stat in self.spans.items()}
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in self.counters.items()]
+        gauges = {}
+        for name, func in self.gauges.items():
+            try:
+                gauges[name] = func()
+            except Exception as e:
+                gauges[name] = {'error': type(e).__name__}
+        return {'time': time.time(), 'pid': os.getpid(), 'uptime_s': time.time() - self.started_at,
+                'spans': spans, 'counters': counters, 'gauges': gauges}
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.recent.clear()
+
+
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+count = tracer.count
+
+
+def summarize(records):
+    """Per-name calls, total, max and errors of a list of span records, slowest total first."""
+    summary = {}
+    for record in records:
+        row = summary.setdefault(record['name'], {'span': record['name'], 'calls': 0, 'total_ms': 0.0,
+                                                  'max_ms': 0.0, 'errors': 0})
+        row['calls'] += 1
+        row['total_ms'] += record['duration_s'] * 1000
+        row['max_ms'] = max(row['max_ms'], record['duration_s'] * 1000)
+        row['errors'] += record['error'] is not None
+    return sorted(summary.values(), key=lambda row: row['total_ms'], reverse=True)
+
+
+def _metric_name(name):
+    return "eli_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+def prometheus_text(snapshot):
+    lines = []
+    for metric, field, kind in (("eli_span_calls_total", 'count', "counter"),
+                                ("eli_span_seconds_total", 'total_s', "counter"),
+                                ("eli_span_seconds_max", 'max_s', "gauge"),
+                                ("eli_span_errors_total", 'errors', "counter")):
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, stat in sorted(snapshot['spans'].items()):
+            lines.append(f"{metric}{_labels({'span': name})} {stat[field]}")
+
+    by_name = {}
+    for counter in snapshot['counters']:
+        by_name.setdefault(counter['name'], []).append(counter)
+    for name, counters in sorted(by_name.items()):
+        metric = _metric_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.extend(f"{metric}{_labels(counter['labels'])} {counter['value']}" for counter in counters)
+
+    for name, values in sorted(snapshot['gauges'].items()):
+        for key, value in sorted(values.items()):
+            # Only numeric gauges are exported; None (e.g. no lookups yet) is skipped
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"{_metric_name(f'{name}_{key}')} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def export(target, snapshot=None):
+    """Write one snapshot to `target`: a .prom/.txt file, any other file (JSON lines) or an http(s) URL."""
+    snapshot = snapshot or tracer.snapshot()
+    if target.startswith(("http://", "https://")):
+        request = urllib.request.Request(target, data=prometheus_text(snapshot).encode(), method="POST",
+                                         headers={'Content-Type': "text/plain; version=0.0.4"})
+        with urllib.request.urlopen(request, timeout=10):
+            return
+    directory = os.path.dirname(os.path.abspath(target))
+    os.makedirs(directory, exist_ok=True)
+    if os.path.splitext(target)[1] in (".prom", ".txt"):
+        tmp = target + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(prometheus_text(snapshot))
+        os.replace(tmp, target)
+    else:
+        with open(target, "a") as f:
+            f.write(json.dumps(snapshot, default=str) + "\n")
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(target=None, interval=EXPORT_INTERVAL):
+    """Export a snapshot every `interval` seconds from a daemon thread; a no-op without a target."""
+    global _exporter_started
+    target = target or os.environ.get("ELI_TRACE_EXPORT")
+    if not target:
+        return False
+    with _exporter_lock:
+        if _exporter_started:
+            return True
+        _exporter_started = True
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                export(target)
+            except Exception as e:
+                print(f"Error exporting traces to {target}: {str(e)}")
+
+    threading.Thread(target=loop, name="trace-exporter", daemon=True).start()
+    return True
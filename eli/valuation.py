@@ -0,0 +1,212 @@
+from eli.fundamentals import get_snapshot
+from eli.providers import get_provider
+from eli.shared_cache import shared
+from eli.statements import free_cash_flow, update_statements
+from eli.tracing import traced
+
+RISK_FREE_RATE_TTL = 15 * 60
+FINANCIAL_DATA_TTL = 30 * 60
+# FCF growth is the CAGR from the oldest positive annual FCF at most this many years back
+FCF_GROWTH_YEARS = 5
+
+# Helper functions for DCF model
+
+@shared("treasury_yield", ttl=RISK_FREE_RATE_TTL)
+def _treasury_yield():
+    treasury_ticker = "^TNX"  # 10-year Treasury Yield
+    treasury_data = get_provider().history(treasury_ticker, period="1d")
+    return treasury_data['Close'].iloc[-1] / 100  # Convert to decimal
+
+
+@traced()
+def get_risk_free_rate():
+    try:
+        return _treasury_yield()
+    except:
+        return 0.035  # Default to 3.5% if unable to fetch
+    
+
+@traced()
+@shared("financial_data", ttl=FINANCIAL_DATA_TTL)
+def get_financial_data(ticker):
+    stock = get_snapshot(ticker)
+    financials = {}
+    # Annual statements come from the local warehouse, which keeps every year ever fetched
+    statements = update_statements(ticker)
+    
+    # Balance sheet data
+    balance_sheet = statements['balance_sheet', 'annual']
+    financials['total_debt'] = balance_sheet.loc['Total Debt'].iloc[0] if 'Total Debt' in balance_sheet.index else 0
+    financials['cash'] = balance_sheet.loc['Cash Financial'].iloc[0] if 'Cash Financial' in balance_sheet.index else 0
+    financials['cash_equivalents'] = balance_sheet.loc['Cash Equivalents'].iloc[0] if 'Cash Equivalents' in balance_sheet.index else 0
+    financials['cash_and_cash_equivalents'] = balance_sheet.loc['Cash Cash Equivalents And Short Term Investments'].iloc[0] if 'Cash Cash Equivalents And Short Term Investments' in balance_sheet.index else 0
+    #financials['cash_and_cash_equivalents'] = financials['cash'] + financials['cash_equivalents']
+    financials['total_equity'] = balance_sheet.loc['Common Stock Equity'].iloc[0] if 'Common Stock Equity' in balance_sheet.index else 0
+    financials['net_debt'] = balance_sheet.loc['Net Debt'].iloc[0] if 'Net Debt' in balance_sheet.index else 0
+    financials['share_issued'] = stock.info.get("sharesOutstanding", "N/A")#balance_sheet.loc['Share Issued'].iloc[0] if 'Share Issued' in balance_sheet.index else 0
+    
+    # Income statement data
+    income_stmt = statements['financials', 'annual']
+    financials['interest_expense'] = abs(income_stmt.loc['Interest Expense'].iloc[0]) if 'Interest Expense' in income_stmt.index else 0
+    financials['income_tax'] = income_stmt.loc['Tax Provision'].iloc[0] if 'Tax Provision' in income_stmt.index else 0
+    financials['net_income'] = income_stmt.loc['Net Income'].iloc[0] if 'Net Income' in income_stmt.index else 0
+    financials['pre_tax_income'] = income_stmt.loc['Pretax Income'].iloc[0] if 'Pretax Income' in income_stmt.index else (financials['net_income'] + financials['income_tax'])
+    
+    # Cash flow statement data
+    cash_flow = statements['cashflow', 'annual']
+    fcf = free_cash_flow(cash_flow)  # Newest first; Operating Cash Flow - CapEx where FCF isn't reported
+    financials['fcf_history'] = [float(value) for value in fcf.values]
+    financials['fcf_years'] = [str(period.year) for period in fcf.index]
+    financials['fcf_latest'] = financials['fcf_history'][0] if len(fcf) else 0
+    for years in (1, 2, 3):
+        financials[f'fcf_{years}years_ago'] = financials['fcf_history'][years] if len(fcf) > years else None
+
+    # Additional info
+    financials['shares_outstanding'] = stock.info.get('sharesOutstanding')
+    financials['market_cap'] = stock.info.get('marketCap')
+    
+    return financials
+    
+def calculate_wacc(financials, risk_free_rate, market_risk_premium, beta):
+    # Cost of Equity
+    cost_of_equity = risk_free_rate + beta * market_risk_premium/100
+    
+    # Cost of Debt
+    if financials['total_debt'] != 0 and financials['interest_expense'] != 0:
+        cost_of_debt = financials['interest_expense'] / financials['total_debt']
+    else:
+        cost_of_debt = risk_free_rate
+    
+    # Tax Rate
+    pre_tax_income = financials.get('pre_tax_income', financials['net_income'] + financials['income_tax'])
+    if pre_tax_income != 0:
+        tax_rate = financials['income_tax'] / pre_tax_income
+    else:
+        tax_rate = 0.30  # Assume a default tax rate of 30%
+    
+    # Weights
+    total_capital = financials['total_debt'] + financials['total_equity']
+    weight_of_debt = financials['total_debt'] / total_capital
+    weight_of_equity = financials['total_equity'] / total_capital
+    
+    # WACC
+    wacc = (weight_of_equity * cost_of_equity) + (weight_of_debt * cost_of_debt * (1 - tax_rate))
+    
+    return wacc
+
+def calculate_fcf_growth_rate(financials):
+    fcf_latest = financials['fcf_latest']
+    # Full annual series from the warehouse when present, otherwise the 4-year window
+    history = financials.get('fcf_history') or [fcf_latest, financials.get('fcf_1years_ago'),
+                                                financials.get('fcf_2years_ago'), financials.get('fcf_3years_ago')]
+    earlier = history[1:FCF_GROWTH_YEARS + 1]
+
+    if fcf_latest <= 0 or all(fcf <= 0 for fcf in earlier if fcf is not None):
+        return None, "Growth rate cannot be estimated due to negative FCF"
+
+    # CAGR from the oldest positive FCF in the window
+    for years in range(len(earlier), 0, -1):
+        base = earlier[years - 1]
+        if base is not None and base > 0:
+            return (fcf_latest / base) ** (1/years) - 1, None
+    return None, "Growth rate cannot be estimated due to negative FCF"
+
+
+def calculate_excess_return_fair_value(financials, cost_of_equity, terminal_growth_rate):
+    try:
+        book_value = financials['total_equity']
+        net_income = financials['net_income']
+        shares_outstanding = financials['share_issued']
+
+        roe = net_income / book_value
+        excess_return = (roe - cost_of_equity) * book_value
+        terminal_value = excess_return * (1 + terminal_growth_rate) / (cost_of_equity - terminal_growth_rate)
+        equity_value = book_value + terminal_value
+        fair_value = equity_value / shares_outstanding
+
+        return fair_value, None
+    except Exception as e:
+        return None, f"Error in excess return calculation: {str(e)}"
+
+def calculate_dcf_fair_value(financials, wacc, terminal_growth_rate, high_growth_period, current_price):
+    fcf_growth_rate, error_message = calculate_fcf_growth_rate(financials)
+    
+    if error_message:
+        return None, error_message
+    
+    fcf = financials['fcf_latest']
+    pv_fcf = 0
+    
+    # High growth period
+    for i in range(1, high_growth_period + 1):
+        fcf *= (1 + fcf_growth_rate)
+        pv_fcf += fcf / ((1 + wacc) ** i)
+    
+    # Terminal value
+    terminal_value = fcf * (1 + terminal_growth_rate) / (wacc - terminal_growth_rate)
+    pv_terminal_value = terminal_value / ((1 + wacc) ** high_growth_period)
+    
+    # Enterprise Value
+    enterprise_value = pv_fcf + pv_terminal_value
+    
+    # Equity Value
+    equity_value = enterprise_value - financials['total_debt'] + financials.get('cash_and_cash_equivalents', 0)
+    
+    # Shares outstanding
+    shares_outstanding = financials['share_issued']
+    if shares_outstanding is None:
+        if current_price <= 0:
+            return None, "Invalid current price for calculating shares outstanding"
+        shares_outstanding = equity_value / current_price
+    
+    # Fair value per share
+    fair_value = equity_value / shares_outstanding
+    
+    return fair_value, None
+
+def discount_rates(financials, risk_free_rate, market_risk_premium, beta):
+    # The WACC inputs exactly as the app shows them (21% default tax, all-equity if there is no capital)
+    cost_of_equity = risk_free_rate + beta * (market_risk_premium/100)
+
+    if financials['total_debt'] != 0 and financials['interest_expense'] != 0:
+        cost_of_debt = financials['interest_expense'] / financials['total_debt']
+    else:
+        cost_of_debt = risk_free_rate
+
+    if financials['pre_tax_income'] != 0:
+        tax_rate = financials['income_tax'] / financials['pre_tax_income']
+    else:
+        tax_rate = 0.21  # Assume a default corporate tax rate of 21%
+
+    total_capital = financials['total_debt'] + financials['total_equity']
+    if total_capital != 0:
+        weight_of_debt = financials['total_debt'] / total_capital
+        weight_of_equity = financials['total_equity'] / total_capital
+    else:
+        weight_of_debt = 0
+        weight_of_equity = 1
+
+    wacc = (weight_of_equity * cost_of_equity) + (weight_of_debt * cost_of_debt * (1 - tax_rate))
+
+    return {
+        'cost_of_equity': cost_of_equity,
+        'cost_of_debt': cost_of_debt,
+        'tax_rate': tax_rate,
+        'weight_of_debt': weight_of_debt,
+        'weight_of_equity': weight_of_equity,
+        'wacc': wacc,
+    }
+
+
+@traced()
+def fair_value_for(financials, sector, beta, current_price, risk_free_rate, market_risk_premium,
+                   terminal_growth_rate, high_growth_period):
+    # The valuation pipeline from main(): excess return for financials, DCF for everything else
+    rates = discount_rates(financials, risk_free_rate, market_risk_premium, beta)
+    if sector == 'Financial Services':
+        fair_value, error_message = calculate_excess_return_fair_value(financials, rates['cost_of_equity'], terminal_growth_rate/100)
+        method = "Excess Return"
+    else:
+        fair_value, error_message = calculate_dcf_fair_value(financials, rates['wacc'], terminal_growth_rate/100, high_growth_period, current_price)
+        method = "DCF"
+    return fair_value, error_message, method, rates
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+def bin_edges(low, high, bins):
+    lo, hi = np.nanmin(low), np.nanmax(high)
+    if hi <= lo:
+        # Flat series: give the single price a small band so histogramming still works
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, bins + 1)
+
+
+def bar_contributions(data, edges, distribute=False):
+    """Volume each bar adds to each price bin, shape (bars, bins)."""
+    volume = data['Volume'].to_numpy(dtype=float)
+    bins = len(edges) - 1
+
+    if not distribute:
+        # Whole bar volume at the close, like the original pd.cut/groupby profile
+        idx = np.clip(np.searchsorted(edges, data['Close'].to_numpy(dtype=float), side='right') - 1, 0, bins - 1)
+        contributions = np.zeros((len(volume), bins))
+        contributions[np.arange(len(volume)), idx] = volume
+        return contributions
+
+    # Spread each bar's volume uniformly over its High-Low range: the share below an edge is
+    # clip((edge - low) / (high - low), 0, 1), so a bin receives the difference between its two edges
+    low = data['Low'].to_numpy(dtype=float)[:, None]
+    high = data['High'].to_numpy(dtype=float)[:, None]
+    span = high - low
+    flat = span[:, 0] <= 0
+    span[flat] = 1.0
+    below = np.clip((edges[None, :] - low) / span, 0.0, 1.0)
+    contributions = np.diff(below, axis=1) * volume[:, None]
+
+    if flat.any():
+        # Bars with High == Low have no range to spread over; put them in the bin holding that price
+        idx = np.clip(np.searchsorted(edges, low[flat, 0], side='right') - 1, 0, bins - 1)
+        contributions[flat] = 0.0
+        contributions[np.nonzero(flat)[0], idx] = volume[flat]
+    return contributions
+
+
+def value_area(profile, poc_index, share=0.7):
+    # Start at the POC and keep adding whichever neighbouring bin (above or below) holds more volume
+    target = profile.sum() * share
+    low = high = poc_index
+    total = profile[poc_index]
+    while total < target and (low > 0 or high < len(profile) - 1):
+        below = profile[low - 1] if low > 0 else -1.0
+        above = profile[high + 1] if high < len(profile) - 1 else -1.0
+        if above >= below:
+            high += 1
+            total += above
+        else:
+            low -= 1
+            total += below
+    return low, high
+
+
+def _summarise(profile, centers, bin_size, share):
+    poc_index = int(np.argmax(profile))
+    va_low, va_high = value_area(profile, poc_index, share)
+    return (pd.Series(profile, index=centers), list(centers), bin_size,
+            centers[poc_index], centers[va_low], centers[va_high])
+
+
+def volume_profiles(data, windows, bins=40, distribute=False, share=0.7):
+    """Profiles for several lookback windows (in bars) in one pass over a shared price grid.
+
+    Returns {window: (volume_profile, bin_centers, bin_size, poc_price, value_area_low, value_area_high)}.
+    """
+    windows = sorted({min(int(window), len(data)) for window in windows})
+    recent = data.iloc[-windows[-1]:]
+    if distribute:
+        edges = bin_edges(recent['Low'].to_numpy(), recent['High'].to_numpy(), bins)
+    else:
+        edges = bin_edges(recent['Close'].to_numpy(), recent['Close'].to_numpy(), bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    bin_size = edges[1] - edges[0]
+
+    # Cumulative sums from the newest bar backwards: row w-1 is the profile of the last w bars
+    cumulative = np.cumsum(bar_contributions(recent, edges, distribute)[::-1], axis=0)
+    return {window: _summarise(cumulative[window - 1], centers, bin_size, share) for window in windows}
+
+
+def volume_profile(data, bins=40, distribute=False, share=0.7):
+    return volume_profiles(data, [len(data)], bins=bins, distribute=distribute, share=share)[len(data)]
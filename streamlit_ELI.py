@@ -1,15 +1,42 @@
 import streamlit as st
-import yfinance as yf
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-import requests
-from bs4 import BeautifulSoup
-import plotly.io as pio
 import os
-from yahoofinancials import YahooFinancials
-from concurrent.futures import ThreadPoolExecutor
+from eli.lazy import lazy_import
+from eli.fundamentals import get_snapshot
+from eli.constituents import get_stock_info, index_for_ticker
+from eli.peer_index import peer_index
+from eli.peer_prices import BENCHMARKS, index_price_matrix, peer_panel, valuation_beta
+from eli.volume_profile import volume_profiles
+from eli.chart_lod import DEFAULT_MAX_BARS, date_ticks, level_of_detail
+from eli.indicators import get_ema_state, latest_emas
+from eli.dcf import dcf_fair_value_grid, sensitivity_axes
+from eli.monte_carlo import default_dcf_specs, default_excess_return_specs, simulate_fair_value
+from eli.screener import load_table, ranking, run_screener
+from eli.rerun_graph import RerunGraph
+from eli.tracing import export, span, start_exporter, summarize, traced, tracer
+from eli.backtest import backtest_eli
+from eli.path_simulation import path_model, simulate_eli
+from eli.barrier import eli_surface
+from eli.portfolio import latest_closes, load_book, refresh_book
+from eli.live import LiveSession, Recorder, ReplaySource, YahooIntradaySource, patch_chart
+from eli.core import (get_stock_data, invalidate_ticker, format_ticker, calculate_price_levels, get_financial_metrics,
+                      get_risk_free_rate, get_financial_data, calculate_fcf_growth_rate, fair_value_for, get_analyst_data)
+
+# Plotly (and yfinance inside eli) only load when the first chart or fetch needs them
+go = lazy_import("plotly.graph_objects")
+
+# Sections wrapped in a fragment rerun on their own when only their widgets change (Streamlit >= 1.33)
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# Live mode polls on a timer; without run_every support (Streamlit < 1.37) it updates on each interaction
+LIVE_REFRESH_SECONDS = 5
+live_fragment = st.fragment(run_every=LIVE_REFRESH_SECONDS) if hasattr(st, "fragment") else (lambda func: func)
+
+def show_chart(fig, **kwargs):
+    # Plotly's JSON serialisation happens inside st.plotly_chart, so the span covers it
+    with span("plotly_chart"):
+        st.plotly_chart(fig, **kwargs)
 
 # Set page to wide mode
 st.set_page_config(layout="wide")
@@ -22,111 +49,83 @@ st.warning("""
 """)
 
 
-def get_stock_data(ticker, period="1y"):
-    stock = yf.Ticker(ticker)
-    data = stock.history(period=period)
-    data = data.dropna()
-    return data
-
-def format_ticker(ticker):
-    if ticker.isdigit():
-        return f"{int(ticker):04d}.HK"
-    return ticker
-
-def calculate_price_levels(current_price, strike_pct, airbag_pct, knockout_pct):
-    strike_price = current_price * (strike_pct / 100) if strike_pct != 0 else 0
-    airbag_price = current_price * (airbag_pct / 100) if airbag_pct != 0 else 0
-    knockout_price = current_price * (knockout_pct / 100) if knockout_pct != 0 else 0
-    return strike_price, airbag_price, knockout_price
-
-def calculate_ema(data, period):
-    return data['Close'].ewm(span=period, adjust=False).mean()
-
-def calculate_volume_profile(data, bins=40):
-    price_range = data['Close'].max() - data['Close'].min()
-    bin_size = price_range / bins
-    price_bins = pd.cut(data['Close'], bins=bins)
-    volume_profile = data.groupby(price_bins)['Volume'].sum()
-    bin_centers = [(i.left + i.right) / 2 for i in volume_profile.index]
-    
-    # Calculate POC
-    poc_price = bin_centers[volume_profile.argmax()]
-    
-    # Calculate Value Area (70% of volume)
-    total_volume = volume_profile.sum()
-    target_volume = total_volume * 0.7
-    cumulative_volume = 0
-    value_area_low = value_area_high = poc_price
-    
-    for price, volume in zip(bin_centers, volume_profile):
-        cumulative_volume += volume
-        if cumulative_volume <= target_volume / 2:
-            value_area_low = price
-        if cumulative_volume >= total_volume - target_volume / 2:
-            value_area_high = price
-            break
-    
-    return volume_profile, bin_centers, bin_size, poc_price, value_area_low, value_area_high
-
-def plot_stock_chart(data, ticker, strike_price, airbag_price, knockout_price, strike_name, knockout_name):
+@traced()
+def plot_stock_chart(data, ticker, strike_price, airbag_price, knockout_price, strike_name, knockout_name,
+                     profile_windows=None, distribute_volume=False, emas=None, max_bars=DEFAULT_MAX_BARS, lod_mode='auto'):
     fig = go.Figure()
 
-    # Candlestick chart with custom colors
-    fig.add_trace(go.Candlestick(
-        x=data.index,
-        open=data['Open'],
-        high=data['High'],
-        low=data['Low'],
-        close=data['Close'],
-        name='Price',
-        increasing_line_color='dodgerblue',  # Bullish bars in Dodge Blue
-        decreasing_line_color='red'  # Bearish bars in red
-    ))
-
-    # Calculate EMAs
-    ema_20 = calculate_ema(data, 20)
-    ema_50 = calculate_ema(data, 50)
-    ema_200 = calculate_ema(data, 200)
+    # The x axis is the trading-day ordinal, so weekends and holidays leave no gaps without rangebreaks.
+    # Long histories are aggregated (or LTTB-downsampled to a WebGL line) before they reach the browser.
+    kind, price = level_of_detail(data, max_bars, lod_mode)
+    hover_dates = price.index.strftime('%Y-%m-%d')
+    if kind == 'candles':
+        # Candlestick chart with custom colors
+        fig.add_trace(go.Candlestick(
+            x=price['x'],
+            open=price['Open'],
+            high=price['High'],
+            low=price['Low'],
+            close=price['Close'],
+            text=hover_dates,
+            name='Price',
+            increasing_line_color='dodgerblue',  # Bullish bars in Dodge Blue
+            decreasing_line_color='red'  # Bearish bars in red
+        ))
+    else:
+        fig.add_trace(go.Scattergl(
+            x=price['x'],
+            y=price['Close'],
+            text=hover_dates,
+            mode='lines',
+            name='Price',
+            line=dict(color='dodgerblue', width=1.5),
+            hovertemplate='%{text}<br>Close: %{y:.2f}<extra></extra>'
+        ))
+
+    # Latest EMAs: from the persisted indicator state when given, otherwise one pass over the data
+    if emas is None:
+        emas = latest_emas(data['Close'], (20, 50, 200))
+    ema_20, ema_50, ema_200 = emas[20], emas[50], emas[200]
 
     # Calculate the position for price annotations
-    first_date = data.index[0]
-    last_date = data.index[-1]
-    annotation_x = last_date + pd.Timedelta(days=2)  # 2 days after the last candle
-    mid_date = first_date + (last_date - first_date) / 2  # Middle of the date range
+    first_x = 0
+    last_x = len(data) - 1
+    annotation_x = last_x + max(2, len(data) // 100)  # A couple of trading days after the last candle
+    mid_x = last_x / 2  # Middle of the date range
 
     # Add price level lines with annotations on the right (only if not zero)
     if strike_price != 0:
-        fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=strike_price, y1=strike_price,
+        fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=strike_price, y1=strike_price,
                       line=dict(color="blue", width=2, dash="dash"))
         fig.add_annotation(x=annotation_x, y=strike_price, text=f"{strike_name}: {strike_price:.2f}",
                            showarrow=False, xanchor="left", font=dict(size=14, color="blue"))
 
     if airbag_price != 0:
-        fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=airbag_price, y1=airbag_price,
+        fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=airbag_price, y1=airbag_price,
                       line=dict(color="green", width=2, dash="dash"))
         fig.add_annotation(x=annotation_x, y=airbag_price, text=f"Airbag Price: {airbag_price:.2f}",
                            showarrow=False, xanchor="left", font=dict(size=14, color="green"))
 
     if knockout_price != 0:
-        fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=knockout_price, y1=knockout_price,
+        fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=knockout_price, y1=knockout_price,
                       line=dict(color="orange", width=2, dash="dash"))
         fig.add_annotation(x=annotation_x, y=knockout_price, text=f"{knockout_name}: {knockout_price:.2f}",
                            showarrow=False, xanchor="left", font=dict(size=14, color="orange"))
 
     # Add EMA lines
-    fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=ema_20.iloc[-1], y1=ema_20.iloc[-1],
+    fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=ema_20, y1=ema_20,
                   line=dict(color="gray", width=1, dash="dash"))
-    fig.add_annotation(x=annotation_x, y=ema_20.iloc[-1], text=f"20 EMA: {ema_20.iloc[-1]:.2f}",
+    fig.add_annotation(x=annotation_x, y=ema_20, text=f"20 EMA: {ema_20:.2f}",
                        showarrow=False, xanchor="left", font=dict(size=12, color="gray"))
 
-    fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=ema_50.iloc[-1], y1=ema_50.iloc[-1],
+    fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=ema_50, y1=ema_50,
                   line=dict(color="gray", width=2, dash="dash"))
-    fig.add_annotation(x=annotation_x, y=ema_50.iloc[-1], text=f"50 EMA: {ema_50.iloc[-1]:.2f}",
+    fig.add_annotation(x=annotation_x, y=ema_50, text=f"50 EMA: {ema_50:.2f}",
                        showarrow=False, xanchor="left", font=dict(size=12, color="gray"))
 
-    fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=ema_200.iloc[-1], y1=ema_200.iloc[-1],
+    fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=ema_200, y1=ema_200,
                   line=dict(color="gray", width=3, dash="dash"))
-    fig.add_annotation(x=annotation_x, y=ema_200.iloc[-1], text=f"200 EMA: {ema_200.iloc[-1]:.2f}",
+    fig.add_annotation(x=annotation_x, y=ema_200, text=f"200 EMA: {ema_200:.2f}",
                        showarrow=False, xanchor="left", font=dict(size=12, color="gray"))
 
     # Add current price annotation
@@ -134,11 +133,13 @@ def plot_stock_chart(data, ticker, strike_price, airbag_price, knockout_price, s
     fig.add_annotation(x=annotation_x, y=current_price, text=f"Current Price: {current_price:.2f}",
                        showarrow=False, xanchor="left", font=dict(size=14, color="black"))
 
-    # Calculate and add volume profile
-    volume_profile, bin_centers, bin_size, poc_price, value_area_low, value_area_high = calculate_volume_profile(data)
-    max_volume = volume_profile.max()
+    # Calculate and add volume profiles (all windows share one price grid and are computed in one pass)
+    profiles = volume_profiles(data, profile_windows or [len(data)], distribute=distribute_volume)
+    primary_window = max(profiles)
+    profile, bin_centers, bin_size, poc_price, value_area_low, value_area_high = profiles[primary_window]
+    max_volume = profile.max()
     fig.add_trace(go.Bar(
-        x=volume_profile.values,
+        x=profile.values,
         y=bin_centers,
         orientation='h',
         name='Volume Profile',
@@ -147,22 +148,39 @@ def plot_stock_chart(data, ticker, strike_price, airbag_price, knockout_price, s
         xaxis='x2'
     ))
 
+    # Shorter windows are overlaid in a darker shade with their own POC
+    for window in sorted(profiles, reverse=True)[1:]:
+        window_profile, _, _, window_poc, _, _ = profiles[window]
+        fig.add_trace(go.Bar(
+            x=window_profile.values,
+            y=bin_centers,
+            orientation='h',
+            name=f'Volume Profile ({window} bars)',
+            marker_color='rgba(120, 120, 120, 0.4)',
+            width=bin_size,
+            xaxis='x2'
+        ))
+        fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=window_poc, y1=window_poc,
+                      line=dict(color="salmon", width=2, dash="dot"))
+        fig.add_annotation(x=annotation_x, y=window_poc, text=f"POC {window}d: {window_poc:.2f}",
+                           showarrow=False, xanchor="left", font=dict(size=12, color="salmon"))
+
     # Add POC line (red)
-    fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=poc_price, y1=poc_price,
+    fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=poc_price, y1=poc_price,
                   line=dict(color="red", width=4))
     fig.add_annotation(x=annotation_x, y=poc_price, text=f"POC: {poc_price:.2f}",
                        showarrow=False, xanchor="left", font=dict(size=12, color="red"))
 
     # Add Value Area lines (purple) with labels above and below the lines
-    fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=value_area_low, y1=value_area_low,
+    fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=value_area_low, y1=value_area_low,
                   line=dict(color="purple", width=2))
-    fig.add_annotation(x=mid_date, y=value_area_low, text=f"Value at Low: {value_area_low:.2f}",
+    fig.add_annotation(x=mid_x, y=value_area_low, text=f"Value at Low: {value_area_low:.2f}",
                        showarrow=False, xanchor="center", yanchor="top", font=dict(size=12, color="purple"),
                        yshift=-5)  # Shift the label 5 pixels below the line
 
-    fig.add_shape(type="line", x0=first_date, x1=annotation_x, y0=value_area_high, y1=value_area_high,
+    fig.add_shape(type="line", x0=first_x, x1=annotation_x, y0=value_area_high, y1=value_area_high,
                   line=dict(color="purple", width=2))
-    fig.add_annotation(x=mid_date, y=value_area_high, text=f"Value at High: {value_area_high:.2f}",
+    fig.add_annotation(x=mid_x, y=value_area_high, text=f"Value at High: {value_area_high:.2f}",
                        showarrow=False, xanchor="center", yanchor="bottom", font=dict(size=12, color="purple"),
                        yshift=5)  # Shift the label 5 pixels above the line
 
@@ -175,6 +193,7 @@ def plot_stock_chart(data, ticker, strike_price, airbag_price, knockout_price, s
         width=800,
         margin=dict(l=50, r=150, t=50, b=50),
         showlegend=False,
+        barmode='overlay',
         font=dict(size=14),
         xaxis2=dict(
             side='top',
@@ -185,286 +204,435 @@ def plot_stock_chart(data, ticker, strike_price, airbag_price, knockout_price, s
         ),
     )
 
-    # Set x-axis to show only trading days and extend range for annotations
+    # Label the ordinal axis with dates and extend range for annotations
+    tick_positions, tick_labels = date_ticks(data.index)
     fig.update_xaxes(
-        rangebreaks=[
-            dict(bounds=["sat", "mon"]),  # Hide weekends
-            dict(values=["2023-12-25", "2024-01-01"])  # Example: hide specific holidays
-        ],
-        range=[first_date, annotation_x]  # Extend x-axis range for annotations
+        tickmode='array',
+        tickvals=tick_positions,
+        ticktext=tick_labels,
+        range=[first_x - 1, annotation_x]
     )
 
     return fig
 
 
-def get_index_constituents(ticker):
-    if ticker.isdigit():
-        # Hong Kong stocks
-        url = "https://en.wikipedia.org/wiki/Hang_Seng_Index"
-        index_name = "Hang Seng Index"
-    else:
-        # US stocks
-        url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-        index_name = "S&P 500"
-    
-    try:
-        tables = pd.read_html(url)
-        if ticker.isdigit():
-            # Look for the table with 'Ticker' and 'Sub-index' columns
-            for df in tables:
-                if 'Ticker' in df.columns and 'Sub-index' in df.columns:
-                    constituents = df['Ticker'].tolist()
-                    # Remove 'SEHK:' prefix and format as ####.HK
-                    constituents = [f"{int(code.split(':')[1]):04d}.HK" for code in constituents]
-                    break
-            else:
-                raise ValueError("Could not find the correct table for HSI constituents")
-        else:
-            df = tables[0]  # S&P 500 constituents are in the first table
-            constituents = df['Symbol'].tolist()
-        
-        print(f"Fetched {len(constituents)} constituents for {index_name}")
-        print(f"First few constituents: {constituents[:5]}")
-        return constituents, index_name
-    except Exception as e:
-        print(f"Error fetching constituents for {index_name}: {str(e)}")
-        return [], index_name
+@traced()
+def plot_dcf_sensitivity(grid, waccs, terminal_growth_rates, high_growth_periods, current_price, selected_period):
+    # One heatmap of WACC x terminal growth; the slider swaps the high-growth period in the browser
+    grid = np.round(grid, 2)
+    selected = int(np.argmin(np.abs(high_growth_periods - selected_period)))
+    fig = go.Figure(go.Heatmap(
+        z=grid[:, :, selected],
+        x=terminal_growth_rates * 100,
+        y=waccs * 100,
+        colorscale='RdYlGn',
+        zmid=current_price,
+        colorbar=dict(title="Fair Value"),
+        hovertemplate='WACC: %{y:.2f}%<br>Terminal Growth: %{x:.2f}%<br>Fair Value: $%{z:.2f}<extra></extra>'
+    ))
 
-# Helper function to format tickers for Yahoo Finance
-def format_ticker(ticker):
-    if ticker.isdigit():
-        return f"{int(ticker):04d}.HK"
-    else:
-        return ticker.upper()
+    steps = [dict(method="restyle", args=[{"z": [grid[:, :, i]]}], label=str(period))
+             for i, period in enumerate(high_growth_periods)]
+    fig.update_layout(
+        title=f"DCF Sensitivity (green = above current price ${current_price:.2f})",
+        xaxis_title="Terminal Growth Rate (%)",
+        yaxis_title="WACC (%)",
+        height=450,
+        margin=dict(l=50, r=50, t=50, b=100),
+        sliders=[dict(active=selected, steps=steps, currentvalue=dict(prefix="High Growth Period (years): "),
+                      pad=dict(t=50))],
+    )
+    return fig
 
-def get_stock_info(symbol):
-    try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
-        return {
-            'symbol': symbol,
-            'industry': info.get('industry', 'Unknown'),
-            'pe': info.get('trailingPE', None),
-            'roe': info.get('returnOnEquity', None)
-        }
-    except Exception as e:
-        print(f"Error fetching data for {symbol}: {str(e)}")
-        return {
-            'symbol': symbol,
-            'industry': 'Unknown',
-            'pe': None,
-            'roe': None
-        }
-
-def calculate_industry_averages(stocks_data, target_industry):
-    industry_stocks = [stock for stock in stocks_data if stock['industry'] == target_industry]
-    
-    valid_pe = [stock['pe'] for stock in industry_stocks if stock['pe'] is not None and stock['pe'] > 0]
-    valid_roe = [stock['roe'] for stock in industry_stocks if stock['roe'] is not None and stock['roe'] > 0]
-    
-    avg_pe = np.mean(valid_pe) if valid_pe else None
-    avg_roe = np.mean(valid_roe) if valid_roe else None
-    
-    min_pe = min(valid_pe) if valid_pe else None
-    max_pe = max(valid_pe) if valid_pe else None
-    min_roe = min(valid_roe) if valid_roe else None
-    max_roe = max(valid_roe) if valid_roe else None
-    
-    return avg_pe, avg_roe, len(industry_stocks), min_pe, max_pe, min_roe, max_roe
-
-def get_financial_metrics(ticker):
-    stock = yf.Ticker(ticker)
-    info = stock.info
-    
-    metrics = {
-        "Sector": info.get("sector", "N/A"),
-        "Industry": info.get("industry", "N/A"),
-        "Market Cap": info.get("marketCap", "N/A"),
-        "Outstanding Shares": info.get("sharesOutstanding", "N/A"),       
-        "Historical P/E": info.get("trailingPE", "N/A"),
-        "Forward P/E": info.get("forwardPE", "N/A"),
-        "PEG Ratio (5yr expected)": info.get("pegRatio", "N/A"),
-        "Historical Dividend(%)": info.get("trailingAnnualDividendYield", "N/A")*100,
-        "Price/Book": info.get("priceToBook", "N/A"),
-        "Net Income": info.get("netIncomeToCommon", "N/A"),
-        "Revenue": info.get("totalRevenue", "N/A"),
-        "Profit Margin": info.get("profitMargins", "N/A"),
-        "ROE": info.get("returnOnEquity", "N/A"),
-    }
-    
-    # Format large numbers
-    for key in ["Market Cap", "Net Income", "Revenue", "Outstanding Shares"]:
-        if isinstance(metrics[key], (int, float)):
-            if abs(metrics[key]) >= 1e12:
-                metrics[key] = f"{metrics[key]/1e12:.2f}T"
-            elif abs(metrics[key]) >= 1e9:
-                metrics[key] = f"{metrics[key]/1e9:.2f}B"
-            elif abs(metrics[key]) >= 1e6:
-                metrics[key] = f"{metrics[key]/1e6:.2f}M"
-    
-    # Format percentages
-    for key in ["Profit Margin", "ROE"]:
-        if isinstance(metrics[key], float):
-            metrics[key] = f"{metrics[key]:.2%}"
-    
-    # Round floating point numbers
-    for key, value in metrics.items():
-        if isinstance(value, float):
-            metrics[key] = round(value, 2)
-    
-    return metrics
-# Helper functions for DCF model
-
-def get_risk_free_rate():
-    try:
-        treasury_ticker = "^TNX"  # 10-year Treasury Yield
-        treasury_data = yf.Ticker(treasury_ticker).history(period="1d")
-        return treasury_data['Close'].iloc[-1] / 100  # Convert to decimal
-    except:
-        return 0.035  # Default to 3.5% if unable to fetch
-    
-
-def get_financial_data(ticker):
-    stock = yf.Ticker(ticker)
-    financials = {}
-    
-    # Balance sheet data
-    balance_sheet = stock.balance_sheet
-    financials['total_debt'] = balance_sheet.loc['Total Debt'].iloc[0] if 'Total Debt' in balance_sheet.index else 0
-    financials['cash'] = balance_sheet.loc['Cash Financial'].iloc[0] if 'Cash Financial' in balance_sheet.index else 0
-    financials['cash_equivalents'] = balance_sheet.loc['Cash Equivalents'].iloc[0] if 'Cash Equivalents' in balance_sheet.index else 0
-    financials['cash_and_cash_equivalents'] = balance_sheet.loc['Cash Cash Equivalents And Short Term Investments'].iloc[0] if 'Cash Cash Equivalents And Short Term Investments' in balance_sheet.index else 0
-    #financials['cash_and_cash_equivalents'] = financials['cash'] + financials['cash_equivalents']
-    financials['total_equity'] = balance_sheet.loc['Common Stock Equity'].iloc[0] if 'Common Stock Equity' in balance_sheet.index else 0
-    financials['net_debt'] = balance_sheet.loc['Net Debt'].iloc[0] if 'Net Debt' in balance_sheet.index else 0
-    financials['share_issued'] = yf.Ticker(ticker).info.get("sharesOutstanding", "N/A")#balance_sheet.loc['Share Issued'].iloc[0] if 'Share Issued' in balance_sheet.index else 0
-    
-    # Income statement data
-    income_stmt = stock.financials
-    financials['interest_expense'] = abs(income_stmt.loc['Interest Expense'].iloc[0]) if 'Interest Expense' in income_stmt.index else 0
-    financials['income_tax'] = income_stmt.loc['Tax Provision'].iloc[0] if 'Tax Provision' in income_stmt.index else 0
-    financials['net_income'] = income_stmt.loc['Net Income'].iloc[0] if 'Net Income' in income_stmt.index else 0
-    financials['pre_tax_income'] = income_stmt.loc['Pretax Income'].iloc[0] if 'Pretax Income' in income_stmt.index else (financials['net_income'] + financials['income_tax'])
-    
-    # Cash flow statement data
-    cash_flow = stock.cashflow
-    if 'Free Cash Flow' in cash_flow.index:
-        financials['fcf_latest'] = cash_flow.loc['Free Cash Flow'].iloc[0]
-        financials['fcf_1years_ago'] = cash_flow.loc['Free Cash Flow'].iloc[1]
-        financials['fcf_2years_ago'] = cash_flow.loc['Free Cash Flow'].iloc[2]
-        financials['fcf_3years_ago'] = cash_flow.loc['Free Cash Flow'].iloc[3] if len(cash_flow.columns) > 3 else None
-    else:
-        # If Free Cash Flow is not available, calculate it
-        operating_cash_flow = cash_flow.loc['Operating Cash Flow'].iloc[0] if 'Operating Cash Flow' in cash_flow.index else 0
-        capital_expenditures = abs(cash_flow.loc['Capital Expenditure'].iloc[0]) if 'Capital Expenditure' in cash_flow.index else 0
-        financials['fcf_latest'] = operating_cash_flow - capital_expenditures
-        financials['fcf_3years_ago'] = None  # We don't have enough data to calculate this
-
-    # Additional info
-    financials['shares_outstanding'] = stock.info.get('sharesOutstanding')
-    financials['market_cap'] = stock.info.get('marketCap')
-    
-    return financials
-    
-def calculate_wacc(financials, risk_free_rate, market_risk_premium, beta):
-    # Cost of Equity
-    cost_of_equity = risk_free_rate + beta * market_risk_premium/100
-    
-    # Cost of Debt
-    if financials['total_debt'] != 0 and financials['interest_expense'] != 0:
-        cost_of_debt = financials['interest_expense'] / financials['total_debt']
-    else:
-        cost_of_debt = risk_free_rate
-    
-    # Tax Rate
-    pre_tax_income = financials.get('pre_tax_income', financials['net_income'] + financials['income_tax'])
-    if pre_tax_income != 0:
-        tax_rate = financials['income_tax'] / pre_tax_income
-    else:
-        tax_rate = 0.30  # Assume a default tax rate of 30%
-    
-    # Weights
-    total_capital = financials['total_debt'] + financials['total_equity']
-    weight_of_debt = financials['total_debt'] / total_capital
-    weight_of_equity = financials['total_equity'] / total_capital
-    
-    # WACC
-    wacc = (weight_of_equity * cost_of_equity) + (weight_of_debt * cost_of_debt * (1 - tax_rate))
-    
-    return wacc
-
-def calculate_fcf_growth_rate(financials):
-    fcf_latest = financials['fcf_latest']
-    fcf_1year_ago = financials['fcf_1years_ago']
-    fcf_2years_ago = financials['fcf_2years_ago']
-    fcf_3years_ago = financials['fcf_3years_ago']
-
-    if fcf_latest <= 0 or all(fcf <= 0 for fcf in [fcf_1year_ago, fcf_2years_ago, fcf_3years_ago] if fcf is not None):
-        return None, "Growth rate cannot be estimated due to negative FCF"
-
-    if fcf_3years_ago is not None and fcf_3years_ago > 0:
-        return (fcf_latest / fcf_3years_ago) ** (1/3) - 1, None
-    elif fcf_2years_ago is not None and fcf_2years_ago > 0:
-        return (fcf_latest / fcf_2years_ago) ** (1/2) - 1, None
-    elif fcf_1year_ago is not None and fcf_1year_ago > 0:
-        return (fcf_latest / fcf_1year_ago) - 1, None
-    else:
-        return None, "Growth rate cannot be estimated due to negative FCF"
+@traced()
+def plot_eli_surface(surface, strike_pcts, knockout_pcts, tenors, selected_tenor, strike_pct, knockout_pct):
+    # Indicative yield over strike x knock-out; the slider swaps the tenor in the browser like the DCF heatmap
+    yields = np.round(surface['yield'] * 100, 2)
+    selected = int(np.argmin(np.abs(np.asarray(tenors) - selected_tenor)))
+    fig = go.Figure(go.Heatmap(
+        z=yields[:, :, selected],
+        x=knockout_pcts,
+        y=strike_pcts,
+        colorscale='Viridis',
+        colorbar=dict(title="Yield p.a. (%)"),
+        hovertemplate='Strike: %{y:.1f}%<br>Knock-out: %{x:.1f}%<br>Yield: %{z:.2f}% p.a.<extra></extra>'
+    ))
+    if strike_pct and knockout_pct:
+        fig.add_trace(go.Scatter(x=[knockout_pct], y=[strike_pct], mode='markers', name='Current Levels',
+                                 marker=dict(color='red', size=12, symbol='x'), hoverinfo='skip'))
+
+    steps = [dict(method="restyle", args=[{"z": [yields[:, :, i]]}, [0]], label=str(tenor))
+             for i, tenor in enumerate(tenors)]
+    fig.update_layout(
+        title="Indicative ELI Yield (short up-and-out put, daily knock-out checks)",
+        xaxis_title="Knock-out (% of spot)",
+        yaxis_title="Strike (% of spot)",
+        height=450,
+        showlegend=False,
+        margin=dict(l=50, r=50, t=50, b=100),
+        sliders=[dict(active=selected, steps=steps, currentvalue=dict(prefix="Tenor (trading days): "),
+                      pad=dict(t=50))],
+    )
+    return fig
 
+@traced()
+def plot_fair_value_distribution(result, current_price, fair_value=None):
+    counts, edges = result['histogram']
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = go.Figure(go.Bar(x=centers, y=counts, width=edges[1] - edges[0], marker_color='rgba(100, 149, 237, 0.7)',
+                           hovertemplate='Fair Value: $%{x:.2f}<br>Paths: %{y}<extra></extra>'))
+
+    fig.add_vline(x=current_price, line=dict(color="black", width=2, dash="dash"),
+                  annotation_text=f"Current Price: {current_price:.2f}", annotation_position="top")
+    if fair_value is not None:
+        fig.add_vline(x=fair_value, line=dict(color="green", width=2),
+                      annotation_text=f"Point Estimate: {fair_value:.2f}", annotation_position="bottom")
+    for p in (5, 50, 95):
+        value = result['percentiles'][p]
+        fig.add_vline(x=value, line=dict(color="gray", width=1, dash="dot"),
+                      annotation_text=f"P{p}: {value:.2f}", annotation_position="top left")
 
-def calculate_excess_return_fair_value(financials, cost_of_equity, terminal_growth_rate):
-    try:
-        book_value = financials['total_equity']
-        net_income = financials['net_income']
-        shares_outstanding = financials['share_issued']
+    fig.update_layout(
+        title="Monte Carlo Fair Value Distribution",
+        xaxis_title="Fair Value ($)",
+        yaxis_title="Number of Paths",
+        height=400,
+        margin=dict(l=50, r=50, t=60, b=50),
+        showlegend=False,
+    )
+    return fig
+
+# Simulation inputs and button live in their own fragment, so tweaking them doesn't rerun the page
+@fragment
+@traced()
+def monte_carlo_section(financials, sector, fcf_growth_rate, fcf_error, wacc, cost_of_equity, terminal_growth_rate,
+                        high_growth_period, current_price, fair_value, error_message):
+    with st.expander("Monte Carlo Fair Value Distribution"):
+        mc_col1, mc_col2, mc_col3, mc_col4 = st.columns(4)
+        paths = mc_col1.selectbox("Paths:", [100_000, 1_000_000, 5_000_000], index=1)
+        terminal_sd = mc_col2.number_input("Terminal Growth Std Dev (%):", value=0.5, step=0.1) / 100
+        if sector == 'Financial Services':
+            rate_sd = mc_col3.number_input("Cost of Equity Std Dev (%):", value=1.0, step=0.1) / 100
+            specs = default_excess_return_specs(cost_of_equity, terminal_growth_rate/100, rate_sd, terminal_sd)
+            model = 'excess_return'
+        else:
+            rate_sd = mc_col3.number_input("WACC Std Dev (%):", value=1.0, step=0.1) / 100
+            growth_sd = mc_col4.number_input("FCF Growth Std Dev (%):", value=5.0, step=0.5) / 100
+            specs = default_dcf_specs(fcf_growth_rate, wacc, terminal_growth_rate/100, growth_sd, rate_sd, terminal_sd)
+            model = 'dcf'
+
+        if model == 'dcf' and fcf_growth_rate is None:
+            st.markdown(f"<p>{fcf_error}</p>", unsafe_allow_html=True)
+        elif st.button("Run Simulation"):
+            with st.spinner(f"Simulating {paths:,} paths..."):
+                mc_result, mc_error = simulate_fair_value(model, financials, specs, paths=paths,
+                                                          high_growth_period=high_growth_period,
+                                                          current_price=current_price,
+                                                          workers=(os.cpu_count() or 1) if paths > 1_000_000 else 1)
+            if mc_error:
+                st.markdown(f"<p><b>Simulation:</b> {mc_error}</p>", unsafe_allow_html=True)
+            else:
+                show_chart(plot_fair_value_distribution(mc_result, current_price,
+                                                             None if error_message else fair_value),
+                                use_container_width=True)
+                percentiles = mc_result['percentiles']
+                st.markdown(f"<p><b>Median Fair Value:</b> ${percentiles[50]:.2f} "
+                            f"(90% range ${percentiles[5]:.2f} - ${percentiles[95]:.2f})</p>", unsafe_allow_html=True)
+                st.markdown(f"<p><b>Probability Fair Value above Current Price:</b> {mc_result['prob_above_price']:.1%}</p>", unsafe_allow_html=True)
+                st.markdown(f"<p><b>Valid Paths:</b> {mc_result['valid_paths']:,} of {mc_result['paths']:,}</p>", unsafe_allow_html=True)
+
+@fragment
+@traced()
+def pricing_surface_section(data, strike_pct, knockout_pct, risk_free_rate):
+    with st.expander("Indicative Pricing Surface"):
+        model = path_model(data['Close'])
+        if model is None:
+            st.markdown("<p>Not enough history to estimate volatility.</p>", unsafe_allow_html=True)
+            return
+        ps_col1, ps_col2, ps_col3 = st.columns(3)
+        sigma = ps_col1.number_input("Volatility (% p.a.):", value=round(model['sigma'] * 252 ** 0.5 * 100, 1),
+                                     step=1.0, min_value=1.0) / 100
+        dividend_yield = ps_col2.number_input("Dividend Yield (%):", value=0.0, step=0.25) / 100
+        tenor = ps_col3.selectbox("Tenor (trading days):", [21, 42, 63, 126, 189, 252], index=2, key="surface_tenor")
+
+        # The whole grid is one closed-form evaluation; it is cheap enough to redo on every change
+        strike_pcts, knockout_pcts, tenors = np.arange(70, 101, 1.0), np.arange(100, 131, 1.0), [21, 42, 63, 126, 189, 252]
+        surface = eli_surface(strike_pcts, knockout_pcts, tenors, sigma, risk_free_rate, dividend_yield)
+        show_chart(plot_eli_surface(surface, strike_pcts, knockout_pcts, tenors, tenor, strike_pct, knockout_pct),
+                        use_container_width=True)
+        if strike_pct:
+            current = eli_surface([strike_pct], [knockout_pct], [tenor], sigma, risk_free_rate, dividend_yield)
+            st.markdown(f"<p><b>Current Levels:</b> option premium {current['premium'].item():.2%} of notional, "
+                        f"indicative yield {current['yield'].item():.2%} p.a.</p>", unsafe_allow_html=True)
+
+@fragment
+@traced()
+def backtest_section(ticker, strike_pct, airbag_pct, knockout_pct, strike_name, knockout_name):
+    with st.expander("Historical Backtest of the Price Levels"):
+        bt_col1, bt_col2, bt_col3 = st.columns(3)
+        tenor = bt_col1.number_input("Tenor (trading days):", value=63, step=1, min_value=5)
+        coupon = bt_col2.number_input("Coupon (% p.a.):", value=0.0, step=0.5) / 100
+        history_years = bt_col3.selectbox("History:", ["5y", "10y", "max"], index=1)
+
+        if knockout_pct == 0 and strike_pct == 0:
+            st.markdown(f"<p>Set a {knockout_name} % or {strike_name} % to backtest.</p>", unsafe_allow_html=True)
+            return
+        history = get_stock_data(ticker, period=history_years)
+        bt_result, bt_error = backtest_eli(history['Close'], strike_pct, airbag_pct, knockout_pct, tenor, coupon)
+        if bt_error:
+            st.markdown(f"<p><b>Backtest:</b> {bt_error}</p>", unsafe_allow_html=True)
+            return
+
+        st.markdown(f"<p>Every start date since {history.index[0]:%Y-%m-%d} ({bt_result['windows']:,} windows of {tenor} days)</p>",
+                    unsafe_allow_html=True)
+        cols = st.columns(4)
+        cols[0].metric(f"{knockout_name} Rate", f"{bt_result['knockout_rate']:.1%}")
+        cols[1].metric(f"{strike_name} Delivery Rate", f"{bt_result['strike_hit_rate']:.1%}")
+        avg_days = bt_result['avg_days_to_knockout']
+        cols[2].metric("Avg Days to Knock-out", "-" if np.isnan(avg_days) else f"{avg_days:.1f}")
+        cols[3].metric("Mean Return", f"{bt_result['mean_return']:.2%}")
+
+        fig_returns = go.Figure(go.Histogram(x=bt_result['returns'] * 100, nbinsx=60, marker_color='dodgerblue'))
+        fig_returns.update_layout(
+            title="Return per Start Date",
+            xaxis_title="Return (%)",
+            yaxis_title="Start Dates",
+            height=300,
+            margin=dict(l=0, r=0, t=40, b=0),
+        )
+        show_chart(fig_returns, use_container_width=True)
+        st.markdown(f"<p>5th percentile {bt_result['p5_return']:.2%}, median {bt_result['p50_return']:.2%}, "
+                    f"worst {bt_result['worst_return']:.2%}</p>", unsafe_allow_html=True)
+
+@fragment
+@traced()
+def path_simulation_section(ticker, strike_pct, airbag_pct, knockout_pct, strike_name, knockout_name):
+    with st.expander("Forward Simulation of the Price Levels"):
+        sim_col1, sim_col2, sim_col3, sim_col4 = st.columns(4)
+        tenor = sim_col1.number_input("Tenor (trading days):", value=63, step=1, min_value=5, key="sim_tenor")
+        coupon = sim_col2.number_input("Coupon (% p.a.):", value=0.0, step=0.5, key="sim_coupon") / 100
+        method = sim_col3.selectbox("Path Model:", ["gbm", "bootstrap"],
+                                    format_func=lambda m: {"gbm": "GBM (realised vol)", "bootstrap": "Block bootstrap"}[m])
+        paths = sim_col4.selectbox("Paths:", [100_000, 500_000, 2_000_000], index=0, key="sim_paths")
+
+        if knockout_pct == 0 and strike_pct == 0:
+            st.markdown(f"<p>Set a {knockout_name} % or {strike_name} % to simulate.</p>", unsafe_allow_html=True)
+            return
+        history = get_stock_data(ticker, period="5y")
+        # Same seed every run, so only the inputs move the answer; the result is memoized per input set
+        sim_result, sim_error = RerunGraph(st.session_state).node(
+            'eli_simulation',
+            lambda **inputs: simulate_eli(history['Close'], **inputs,
+                                          workers=(os.cpu_count() or 1) if inputs['paths'] > 500_000 else 1),
+            dict(strike_pct=strike_pct, airbag_pct=airbag_pct, knockout_pct=knockout_pct, tenor=tenor, coupon=coupon,
+                 paths=paths, method=method),
+            salt=st.session_state.get('data_version'))
+        if sim_error:
+            st.markdown(f"<p><b>Simulation:</b> {sim_error}</p>", unsafe_allow_html=True)
+            return
+
+        st.markdown(f"<p>{sim_result['paths']:,} paths, realised volatility {sim_result['sigma_annual']:.1%}</p>",
+                    unsafe_allow_html=True)
+        cols = st.columns(4)
+        cols[0].metric(f"{knockout_name} Probability", f"{sim_result['knockout_prob']:.1%}")
+        cols[1].metric(f"{strike_name} Delivery Probability", f"{sim_result['strike_prob']:.1%}")
+        avg_days = sim_result['avg_days_to_knockout']
+        cols[2].metric("Avg Days to Knock-out", "-" if np.isnan(avg_days) else f"{avg_days:.1f}")
+        cols[3].metric("Expected Return", f"{sim_result['expected_return']:.2%}",
+                       help=f"Standard error {sim_result['expected_return_se']:.3%}")
+        percentiles = sim_result['percentiles']
+        st.markdown(f"<p>5th percentile {percentiles[5]:.2%}, median {percentiles[50]:.2%}, "
+                    f"95th percentile {percentiles[95]:.2%}</p>", unsafe_allow_html=True)
+
+@fragment
+@traced()
+def screener_section(ticker, risk_free_rate, market_risk_premium, terminal_growth_rate, high_growth_period):
+    screener_index = index_for_ticker(ticker)
+    with st.expander(f"Fair Value Screener - {screener_index}"):
+        if st.button("Run Screener"):
+            with st.spinner(f"Valuing {screener_index} constituents..."):
+                screener_ranking, screener_stats = run_screener(screener_index, risk_free_rate, market_risk_premium,
+                                                                terminal_growth_rate, high_growth_period)
+            st.markdown(f"<p>Valued {screener_stats['symbols']} companies in {screener_stats['elapsed_s']}s; "
+                        f"{screener_stats['refetched']} had new statements, {screener_stats['errors']} could not be valued.</p>",
+                        unsafe_allow_html=True)
+        else:
+            screener_ranking = ranking(load_table(screener_index))
+        if screener_ranking.empty:
+            st.markdown("<p>No screener results yet. Press Run Screener to value every constituent.</p>", unsafe_allow_html=True)
+        else:
+            st.dataframe(screener_ranking, use_container_width=True)
 
-        roe = net_income / book_value
-        excess_return = (roe - cost_of_equity) * book_value
-        terminal_value = excess_return * (1 + terminal_growth_rate) / (cost_of_equity - terminal_growth_rate)
-        equity_value = book_value + terminal_value
-        fair_value = equity_value / shares_outstanding
+def start_live(fig, ticker, watch_list, pcts, live_mode, replay_path, replay_speed, record_path):
+    tickers = [ticker] + [t for t in watch_list if t != ticker]
+    if live_mode == "Replay":
+        source = ReplaySource(replay_path, tickers, speed=replay_speed)
+    else:
+        source = YahooIntradaySource(tickers)
+    if record_path:
+        source = Recorder(source, record_path)
+    sessions = {}
+    for t in tickers:
+        daily = st.session_state.data if t == ticker else get_stock_data(t)
+        strike_price, airbag_price, knockout_price = calculate_price_levels(daily['Close'].iloc[-1], *pcts)
+        sessions[t] = LiveSession(t, daily, {'strike': strike_price, 'airbag': airbag_price, 'knockout': knockout_price},
+                                  ema_state=get_ema_state(t))
+    # The chart is patched in place, so work on a copy of the memoized figure
+    return {'source': source, 'sessions': sessions, 'fig': go.Figure(fig)}
+
+@live_fragment
+def live_section(fig, ticker, watch_list, pcts, live_mode, replay_path, replay_speed, record_path):
+    key = (ticker, tuple(watch_list), pcts, live_mode, replay_path, replay_speed, record_path,
+           st.session_state.get('data_version'))
+    if st.session_state.get('live_key') != key:
+        try:
+            st.session_state.live = start_live(fig, ticker, watch_list, pcts, live_mode, replay_path, replay_speed,
+                                               record_path)
+        except Exception as e:
+            st.error(f"Error starting live mode: {str(e)}")
+            show_chart(fig, use_container_width=True)
+            return
+        st.session_state.live_key = key
+    live = st.session_state.live
 
-        return fair_value, None
+    # Each rerun applies only the bars that arrived since the last poll
+    try:
+        for t, bars in live['source'].poll().items():
+            if t in live['sessions']:
+                for bar in bars:
+                    live['sessions'][t].apply(bar)
     except Exception as e:
-        return None, f"Error in excess return calculation: {str(e)}"
-
-def calculate_dcf_fair_value(financials, wacc, terminal_growth_rate, high_growth_period, current_price):
-    fcf_growth_rate, error_message = calculate_fcf_growth_rate(financials)
-    
-    if error_message:
-        return None, error_message
-    
-    fcf = financials['fcf_latest']
-    pv_fcf = 0
-    
-    # High growth period
-    for i in range(1, high_growth_period + 1):
-        fcf *= (1 + fcf_growth_rate)
-        pv_fcf += fcf / ((1 + wacc) ** i)
-    
-    # Terminal value
-    terminal_value = fcf * (1 + terminal_growth_rate) / (wacc - terminal_growth_rate)
-    pv_terminal_value = terminal_value / ((1 + wacc) ** high_growth_period)
-    
-    # Enterprise Value
-    enterprise_value = pv_fcf + pv_terminal_value
-    
-    # Equity Value
-    equity_value = enterprise_value - financials['total_debt'] + financials.get('cash_and_cash_equivalents', 0)
-    
-    # Shares outstanding
-    shares_outstanding = financials['share_issued']
-    if shares_outstanding is None:
-        if current_price <= 0:
-            return None, "Invalid current price for calculating shares outstanding"
-        shares_outstanding = equity_value / current_price
-    
-    # Fair value per share
-    fair_value = equity_value / shares_outstanding
-    
-    return fair_value, None
+        st.warning(f"Live update failed: {str(e)}")
+    session = live['sessions'][ticker]
+    show_chart(patch_chart(live['fig'], session), use_container_width=True)
+
+    status = "replay finished" if getattr(live['source'], 'finished', False) else f"updating every {LIVE_REFRESH_SECONDS}s"
+    last_bar = session.today['time'].strftime('%Y-%m-%d %H:%M') if session.today else "no intraday bars yet"
+    st.markdown(f"<p><b>Live ({live_mode}):</b> last bar {last_bar}, {status}</p>", unsafe_allow_html=True)
+    watch = pd.DataFrame([s.snapshot() for s in live['sessions'].values()])
+    st.dataframe(watch, use_container_width=True, hide_index=True)
+
+@fragment
+@traced()
+def position_book_section():
+    with st.expander("Position Book - Distance to Barriers"):
+        uploaded = st.file_uploader("Upload positions (CSV or Parquet with ticker, strike_pct, airbag_pct, knockout_pct):",
+                                    type=["csv", "parquet"])
+        if uploaded is None:
+            return
+        book, book_error = load_book(uploaded, uploaded.name)
+        if book_error:
+            st.markdown(f"<p><b>Position Book:</b> {book_error}</p>", unsafe_allow_html=True)
+            return
+        if st.button("Refresh Prices"):
+            latest_closes.invalidate()
+        try:
+            levels = refresh_book(book)
+        except Exception as e:
+            st.error(f"Error fetching prices for the position book: {str(e)}")
+            return
+
+        breaches = int(levels['breach'].sum())
+        st.markdown(f"<p>{len(levels)} positions in {levels['ticker'].nunique()} tickers; "
+                    f"<b>{breaches} breached</b>, {int(levels['status'].str.startswith('Near').sum())} near a barrier.</p>",
+                    unsafe_allow_html=True)
+        percent = st.column_config.NumberColumn(format="%.2f%%")
+        display = levels.copy()
+        for column in ('strike_distance', 'airbag_distance', 'knockout_distance', 'nearest_barrier'):
+            display[column] = display[column] * 100
+        st.dataframe(display, use_container_width=True, hide_index=True,
+                     column_config={column: percent for column in
+                                    ('strike_distance', 'airbag_distance', 'knockout_distance', 'nearest_barrier')})
+
+@fragment
+@traced()
+def peer_section(ticker, formatted_ticker):
+    index_name = index_for_ticker(ticker)
+    with st.expander(f"Peer Relative Strength - {index_name}"):
+        target_stock = peer_index.symbol(index_name, formatted_ticker) or get_stock_info(formatted_ticker)
+        peers = peer_index.industry_peers(index_name, target_stock['industry'])
+        if not peers:
+            st.markdown(f"<p>No {target_stock['industry']} peers in the {index_name} peer index.</p>", unsafe_allow_html=True)
+            return
+        pr_col1, pr_col2 = st.columns(2)
+        window = pr_col1.selectbox("Correlation Window (days):", [21, 63, 126], index=1)
+        lookback = pr_col2.selectbox("Relative Strength Lookback (days):", [21, 63, 126, 252], index=2)
+        # The whole index comes down in one request, so only on demand; it stays cached for later reruns
+        if not (st.button("Load Peer Prices") or st.session_state.get('peer_prices_index') == index_name):
+            st.markdown(f"<p>Press Load Peer Prices to download a year of closes for every {index_name} constituent.</p>",
+                        unsafe_allow_html=True)
+            return
+        st.session_state.peer_prices_index = index_name
+        try:
+            with st.spinner(f"Fetching prices for {index_name} constituents..."):
+                matrix = index_price_matrix(index_name, extra=(formatted_ticker,))
+        except Exception as e:
+            st.error(f"Error fetching peer prices: {str(e)}")
+            return
+        panel, panel_error = peer_panel(matrix, formatted_ticker, peers, BENCHMARKS.get(index_name), window, lookback)
+        if panel_error:
+            st.markdown(f"<p><b>Peer Relative Strength:</b> {panel_error}</p>", unsafe_allow_html=True)
+            return
+
+        st.markdown(f"<p>{target_stock['industry']}: {len(panel['peers'])} peers with prices, "
+                    f"benchmark {BENCHMARKS.get(index_name, 'N/A')}</p>", unsafe_allow_html=True)
+        cols = st.columns(3)
+        cols[0].metric("Realised Beta", "-" if panel.get('beta') is None else f"{panel['beta']:.2f}")
+        median_correlation = panel.get('median_correlation')
+        cols[1].metric("Median Peer Correlation", "-" if median_correlation is None else f"{median_correlation:.2f}")
+        cols[2].metric(f"Relative Strength Rank ({lookback}d)",
+                       "-" if panel['rs_rank'] is None else f"{panel['rs_rank']} of {len(panel['table'])}")
+
+        fig_peers = go.Figure()
+        if 'rolling_beta' in panel:
+            fig_peers.add_trace(go.Scatter(x=panel['rolling_beta'].index, y=panel['rolling_beta'], mode='lines',
+                                           name=f"Beta ({window}d)", line=dict(color='dodgerblue')))
+        if 'rolling_correlation' in panel:
+            fig_peers.add_trace(go.Scatter(x=panel['rolling_correlation'].index, y=panel['rolling_correlation'], mode='lines',
+                                           name=f"Median Peer Correlation ({window}d)", line=dict(color='orange')))
+        fig_peers.update_layout(height=300, margin=dict(l=0, r=0, t=40, b=0), title="Rolling Beta and Peer Correlation")
+        show_chart(fig_peers, use_container_width=True)
+
+        display = panel['table'].copy()
+        display['return'] = display['return'] * 100
+        st.dataframe(display, use_container_width=True, hide_index=True,
+                     column_config={'return': st.column_config.NumberColumn(f"Return ({lookback}d)", format="%.2f%%")})
+
+def debug_panel(run_id, graph):
+    with st.expander("Debug - Timings, Upstream Calls and Cache Hit Rates"):
+        computed = ", ".join(f"{name} ({seconds * 1000:.0f} ms)" for name, seconds in graph.computed.items())
+        st.markdown(f"<p><b>This run:</b> recomputed {computed or 'nothing'}; reused {len(graph.reused)} nodes.</p>",
+                    unsafe_allow_html=True)
+        run_rows = summarize(tracer.run_spans(run_id))
+        if run_rows:
+            st.dataframe(pd.DataFrame(run_rows), use_container_width=True, hide_index=True)
+
+        snapshot = tracer.snapshot()
+        totals = pd.DataFrame([{'span': name, **stat} for name, stat in snapshot['spans'].items()])
+        if not totals.empty:
+            totals['avg_ms'] = totals['total_s'] / totals['count'] * 1000
+            st.markdown(f"<p><b>Since process start</b> ({snapshot['uptime_s'] / 60:.0f} min):</p>", unsafe_allow_html=True)
+            st.dataframe(totals.sort_values('total_s', ascending=False), use_container_width=True, hide_index=True)
+        counters = pd.DataFrame([{'counter': counter['name'], **counter['labels'], 'value': counter['value']}
+                                 for counter in snapshot['counters']])
+        if not counters.empty:
+            st.dataframe(counters.sort_values(['counter', 'value'], ascending=[True, False]), use_container_width=True,
+                         hide_index=True)
+
+        cache = snapshot['gauges'].get('shared_cache', {})
+        hit_rate = cache.get('hit_rate')
+        st.markdown(f"<p><b>Shared cache:</b> {cache.get('entries', 0)} entries, {cache.get('bytes', 0) / 1e6:.1f} MB, "
+                    f"hit rate {'-' if hit_rate is None else f'{hit_rate:.1%}'}, {cache.get('evictions', 0)} evictions.</p>",
+                    unsafe_allow_html=True)
+        target = os.environ.get("ELI_TRACE_EXPORT")
+        if target and st.button("Export Trace Snapshot"):
+            export(target, snapshot)
+            st.success(f"Snapshot written to {target}")
 
 def main():
+    # Spans recorded during this script run are tagged so the debug panel can show them on their own
+    run_id = tracer.start_run()
+    start_exporter()
     st.title("Stock Fundamentals with Key Levels and DCF Valuation by JC")
 
     # Create two columns for layout
@@ -479,42 +647,70 @@ def main():
         knockout_pct = st.number_input(f"{knockout_name} %:", value=0.0)
         strike_pct = st.number_input(f"{strike_name} %:", value=0.0)
         airbag_pct = st.number_input("Airbag Price %:", value=0.0)
+
+        profile_windows = st.multiselect("Volume Profile Windows (days):", [21, 63, 126, 252], default=[252])
+        distribute_volume = st.checkbox("Spread bar volume across High-Low range", value=False)
+        history_period = st.selectbox("Chart History:", ["1y", "2y", "5y", "10y", "max"], index=0)
+        chart_detail = st.selectbox("Chart Detail:", ["auto", "candles", "line"], index=0)
                
         refresh = st.button("Refresh Data")
 
+        live_mode = st.selectbox("Live Mode:", ["Off", "Yahoo 1m bars", "Replay"], index=0)
+        replay_path, replay_speed, record_path, watch_list = None, 1.0, None, []
+        if live_mode != "Off":
+            watch_input = st.text_input("Also Watch (comma separated):", value="")
+            watch_list = [format_ticker(t.strip()) for t in watch_input.split(",") if t.strip()]
+            if live_mode == "Replay":
+                replay_path = st.text_input("Recorded File (JSON lines):", value="")
+                replay_speed = st.number_input("Replay Speed (x):", value=60.0, step=10.0, min_value=0.0)
+            else:
+                record_path = st.text_input("Record to File (optional):", value="") or None
+
     try:
         formatted_ticker = format_ticker(ticker)
     except Exception as e:
         st.error(f"Error formatting ticker: {str(e)}")
         return
 
-
-    if 'formatted_ticker' not in st.session_state or ticker != st.session_state.formatted_ticker or refresh:
-        st.session_state.formatted_ticker = format_ticker(ticker)
+    # Every section below is a node with explicit inputs; a widget change only recomputes the nodes
+    # that depend on it. Fetch nodes are salted with the refresh count so Refresh Data refetches them.
+    graph = RerunGraph(st.session_state)
+    if refresh:
+        st.session_state.refresh_count = st.session_state.get('refresh_count', 0) + 1
+    refresh_count = st.session_state.get('refresh_count', 0)
+
+    if ('formatted_ticker' not in st.session_state or formatted_ticker != st.session_state.formatted_ticker
+            or history_period != st.session_state.get('history_period') or refresh):
+        st.session_state.formatted_ticker = formatted_ticker
+        st.session_state.history_period = history_period
+        st.session_state.data_version = (formatted_ticker, history_period, refresh_count)
+        if refresh:
+            invalidate_ticker(st.session_state.formatted_ticker)
         try:
-            st.session_state.data = get_stock_data(st.session_state.formatted_ticker)
+            st.session_state.data = get_stock_data(st.session_state.formatted_ticker, period=history_period, refresh=refresh)
+            # EMAs run over every cached bar and only advance by the bars that are new since last time
+            ema_state = get_ema_state(st.session_state.formatted_ticker)
+            st.session_state.emas = ema_state.latest() if ema_state is not None else None
             st.success(f"Data fetched successfully for {st.session_state.formatted_ticker}")
 
-            # New section to fetch industry data
-            constituents, index_name = get_index_constituents(ticker)
-            if constituents:
-                with st.spinner(f"Fetching data for {index_name} constituents..."):
-                    with ThreadPoolExecutor(max_workers=10) as executor:
-                        stocks_data = list(executor.map(get_stock_info, constituents))
-                
-                target_stock = get_stock_info(st.session_state.formatted_ticker)
-                if target_stock['industry'] != 'Unknown':
-                    avg_pe, avg_roe, industry_count, min_pe, max_pe, min_roe, max_roe = calculate_industry_averages(stocks_data, target_stock['industry'])
-                    st.session_state.industry_averages = {
-                        'avg_pe': avg_pe,
-                        'avg_roe': avg_roe,
-                        'industry': target_stock['industry'],
-                        'count': industry_count,
-                        'min_pe': min_pe,
-                        'max_pe': max_pe,
-                        'min_roe': min_roe,
-                        'max_roe': max_roe
-                    }
+            # Industry data comes from the precomputed peer index, refreshed in the background
+            index_name = index_for_ticker(ticker)
+            try:
+                if not peer_index.has(index_name):
+                    with st.spinner(f"Fetching data for {index_name} constituents..."):
+                        peer_index.ensure(index_name)
+            except Exception as e:
+                print(f"Error building peer index for {index_name}: {str(e)}")
+            peer_index.start_background_refresh()
+
+            if peer_index.has(index_name):
+                target_stock = peer_index.symbol(index_name, st.session_state.formatted_ticker) or get_stock_info(st.session_state.formatted_ticker)
+                industry_stats = peer_index.lookup(index_name, target_stock['industry'])
+                st.session_state.peer_standing = target_stock
+                if industry_stats is not None:
+                    st.session_state.industry_averages = industry_stats
+                elif target_stock['industry'] != 'Unknown':
+                    st.session_state.industry_averages = {'industry': target_stock['industry'], 'count': 0, 'avg_pe': None, 'avg_roe': None}
                 else:
                     st.warning(f"Unable to fetch industry information for {st.session_state.formatted_ticker}")
             else:
@@ -526,7 +722,9 @@ def main():
     if hasattr(st.session_state, 'data') and not st.session_state.data.empty:
         try:
             current_price = st.session_state.data['Close'].iloc[-1]
-            strike_price, airbag_price, knockout_price = calculate_price_levels(current_price, strike_pct, airbag_pct, knockout_pct)
+            strike_price, airbag_price, knockout_price = graph.node(
+                'price_levels', calculate_price_levels,
+                dict(current_price=current_price, strike_pct=strike_pct, airbag_pct=airbag_pct, knockout_pct=knockout_pct))
             
             with col1:
                 st.markdown("<h3>Price Levels:</h3>", unsafe_allow_html=True)
@@ -539,13 +737,15 @@ def main():
                 st.markdown("### DCF Model Inputs")
                 market_risk_premium = st.number_input("Market Risk Premium (%):", value=8.5, step=0.1)
                 terminal_growth_rate = st.number_input("Terminal Growth Rate (%):", value=3.0, step=0.1)
-                risk_free_rate = st.number_input("Risk-Free Rate (%):", value=get_risk_free_rate(), step=0.01)
+                default_risk_free_rate = graph.node('risk_free_rate', get_risk_free_rate, salt=refresh_count)
+                risk_free_rate = st.number_input("Risk-Free Rate (%):", value=default_risk_free_rate, step=0.01)
                 high_growth_period = st.number_input("High Growth Period (years):", value=5, step=1, min_value=1)
 
             with col2:
                 st.markdown("<h3>Financial Metrics & Data from Yahoo Finance:</h3>", unsafe_allow_html=True)
                 try:
-                    metrics = get_financial_metrics(st.session_state.formatted_ticker)
+                    metrics = graph.node('metrics', get_financial_metrics, dict(ticker=st.session_state.formatted_ticker),
+                                         salt=refresh_count)
                     cols = st.columns(2)
                     for i, (key, value) in enumerate(metrics.items()):
                         cols[i % 2].markdown(f"<b>{key}:</b> {value}", unsafe_allow_html=True)
@@ -553,20 +753,38 @@ def main():
                     st.error(f"Error fetching financial metrics: {str(e)}")
 
                 st.markdown("<h3>Stock Chart:</h3>", unsafe_allow_html=True)
-                fig = plot_stock_chart(st.session_state.data, st.session_state.formatted_ticker, 
-                                       strike_price, airbag_price, knockout_price,
-                                       strike_name, knockout_name)
-                st.plotly_chart(fig, use_container_width=True)               
+                fig = graph.node(
+                    'chart',
+                    lambda **levels: plot_stock_chart(st.session_state.data, st.session_state.formatted_ticker, **levels,
+                                                      emas=st.session_state.get('emas')),
+                    dict(strike_price=strike_price, airbag_price=airbag_price, knockout_price=knockout_price,
+                         strike_name=strike_name, knockout_name=knockout_name,
+                         profile_windows=tuple(profile_windows), distribute_volume=distribute_volume,
+                         lod_mode=chart_detail),
+                    salt=st.session_state.get('data_version'))
+                if live_mode == "Off" or (live_mode == "Replay" and not replay_path):
+                    show_chart(fig, use_container_width=True)               
+                else:
+                    # Intraday bars move the last candle, EMAs and barrier distances without rebuilding the chart
+                    live_section(fig, st.session_state.formatted_ticker, watch_list, (strike_pct, airbag_pct, knockout_pct),
+                                 live_mode, replay_path, replay_speed, record_path)
+
+                pricing_surface_section(st.session_state.data, strike_pct, knockout_pct, risk_free_rate)
+                backtest_section(st.session_state.formatted_ticker, strike_pct, airbag_pct, knockout_pct,
+                                 strike_name, knockout_name)
+                path_simulation_section(st.session_state.formatted_ticker, strike_pct, airbag_pct, knockout_pct,
+                                        strike_name, knockout_name)
 
                 st.markdown("<h3>Latest News:</h3>", unsafe_allow_html=True)
                 st.info(f"You can try visiting this URL directly for news: https://finance.yahoo.com/quote/{st.session_state.formatted_ticker}/news/")
                 st.markdown(f"<h3>Analyst Ratings - {ticker} :</h3>", unsafe_allow_html=True)
                 try:
-                    stock = yf.Ticker(st.session_state.formatted_ticker)
+                    recommendations_summary, price_targets = graph.node(
+                        'analyst_ratings', get_analyst_data, dict(ticker=st.session_state.formatted_ticker), salt=refresh_count)
                     
-                    if not stock.recommendations_summary.empty:
+                    if not recommendations_summary.empty:
                         st.subheader("Recommendation Summary")
-                        summary = stock.recommendations_summary.set_index('period')
+                        summary = recommendations_summary.set_index('period')
 
                         col1, col2 = st.columns(2)
 
@@ -597,7 +815,7 @@ def main():
                                 margin=dict(l=50, r=50, t=50, b=70)
                             )
 
-                            st.plotly_chart(fig_summary, use_container_width=True)
+                            show_chart(fig_summary, use_container_width=True)
 
                             # Add rating summary below the chart
                             latest = summary.iloc[0]
@@ -617,7 +835,6 @@ def main():
                             st.markdown("</div>", unsafe_allow_html=True)
 
                         with col2:
-                            price_targets = stock.info
                             current_price = price_targets.get('currentPrice', 0)
                             target_low = price_targets.get('targetLowPrice', 0)
                             target_mean = price_targets.get('targetMeanPrice', 0)
@@ -674,7 +891,7 @@ def main():
                                 bgcolor="white",
                             )
 
-                            st.plotly_chart(fig_targets, use_container_width=True)
+                            show_chart(fig_targets, use_container_width=True)
 
                 except Exception as e:
                     st.error(f"Error fetching analyst ratings: {str(e)}")
@@ -685,52 +902,43 @@ def main():
                 st.markdown(f"<h3>Fair Value Calculation - {ticker} </h3>", unsafe_allow_html=True)
                 try:
                     # Fetch required financial data
-                    financials = get_financial_data(st.session_state.formatted_ticker)
+                    financials = graph.node('financials', get_financial_data, dict(ticker=st.session_state.formatted_ticker),
+                                            salt=refresh_count)
                     
-                    # Get sector information
-                    metrics = get_financial_metrics(st.session_state.formatted_ticker)
+                    # Get sector information (memoized by the metrics node above)
+                    metrics = graph.node('metrics', get_financial_metrics, dict(ticker=st.session_state.formatted_ticker),
+                                         salt=refresh_count)
                     sector = metrics.get("Sector", "Unknown")
                     
                     # Calculate and display WACC components
-                    stock = yf.Ticker(st.session_state.formatted_ticker)
-                    beta = stock.info.get('beta', 1)  # Default to 1 if beta is not available
+                    stock = get_snapshot(st.session_state.formatted_ticker)
+                    # Yahoo has no beta for some listings; a year of daily returns regressed on the index stands in
+                    beta = graph.node('beta', valuation_beta,
+                                      dict(ticker=st.session_state.formatted_ticker, reported=stock.info.get('beta'),
+                                           benchmark=BENCHMARKS[index_for_ticker(ticker)]),
+                                      salt=refresh_count)
                      
                     roe = financials['net_income'] / financials['total_equity']
-                    
-                    cost_of_equity = risk_free_rate + beta * (market_risk_premium/100)
-                    
-                    if financials['total_debt'] != 0 and financials['interest_expense'] != 0:
-                        cost_of_debt = financials['interest_expense'] / financials['total_debt']
-                    else:
-                        cost_of_debt = risk_free_rate
-                    
-                    if financials['pre_tax_income'] != 0:
-                        tax_rate = financials['income_tax'] / financials['pre_tax_income']
-                    else:
-                        tax_rate = 0.21  # Assume a default corporate tax rate of 21%                    
-                    
-                    total_capital = financials['total_debt'] + financials['total_equity']
-                    if total_capital != 0:
-                        weight_of_debt = financials['total_debt'] / total_capital
-                        weight_of_equity = financials['total_equity'] / total_capital
-                    else:
-                        weight_of_debt = 0
-                        weight_of_equity = 1                    
-                    
-                    wacc = (weight_of_equity * cost_of_equity) + (weight_of_debt * cost_of_debt * (1 - tax_rate))
 
                     pe = stock.info.get('trailingPE', 'NA')
                     
+                    # Valuation only reruns when the DCF inputs, statements or metrics change
+                    fair_value, error_message, _, rates = graph.node(
+                        'valuation',
+                        lambda **inputs: fair_value_for(financials, **inputs),
+                        dict(sector=sector, beta=beta, current_price=current_price, risk_free_rate=risk_free_rate,
+                             market_risk_premium=market_risk_premium,
+                             terminal_growth_rate=terminal_growth_rate, high_growth_period=high_growth_period),
+                        deps=('financials', 'metrics'))
+                    cost_of_equity, cost_of_debt, wacc = rates['cost_of_equity'], rates['cost_of_debt'], rates['wacc']
+                    weight_of_debt, weight_of_equity = rates['weight_of_debt'], rates['weight_of_equity']
                     
                     # Calculate and display FCF Growth Rate
                     fcf_growth_rate, fcf_error = calculate_fcf_growth_rate(financials)
                     
-                    # Perform Valuation based on sector
                     if sector == 'Financial Services':
-                        fair_value, error_message = calculate_excess_return_fair_value(financials, cost_of_equity, terminal_growth_rate/100)
                         valuation_method = "Excess Return Model (for Financial company)"
                     else:
-                        fair_value, error_message = calculate_dcf_fair_value(financials, wacc, terminal_growth_rate/100, high_growth_period, current_price)
                         valuation_method = "Discounted Cash Flow (DCF) Model (Inapplicable to Negative FCF)"
                     
                    
@@ -748,14 +956,30 @@ def main():
                             st.markdown(f"Number of companies: {st.session_state.industry_averages['count']}")
                             if st.session_state.industry_averages['avg_pe']:
                                 st.markdown(f"Average P/E: {st.session_state.industry_averages['avg_pe']:.2f}")
+                                st.markdown(f"Median P/E: {st.session_state.industry_averages['median_pe']:.2f}")
                                 st.markdown(f"P/E Range: {st.session_state.industry_averages['min_pe']:.2f} - {st.session_state.industry_averages['max_pe']:.2f}")
                             else:
                                 st.markdown("Average P/E: N/A")
                             if st.session_state.industry_averages['avg_roe']:
                                 st.markdown(f"Average ROE: {st.session_state.industry_averages['avg_roe']:.2%}")
+                                st.markdown(f"Median ROE: {st.session_state.industry_averages['median_roe']:.2%}")
                                 st.markdown(f"ROE Range: {st.session_state.industry_averages['min_roe']:.2%} - {st.session_state.industry_averages['max_roe']:.2%}")
                             else:
                                 st.markdown("Average ROE: N/A")
+                            # Medians and quartiles of the other multiples; older peer indexes don't have them yet
+                            for metric, label, fmt in (('forward_pe', "Forward P/E", "{:.2f}"), ('pb', "P/B", "{:.2f}"),
+                                                       ('operating_margin', "Operating Margin", "{:.2%}"),
+                                                       ('profit_margin', "Profit Margin", "{:.2%}")):
+                                if st.session_state.industry_averages.get(f'median_{metric}') is not None:
+                                    st.markdown(f"Median {label}: {fmt.format(st.session_state.industry_averages[f'median_{metric}'])} "
+                                                f"(IQR {fmt.format(st.session_state.industry_averages[f'p25_{metric}'])} - "
+                                                f"{fmt.format(st.session_state.industry_averages[f'p75_{metric}'])})")
+                            standing = st.session_state.get('peer_standing') or {}
+                            ranks = [f"{label} {standing[f'{metric}_pct']:.0%}" for metric, label in
+                                     (('pe', "P/E"), ('forward_pe', "Fwd P/E"), ('pb', "P/B"), ('roe', "ROE"), ('profit_margin', "Margin"))
+                                     if standing.get(f'{metric}_pct') is not None]
+                            if ranks:
+                                st.markdown(f"Percentile in industry: {', '.join(ranks)}")
                         
 
                     with col2:
@@ -776,11 +1000,10 @@ def main():
                         
 
                     with col3:
-                        # FCF Trend Chart                        
+                        # FCF Trend Chart: every fiscal year kept in the statements warehouse (up to 10)
                         fcf_data = pd.DataFrame({
-                            'Year': ['3 years ago', '2 years ago', '1 year ago', 'Latest'],
-                            'FCF': [financials['fcf_3years_ago'], financials['fcf_2years_ago'], 
-                                    financials['fcf_1years_ago'], financials['fcf_latest']]
+                            'Year': financials['fcf_years'][:10][::-1],
+                            'FCF': financials['fcf_history'][:10][::-1]
                         })
                         
                         # Determine the appropriate scale (B or M) based on the maximum FCF value
@@ -815,7 +1038,7 @@ def main():
                         
                         fig_fcf.update_yaxes(tickformat=".2f")
                         
-                        st.plotly_chart(fig_fcf)
+                        show_chart(fig_fcf)
 
                     with col4:
                         if not error_message and isinstance(fair_value, (int, float)):
@@ -875,7 +1098,7 @@ def main():
                                         font=dict(color='black')
                                     )
                             
-                            st.plotly_chart(fig)
+                            show_chart(fig)
                             
                             st.markdown(f"<p><b>Difference with Fair Value:</b> ${diff:.2f}</p>", unsafe_allow_html=True)
                             
@@ -885,6 +1108,23 @@ def main():
                                 st.markdown(f"<p><b>Error Details:</b> {error_message}</p>", unsafe_allow_html=True)
                             st.markdown("<p>Please check the input data and ensure all required financial information is available.</p>", unsafe_allow_html=True)
 
+                    # DCF sensitivity: the whole WACC x terminal growth x period grid in one NumPy evaluation
+                    if sector != 'Financial Services' and fcf_growth_rate is not None:
+                        def build_sensitivity():
+                            waccs, terminal_growth_rates, high_growth_periods = sensitivity_axes(wacc, terminal_growth_rate/100, high_growth_period)
+                            grid, grid_error = dcf_fair_value_grid(financials, waccs, terminal_growth_rates, high_growth_periods,
+                                                                   current_price, fcf_growth_rate)
+                            if grid_error:
+                                return None
+                            return plot_dcf_sensitivity(grid, waccs, terminal_growth_rates, high_growth_periods,
+                                                        current_price, high_growth_period)
+                        fig_sensitivity = graph.node('dcf_sensitivity', build_sensitivity, deps=('valuation',))
+                        if fig_sensitivity is not None:
+                            show_chart(fig_sensitivity, use_container_width=True)
+
+                    monte_carlo_section(financials, sector, fcf_growth_rate, fcf_error, wacc, cost_of_equity,
+                                        terminal_growth_rate, high_growth_period, current_price, fair_value, error_message)
+
                     # New section: Intermediate Data for the Calculation
                     st.markdown("<h4>Intermediate Data for the Calculation:</h4>", unsafe_allow_html=True)
 
@@ -930,6 +1170,10 @@ def main():
                     st.write("Debug information:")
                     st.write(f"Financials: {financials}")
 
+                # Universe-wide screener: same valuation pipeline over every index constituent
+                screener_section(ticker, risk_free_rate, market_risk_premium, terminal_growth_rate, high_growth_period)
+                peer_section(ticker, st.session_state.formatted_ticker)
+
         except Exception as e:
             st.error(f"Error processing data: {str(e)}")
             st.write("Debug information:")
@@ -939,5 +1183,10 @@ def main():
     else:
         st.warning("No data available. Please check the ticker symbol and try again.")
 
+    # The book doesn't depend on the ticker above; its prices come from one batched download
+    position_book_section()
+
+    debug_panel(run_id, graph)
+
 if __name__ == "__main__":
     main()
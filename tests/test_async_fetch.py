@@ -0,0 +1,209 @@
+"""eli.async_fetch against a local mock HTTP server whose responses are scripted per symbol."""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import eli.async_fetch as async_fetch
+from eli.async_fetch import AIMDLimiter, RateLimited, fetch_all, fetch_stock_infos, make_json_fetcher
+
+
+class MockServer:
+    """/quote/<symbol> answers with the next status in script[symbol] (200 once it runs out)."""
+
+    def __init__(self, script=None, latency=None):
+        self.script = {symbol: list(statuses) for symbol, statuses in (script or {}).items()}
+        self.latency = latency or {}
+        self.requests = {}
+        self._lock = threading.Lock()
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                symbol = self.path.rsplit("/", 1)[-1]
+                with mock._lock:
+                    mock.requests[symbol] = mock.requests.get(symbol, 0) + 1
+                    statuses = mock.script.get(symbol)
+                    status = statuses.pop(0) if statuses else 200
+                time.sleep(mock.latency.get(symbol, 0.0))
+                body = json.dumps({'symbol': symbol, 'industry': 'Software', 'trailingPE': 25.0,
+                                   'returnOnEquity': 0.2} if status == 200 else {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.handle_error = lambda request, client_address: None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url_template = f"http://127.0.0.1:{self.server.server_address[1]}/quote/{{symbol}}"
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(script=None, latency=None):
+        server = MockServer(script, latency)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_wait(monkeypatch):
+    # Keep retries immediate; back-off itself is checked through the limiter
+    monkeypatch.setattr(async_fetch, "backoff_delay", lambda attempt, base=0.25, cap=8.0: 0.0)
+
+
+def run(symbols, server, **kwargs):
+    kwargs.setdefault("rate", 1000)
+    return asyncio.run(fetch_all(symbols, make_json_fetcher(server.url_template), **kwargs))
+
+
+def test_backs_off_on_429(mock_server):
+    symbols = [f"S{i}" for i in range(8)]
+    server = mock_server({symbol: [429] for symbol in symbols})
+    results, stats = run(symbols, server, concurrency=8)
+
+    assert all(results[symbol]['symbol'] == symbol for symbol in symbols)
+    assert stats.throttled == 8
+    assert stats.final_concurrency < 8
+
+
+def test_limiter_halves_on_throttle_and_grows_after_clean_window():
+    async def scenario():
+        limiter = AIMDLimiter(initial=8)
+        await limiter.acquire()
+        await limiter.release(throttled=True)
+        halved = limiter.limit
+        for _ in range(halved):
+            await limiter.acquire()
+            await limiter.release()
+        return halved, limiter.limit
+
+    assert asyncio.run(scenario()) == (4, 5)
+
+
+def test_retries_then_succeeds(mock_server):
+    server = mock_server({'FLAKY': [503, 503]})
+    results, stats = run(['FLAKY', 'OK'], server)
+
+    assert results['FLAKY']['symbol'] == 'FLAKY'
+    assert server.requests['FLAKY'] == 3
+    assert stats.retries == 2
+    assert stats.ok == 2 and stats.failed == 0
+
+
+def test_gives_up_after_retries(mock_server):
+    server = mock_server({'DOWN': [503] * 10})
+    results, stats = run(['DOWN'], server, retries=2)
+
+    assert isinstance(results['DOWN'], async_fetch.RetryableError)
+    assert server.requests['DOWN'] == 3
+    assert stats.failed == 1
+
+
+def test_deadline_expiry(mock_server):
+    server = mock_server(latency={'SLOW': 2.0})
+    results, stats = run(['SLOW', 'FAST'], server, deadline=0.3)
+
+    assert isinstance(results['SLOW'], asyncio.TimeoutError)
+    assert results['FAST']['symbol'] == 'FAST'
+    assert stats.timeouts == 1
+
+
+def test_deadline_starts_after_queueing(mock_server):
+    # At 20 requests/s the last symbols wait ~2 s for a token, longer than their deadline;
+    # that wait must not use up the time they need for a retry
+    symbols = [f"S{i:03d}" for i in range(40)]
+    server = mock_server({symbol: [503] for symbol in symbols})
+    results, stats = run(symbols, server, rate=20, burst=1, deadline=1.0)
+
+    assert stats.failed == 0
+    assert all(server.requests[symbol] == 2 for symbol in symbols)
+
+
+def test_error_rows_for_failing_symbols(mock_server):
+    server = mock_server({'GONE': [404] * 10, 'BUSY': [503] * 10})
+    rows, summary = fetch_stock_infos(['AAA', 'GONE', 'BUSY'], fetch_one=make_json_fetcher(server.url_template),
+                                      rate=1000, retries=1)
+
+    by_symbol = {row['symbol']: row for row in rows}
+    assert [row['symbol'] for row in rows] == ['AAA', 'GONE', 'BUSY']
+    assert by_symbol['AAA']['industry'] == 'Software' and by_symbol['AAA']['pe'] == 25.0
+    assert 'error' not in by_symbol['AAA']
+    for symbol in ('GONE', 'BUSY'):
+        assert by_symbol[symbol]['industry'] == 'Unknown'
+        assert by_symbol[symbol]['pe'] is None
+        assert by_symbol[symbol]['error']
+    assert summary['ok'] == 1 and summary['failed'] == 2
+    # 404 is not retried, 503 is
+    assert server.requests['GONE'] == 1 and server.requests['BUSY'] == 2
+
+
+def test_yfinance_info_maps_rate_limits(monkeypatch):
+    class Snapshot:
+        @property
+        def info(self):
+            raise Exception("429 Client Error: Too Many Requests")
+
+    monkeypatch.setattr(async_fetch, "get_snapshot", lambda symbol: Snapshot())
+    with pytest.raises(RateLimited):
+        asyncio.run(async_fetch.fetch_yfinance_info(None, "AAPL"))
+
+
+def test_yfinance_fetcher_runs_without_a_session(monkeypatch):
+    class Snapshot:
+        def __init__(self, symbol):
+            self.info = {'industry': 'Banks', 'trailingPE': 9.0, 'returnOnEquity': 0.1, 'symbol': symbol}
+
+    monkeypatch.setattr(async_fetch, "get_snapshot", Snapshot)
+    rows, summary = fetch_stock_infos([f"B{i}" for i in range(100)], rate=1000)
+
+    assert summary['ok'] == 100
+    assert all(row['industry'] == 'Banks' for row in rows)
+
+
+class HTTPError(Exception):
+    # Stands in for requests.HTTPError: the status is on error.response
+    def __init__(self, status):
+        super().__init__(f"{status} Error")
+        self.response = type("Response", (), {'status_code': status})()
+
+
+@pytest.mark.parametrize("error, attempts", [
+    (KeyError('trailingPE'), 1),
+    (ValueError("No data found, symbol may be delisted"), 1),
+    (HTTPError(404), 1),
+    (HTTPError(503), 3),
+    (ConnectionResetError("Connection reset by peer"), 3),
+])
+def test_yfinance_retries_only_transient_errors(monkeypatch, error, attempts):
+    calls = []
+
+    class Snapshot:
+        @property
+        def info(self):
+            calls.append(1)
+            raise error
+
+    monkeypatch.setattr(async_fetch, "get_snapshot", lambda symbol: Snapshot())
+    rows, summary = fetch_stock_infos(["X"], rate=1000, retries=2)
+
+    assert len(calls) == attempts
+    assert summary['failed'] == 1
+    assert rows[0]['error'] == (type(error).__name__ if attempts == 1 else "RetryableError")
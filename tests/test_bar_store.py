@@ -0,0 +1,159 @@
+"""eli.bar_store round trips, delta refreshes and corporate-action refetches against a scripted provider."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from eli.bar_store import BarStore, get_history, update_bars
+from eli.providers import BulkProvider, MarketDataProvider, set_provider
+
+
+def make_bars(days=200, tz="America/New_York"):
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days, name="Date").as_unit("ns")
+    if tz:
+        index = index.tz_localize(tz)
+    close = np.linspace(100.0, 150.0, days)
+    return pd.DataFrame({'Open': close - 1, 'High': close + 1, 'Low': close - 2, 'Close': close,
+                         'Volume': np.full(days, 1e6), 'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+
+
+class ScriptedProvider(MarketDataProvider):
+    """history() serves slices of `bars`; every call's arguments are kept in `calls`."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def history(self, ticker, **kwargs):
+        self.calls.append(kwargs)
+        return self._slice(kwargs)
+
+    def _slice(self, kwargs):
+        if 'start' in kwargs:
+            start = pd.Timestamp(kwargs['start'])
+            if self.bars.index.tz is not None:
+                start = start.tz_localize(self.bars.index.tz)
+            return self.bars[self.bars.index >= start].copy()
+        return self.bars.copy()
+
+    def payload(self, ticker, name):
+        raise NotImplementedError
+
+    def download(self, tickers, **kwargs):
+        raise NotImplementedError
+
+    def html_tables(self, url):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(str(tmp_path))
+
+
+@pytest.fixture
+def provider():
+    def install(bars):
+        scripted = ScriptedProvider(bars)
+        set_provider(scripted)
+        return scripted
+
+    yield install
+    set_provider(None)
+
+
+@pytest.mark.parametrize("tz", ["America/New_York", None])
+def test_round_trip_keeps_index_and_values(store, tz):
+    bars = make_bars(tz=tz)
+    store.save("AAPL", bars, None)
+    loaded, meta = store.load("AAPL")
+
+    pd.testing.assert_frame_equal(loaded, bars, check_freq=False)
+    assert meta['coverage_start'] == "max"
+
+
+def test_column_mismatch_is_a_miss(store):
+    store.save("AAPL", make_bars(), None)
+    # Bars swapped in by a concurrent save whose meta hasn't landed yet
+    store.save("AAPL", make_bars()[['Close']], None)
+    meta_path = os.path.join(store._dir("AAPL"), "meta.json")
+    with open(meta_path) as f:
+        meta = f.read().replace('["Close"]', '["Open", "Close"]')
+    with open(meta_path, "w") as f:
+        f.write(meta)
+
+    assert store.load("AAPL") == (None, None)
+
+
+@pytest.mark.parametrize("tz", ["America/New_York", None])
+def test_delta_refresh_appends_new_bars(store, provider, tz):
+    bars = make_bars(tz=tz)
+    scripted = provider(bars.iloc[:-5])
+    update_bars("AAPL", period="1y", store=store)
+
+    scripted.bars = bars
+    data = update_bars("AAPL", period="1y", store=store, force=True)
+
+    # Only the bars from the last cached date onwards are asked for
+    assert scripted.calls[-1] == {'start': bars.index[-6].strftime("%Y-%m-%d")}
+    pd.testing.assert_frame_equal(data, bars, check_freq=False)
+    pd.testing.assert_frame_equal(store.load("AAPL")[0], bars, check_freq=False)
+
+
+def test_recent_cache_skips_the_delta_fetch(store, provider):
+    scripted = provider(make_bars())
+    update_bars("AAPL", period="1y", store=store)
+    update_bars("AAPL", period="1y", store=store)
+
+    assert len(scripted.calls) == 1
+
+
+def test_corporate_action_refetches_the_period(store, provider):
+    bars = make_bars()
+    scripted = provider(bars.iloc[:-5])
+    update_bars("AAPL", period="1y", store=store)
+
+    # A split re-adjusts every earlier close
+    adjusted = bars.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] /= 2
+    adjusted.iloc[-2, adjusted.columns.get_loc('Stock Splits')] = 2.0
+    scripted.bars = adjusted
+    data = update_bars("AAPL", period="1y", store=store, force=True)
+
+    assert scripted.calls[-1] == {'period': "1y"}
+    pd.testing.assert_frame_equal(data, adjusted, check_freq=False)
+
+
+def test_get_history_trims_to_the_period(store, provider):
+    provider(make_bars(days=400))
+    data = get_history("AAPL", period="6mo", store=store)
+
+    assert data.index[0] >= (pd.Timestamp.now().normalize() - pd.DateOffset(months=6)).tz_localize("America/New_York")
+    assert data.index[-1] == make_bars(days=400).index[-1]
+
+
+class DownloadOnlyProvider(ScriptedProvider):
+    """download() like yf.download: ticker-grouped columns, and tz-naive daily bars unless ignore_tz=False."""
+
+    def download(self, tickers, **kwargs):
+        self.calls.append(kwargs)
+        bars = self._slice(kwargs)
+        if kwargs.get('ignore_tz', True):
+            bars = bars.tz_localize(None)
+        return pd.concat({ticker: bars for ticker in tickers}, axis=1)
+
+
+def test_delta_refresh_through_bulk_provider(store):
+    bars = make_bars()
+    base = DownloadOnlyProvider(bars.iloc[:-5])
+    set_provider(BulkProvider(base, window=0.01))
+    try:
+        update_bars("AAPL", period="1y", store=store)
+        base.bars = bars
+        data = update_bars("AAPL", period="1y", store=store, force=True)
+    finally:
+        set_provider(None)
+
+    assert [call.get('ignore_tz') for call in base.calls] == [False, False]
+    pd.testing.assert_frame_equal(data, bars, check_freq=False)
@@ -0,0 +1,81 @@
+"""Vectorised valuation models in eli.dcf / eli.monte_carlo against the scalar models in eli.valuation."""
+import numpy as np
+import pytest
+
+from eli.dcf import dcf_fair_value_grid, dcf_fair_values, excess_return_fair_values
+from eli.monte_carlo import default_dcf_specs, default_excess_return_specs, simulate_fair_value
+from eli.valuation import calculate_dcf_fair_value, calculate_excess_return_fair_value, calculate_fcf_growth_rate
+
+
+def make_financials(**overrides):
+    fcf_history = [120e6, 110e6, 100e6, 92e6, 85e6, 80e6]
+    financials = {
+        'fcf_history': fcf_history, 'fcf_latest': fcf_history[0], 'total_debt': 300e6,
+        'cash_and_cash_equivalents': 80e6, 'total_equity': 900e6, 'net_income': 130e6, 'share_issued': 50e6,
+    }
+    for years in (1, 2, 3, 5):
+        financials[f'fcf_{years}years_ago'] = fcf_history[years]
+    financials.update(overrides)
+    return financials
+
+
+@pytest.mark.parametrize("shares", [50e6, None])
+def test_dcf_matches_scalar_model(shares):
+    financials = make_financials(share_issued=shares)
+    growth, _ = calculate_fcf_growth_rate(financials)
+    values, error = dcf_fair_values(financials, 0.09, 0.025, 5, 180.0, growth)
+    expected, _ = calculate_dcf_fair_value(financials, 0.09, 0.025, 5, 180.0)
+
+    assert error is None
+    assert values == pytest.approx(expected)
+
+
+def test_excess_return_matches_scalar_model():
+    financials = make_financials()
+    values, error = excess_return_fair_values(financials, 0.1, 0.02)
+    expected, _ = calculate_excess_return_fair_value(financials, 0.1, 0.02)
+
+    assert error is None
+    assert values == pytest.approx(expected)
+
+
+def test_grid_shape_and_invalid_cells():
+    grid, error = dcf_fair_value_grid(make_financials(), [0.02, 0.09], [0.01, 0.03, 0.05], [4, 5], 180.0, 0.05)
+
+    assert error is None
+    assert grid.shape == (2, 3, 2)
+    # WACC at or below terminal growth has no finite value
+    assert np.isnan(grid[0, 1:]).all() and np.isfinite(grid[1, :2]).all()
+
+
+@pytest.mark.parametrize("overrides", [dict(share_issued="N/A"), dict(share_issued=0),
+                                       dict(share_issued=None, current_price=0)])
+def test_dcf_rejects_unusable_shares(overrides):
+    current_price = overrides.pop('current_price', 180.0)
+    values, error = dcf_fair_values(make_financials(**overrides), 0.09, 0.025, 5, current_price, 0.05)
+
+    assert values is None and error
+
+
+@pytest.mark.parametrize("overrides", [dict(share_issued="N/A"), dict(share_issued=0), dict(total_equity=0.0)])
+def test_excess_return_rejects_unusable_inputs(overrides):
+    values, error = excess_return_fair_values(make_financials(**overrides), 0.1, 0.02)
+
+    assert values is None and error
+
+
+@pytest.mark.parametrize("model, specs", [('dcf', default_dcf_specs(0.05, 0.09, 0.025)),
+                                          ('excess_return', default_excess_return_specs(0.1, 0.02))])
+def test_simulation_reports_bad_statements(model, specs):
+    result, error = simulate_fair_value(model, make_financials(share_issued="N/A"), specs, paths=1000,
+                                        current_price=180.0, seed=1)
+
+    assert result is None and error
+
+
+def test_simulation_runs():
+    result, error = simulate_fair_value('dcf', make_financials(), default_dcf_specs(0.05, 0.09, 0.025),
+                                        paths=20_000, current_price=180.0, chunk_size=5000, seed=1)
+
+    assert error is None
+    assert result['percentiles'][5] < result['percentiles'][50] < result['percentiles'][95]
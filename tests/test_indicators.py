@@ -0,0 +1,70 @@
+"""Persisted EMA state in eli.indicators stays equal to a full recomputation over the cached bars."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from eli.bar_store import BarStore
+from eli.indicators import EMAState, get_ema_state
+
+
+def make_close(days, seed=0):
+    index = pd.bdate_range(end="2026-10-16", periods=days, name="Date").as_unit("ns").tz_localize("America/New_York")
+    returns = np.random.default_rng(seed).normal(0.0005, 0.02, days)
+    return pd.Series(100 * np.exp(np.cumsum(returns)), index=index)
+
+
+def bars(close):
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1e6})
+
+
+def assert_matches_full(state, close):
+    expected = EMAState.from_close(close, state.spans)
+    np.testing.assert_allclose(state.values, expected.values)
+    assert state.count == len(close)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(str(tmp_path))
+
+
+def test_appended_bars_advance_the_state(store):
+    close = make_close(600)
+    store.save("AAPL", bars(close.iloc[:-10]), None)
+    get_ema_state("AAPL", store=store)
+
+    store.save("AAPL", bars(close), None)
+    assert_matches_full(get_ema_state("AAPL", store=store), close)
+
+
+def test_revised_last_bar_is_reapplied(store):
+    close = make_close(600)
+    store.save("AAPL", bars(close), None)
+    get_ema_state("AAPL", store=store)
+
+    # The last bar was a partial session; its final close differs
+    revised = close.copy()
+    revised.iloc[-1] *= 1.03
+    store.save("AAPL", bars(revised), None)
+    assert_matches_full(get_ema_state("AAPL", store=store), revised)
+
+
+def test_backfilled_history_rebuilds_the_state(store):
+    close = make_close(1500)
+    store.save("AAPL", bars(close.iloc[-260:]), None)
+    get_ema_state("AAPL", store=store)
+
+    # period="max" prepends older bars in front of the cached year
+    store.save("AAPL", bars(close), None)
+    assert_matches_full(get_ema_state("AAPL", store=store), close)
+
+
+def test_readjusted_history_rebuilds_the_state(store):
+    close = make_close(600)
+    store.save("AAPL", bars(close.iloc[:-5]), None)
+    get_ema_state("AAPL", store=store)
+
+    # A dividend re-adjusts every earlier close
+    adjusted = close * 0.98
+    store.save("AAPL", bars(adjusted), None)
+    assert_matches_full(get_ema_state("AAPL", store=store), adjusted)
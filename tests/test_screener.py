@@ -0,0 +1,65 @@
+"""eli.screener rows and ranking with the fundamentals and valuation calls replaced."""
+import pandas as pd
+import pytest
+
+import eli.peer_prices as peer_prices
+import eli.screener as screener
+from eli.screener import ranking, screen_symbol, statements_fingerprint
+
+INPUTS = dict(risk_free_rate=4.0, market_risk_premium=5.0, terminal_growth_rate=2.0, high_growth_period=5)
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """Serves `infos[symbol]` as the info payload and values every symbol at `fair_values[symbol]`."""
+    infos, fair_values, betas = {}, {}, []
+
+    class Snapshot:
+        def __init__(self, symbol):
+            self.info = infos[symbol]
+
+    def fair_value_for(financials, sector, beta, current_price, **inputs):
+        betas.append(beta)
+        return fair_values[financials['symbol']], None, 'DCF', {}
+
+    monkeypatch.setattr(screener, "get_snapshot", Snapshot)
+    monkeypatch.setattr(screener, "get_financial_data", lambda symbol: {'symbol': symbol})
+    monkeypatch.setattr(screener, "fair_value_for", fair_value_for)
+    return infos, fair_values, betas
+
+
+def test_negative_fair_value_has_no_discount_and_ranks_last(fake_upstream):
+    infos, fair_values, _ = fake_upstream
+    for symbol, fair_value in (('CHEAP', 200.0), ('DEAR', 100.0), ('LOSS', -1.39), ('ZERO', 0.0)):
+        infos[symbol] = {'currentPrice': 150.0, 'sector': 'Technology', 'beta': 1.1}
+        fair_values[symbol] = fair_value
+    table = {symbol: screen_symbol(symbol, None, INPUTS) for symbol in infos}
+
+    assert table['CHEAP']['discount_pct'] == pytest.approx(25.0)
+    assert table['LOSS'].get('discount_pct') is None and table['ZERO'].get('discount_pct') is None
+    ranked = ranking(table)
+    assert list(ranked['symbol'][:2]) == ['CHEAP', 'DEAR']
+    assert pd.isna(ranked['discount_pct'][2:]).all()
+
+
+def test_missing_beta_uses_the_realised_beta(fake_upstream, monkeypatch):
+    infos, fair_values, betas = fake_upstream
+    infos['NOBETA'] = {'currentPrice': 50.0, 'sector': 'Technology'}
+    fair_values['NOBETA'] = 60.0
+    monkeypatch.setattr(peer_prices, "realized_beta", lambda ticker, benchmark, period="1y": 1.7)
+
+    screen_symbol('NOBETA', None, INPUTS, benchmark="^GSPC")
+    screen_symbol('NOBETA', None, INPUTS)
+
+    # Without a benchmark there is nothing to regress on
+    assert betas == [1.7, 1]
+
+
+def test_statements_are_refetched_without_a_fingerprint(fake_upstream):
+    infos, fair_values, _ = fake_upstream
+    infos['NOFILING'] = {'currentPrice': 10.0, 'sector': 'Technology', 'beta': 1.0}
+    fair_values['NOFILING'] = 12.0
+    previous = {'fingerprint': statements_fingerprint({}), 'financials': {'symbol': 'NOFILING'}}
+
+    assert previous['fingerprint'] is None
+    assert screen_symbol('NOFILING', previous, INPUTS)['refetched']